@@ -3,13 +3,12 @@ Flask Application Main File
 MyShowz - Movie Ticket Booking System - Backend API Only
 """
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
 from database.db import init_db
 import os
-import re
 
 # Khởi tạo Flask app - Backend API Only
 app = Flask(__name__)
@@ -26,16 +25,84 @@ CORS(app, resources={
     r"/api/*": {
         "origins": Config.CORS_ORIGINS,
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "X-Chunk-SHA256"]
     }
 })
 
 # Khởi tạo JWT
 jwt = JWTManager(app)
 
+# Đếm query SQL mỗi request, cảnh báo N+1, header Server-Timing
+from middleware.sql_profiler import sql_profiler
+sql_profiler.init_app(app)
+
+# Ghi log query chậm kèm EXPLAIN: flask sql slow-report
+from middleware.slow_query_log import slow_query_log
+slow_query_log.init_app(app)
+
+# Sau reverse proxy: lấy IP client từ X-Forwarded-For (chỉ tin PROXY_FIX_HOPS proxy), dùng cho rate limit
+if app.config['PROXY_FIX_HOPS'] > 0:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    hops = app.config['PROXY_FIX_HOPS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
+# Giới hạn tần suất request (login/register/booking) trước khi chạy bcrypt hay query DB
+from middleware.rate_limit import rate_limiter
+rate_limiter.init_app(app)
+
+# Thu hồi JWT (logout): kiểm tra jti trong bộ nhớ, không query DB mỗi request
+from services.token_revocation import token_revocation
+token_revocation.init_app(app)
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return token_revocation.is_revoked(jwt_payload['jti'])
+
+
+# Băm mật khẩu (bcrypt) trên thread pool giới hạn, cost theo BCRYPT_LOG_ROUNDS
+from utils.password_hasher import password_hasher
+password_hasher.init_app(app)
+
 # Khởi tạo database
 db = init_db(app)
 
+# Benchmark index trước/sau migration trên dữ liệu seed: flask sql index-benchmark
+from database.index_benchmark import register_cli as register_index_benchmark
+register_index_benchmark(app)
+
+# Sinh dữ liệu giả lập khối lượng lớn để test tải: flask seed generate
+from database.data_generator import register_cli as register_data_generator
+register_data_generator(app)
+
+# Background worker xóa file upload sau khi commit
+from services.media.deletion_queue import deletion_queue
+deletion_queue.init_app(app)
+
+# Lưu file upload theo hash nội dung (dedup, chỉ xóa khi không còn được tham chiếu)
+from services.media.content_store import content_store
+content_store.init_app(app)
+
+# Phục vụ file upload (stream theo range, cache metadata)
+from services.media.file_server import media_file_server
+media_file_server.init_app(app)
+
+# Resize ảnh upload (thumb/card/hero) trong process pool
+from services.media.image_derivatives import image_pipeline
+image_pipeline.init_app(app)
+
+# Đọc thời lượng/độ phân giải video và chuyển moov lên đầu file MP4 (chạy nền)
+from services.media.video_metadata import video_pipeline
+video_pipeline.init_app(app)
+
+# CLI dọn file upload không còn được tham chiếu: flask uploads gc
+from services.media.orphan_gc import init_upload_gc
+init_upload_gc(app)
+
+# Rollup tables cho dashboard (cập nhật theo sự kiện booking/payment)
+from services.admin.dashboard_service import init_dashboard_rollups
+init_dashboard_rollups(app)
+
 # Import và đăng ký blueprints
 from routes.auth import auth_bp
 from routes.admin import admin_bp
@@ -124,65 +191,11 @@ def health():
     }), 200
 
 
-# Serve uploaded files
+# Serve uploaded files (streaming, range requests, HEAD)
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    """Serve uploaded files with proper MIME types"""
-    import mimetypes
-    from flask import Response
-    import os
-    
-    file_path = os.path.join('uploads', filename)
-    
-    if not os.path.exists(file_path):
-        return jsonify({
-            'success': False,
-            'message': 'File not found'
-        }), 404
-    
-    # Get MIME type
-    mime_type, _ = mimetypes.guess_type(filename)
-    if mime_type is None:
-        mime_type = 'application/octet-stream'
-    
-    # For video files, support range requests for seeking
-    if mime_type.startswith('video/'):
-        from flask import request
-        
-        file_size = os.path.getsize(file_path)
-        range_header = request.headers.get('Range', None)
-        
-        if range_header:
-            # Parse range header
-            byte_start = 0
-            byte_end = file_size - 1
-            
-            match = re.search(r'bytes=(\d+)-(\d*)', range_header)
-            if match:
-                byte_start = int(match.group(1))
-                if match.group(2):
-                    byte_end = int(match.group(2))
-            
-            length = byte_end - byte_start + 1
-            
-            # Read the requested range
-            with open(file_path, 'rb') as f:
-                f.seek(byte_start)
-                data = f.read(length)
-            
-            response = Response(
-                data,
-                206,  # Partial Content
-                mimetype=mime_type,
-                direct_passthrough=True
-            )
-            response.headers.add('Content-Range', f'bytes {byte_start}-{byte_end}/{file_size}')
-            response.headers.add('Accept-Ranges', 'bytes')
-            response.headers.add('Content-Length', str(length))
-            return response
-    
-    # Normal file serving
-    return send_from_directory('uploads', filename, mimetype=mime_type)
+    """Serve uploaded files with proper MIME types and range support"""
+    return media_file_server.serve(filename)
 
 
 if __name__ == '__main__':
@@ -22,15 +22,56 @@ class Config:
         f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 10,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', '30')),  # seconds a request waits for a connection
         'pool_recycle': 3600,
         'pool_pre_ping': True,
     }
     
+    # Connection pool sizing and metrics (database/pool_monitor.py)
+    DB_POOL_SIZING = os.environ.get('DB_POOL_SIZING', 'fixed').lower()  # 'fixed': DB_POOL_SIZE/DB_MAX_OVERFLOW, 'auto': from the budget below
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))  # worker processes sharing the database
+    DB_POOL_REQUEST_THREADS = int(os.environ.get('DB_POOL_REQUEST_THREADS', '8'))  # request threads per worker
+    DB_CONNECTIONS_PER_REQUEST = int(os.environ.get('DB_CONNECTIONS_PER_REQUEST', '1'))  # connections one request holds at once
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '151'))  # server max_connections (MySQL default 151)
+    DB_RESERVED_CONNECTIONS = int(os.environ.get('DB_RESERVED_CONNECTIONS', '10'))  # kept free for CLI, cron, admin sessions
+    DB_POOL_HOLD_WARN_MS = float(os.environ.get('DB_POOL_HOLD_WARN_MS', '1000'))  # log connections checked out longer than this
+    
+    # Read replicas: @read_only service calls read from these (comma-separated URLs), writes go to the primary
+    SQLALCHEMY_REPLICA_URIS = [u.strip() for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    REPLICA_READ_YOUR_WRITES_SECONDS = float(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', '5'))  # client reads primary after a write
+    REPLICA_HEALTH_CHECK_INTERVAL = float(os.environ.get('REPLICA_HEALTH_CHECK_INTERVAL', '10'))  # seconds between SELECT 1 checks
+    REPLICA_RETRY_AFTER = float(os.environ.get('REPLICA_RETRY_AFTER', '30'))  # seconds before an unhealthy replica is retried
+    
+    # SQL profiling per request (middleware/sql_profiler.py)
+    SQL_PROFILING_ENABLED = os.environ.get('SQL_PROFILING_ENABLED', 'True').lower() == 'true'
+    SQL_NPLUSONE_THRESHOLD = int(os.environ.get('SQL_NPLUSONE_THRESHOLD', '10'))  # same statement shape more often -> N+1 warning
+    SQL_NPLUSONE_RAISE = {'true': True, 'false': False}.get(os.environ.get('SQL_NPLUSONE_RAISE', '').lower())  # unset: raise only when TESTING
+    SQL_SERVER_TIMING = os.environ.get('SQL_SERVER_TIMING', os.environ.get('FLASK_DEBUG', 'True')).lower() == 'true'  # Server-Timing header
+    SQL_PROFILE_REPORT_PATH = os.environ.get('SQL_PROFILE_REPORT_PATH')  # per-endpoint JSON report written at exit
+    
+    # Slow query log (middleware/slow_query_log.py): JSONL with parameters, call site and EXPLAIN
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'True').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+    SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', '1.0'))  # fraction of slow statements logged
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'True').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', '300'))  # seconds between EXPLAINs of one shape
+    SLOW_QUERY_LOG_PATH = os.environ.get('SLOW_QUERY_LOG_PATH', 'logs/slow_queries.jsonl')  # one file per process: <name>.<pid>.jsonl
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', '10485760'))  # rotate at 10MB
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', '5'))
+    
     # JWT config
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-myshowz-2024')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', '86400')))  # 24 hours
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', '2592000')))  # 30 days
+    AUTH_STATUS_CACHE_TTL = int(os.environ.get('AUTH_STATUS_CACHE_TTL', '60'))  # seconds a worker trusts cached role/is_active
+    
+    # Token revocation (logout): revoked jtis are kept in memory per worker
+    TOKEN_REVOCATION_SYNC_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', '5'))  # seconds, max delay across workers
+    TOKEN_REVOCATION_PRUNE_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_PRUNE_INTERVAL', '300'))  # seconds between deletes of expired rows
+    TOKEN_REVOCATION_BLOOM_CAPACITY = int(os.environ.get('TOKEN_REVOCATION_BLOOM_CAPACITY', '100000'))  # grows x2 when exceeded
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE = float(os.environ.get('TOKEN_REVOCATION_BLOOM_ERROR_RATE', '0.001'))
     
     # CORS config - Allow frontend running on different port
     cors_origins = os.environ.get('CORS_ORIGINS', 'http://localhost:3000')
@@ -41,6 +82,54 @@ class Config:
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', '16777216'))  # 16MB default
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     
+    # Chunked (resumable) uploads - each chunk request stays under MAX_CONTENT_LENGTH
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', '8388608'))  # 8MB
+    UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', '4294967296'))  # 4GB
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', '86400'))  # seconds
+    UPLOAD_GC_GRACE_HOURS = float(os.environ.get('UPLOAD_GC_GRACE_HOURS', '24'))  # `flask uploads gc` and the deletion queue keep younger files
+    
+    # Read-model caches (seconds; per worker process, invalidated on admin writes)
+    CINEMA_DETAIL_CACHE_TTL = int(os.environ.get('CINEMA_DETAIL_CACHE_TTL', '30'))
+    
+    # Image derivatives (thumb/card/hero WebP + JPEG, generated in a process pool; needs Pillow)
+    IMAGE_DERIVATIVES_ENABLED = os.environ.get('IMAGE_DERIVATIVES_ENABLED', 'True').lower() == 'true'
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+    IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', '80'))
+    
+    # Video processing (metadata probe + MP4 faststart copy on a thread pool; poster frames need ffmpeg)
+    VIDEO_PROCESSING_ENABLED = os.environ.get('VIDEO_PROCESSING_ENABLED', 'True').lower() == 'true'
+    VIDEO_WORKERS = int(os.environ.get('VIDEO_WORKERS', '1'))
+    VIDEO_FFMPEG_PATH = os.environ.get('VIDEO_FFMPEG_PATH')  # default: ffmpeg on PATH, if any
+    
+    # Media file server (/uploads/...)
+    MEDIA_CHUNK_SIZE = int(os.environ.get('MEDIA_CHUNK_SIZE', '65536'))  # bytes per read for partial ranges
+    MEDIA_MAX_RANGES = int(os.environ.get('MEDIA_MAX_RANGES', '16'))  # more ranges -> serve whole file
+    MEDIA_METADATA_TTL = float(os.environ.get('MEDIA_METADATA_TTL', '5'))  # seconds
+    MEDIA_HOT_CACHE_MAX_BYTES = int(os.environ.get('MEDIA_HOT_CACHE_MAX_BYTES', '67108864'))  # 64MB of small files in memory, 0 disables
+    MEDIA_HOT_CACHE_MAX_FILE_SIZE = int(os.environ.get('MEDIA_HOT_CACHE_MAX_FILE_SIZE', '1048576'))  # larger files are always streamed
+    MEDIA_IMMUTABLE_MAX_AGE = int(os.environ.get('MEDIA_IMMUTABLE_MAX_AGE', '31536000'))  # content-addressed files
+    
+    # Media deletion queue (files are removed by a background worker after commit)
+    MEDIA_DELETE_JOURNAL = os.environ.get('MEDIA_DELETE_JOURNAL')  # default: <UPLOAD_FOLDER>/.pending_deletions.jsonl (one <name>.<pid>.jsonl per process)
+    MEDIA_DELETE_BATCH_SIZE = int(os.environ.get('MEDIA_DELETE_BATCH_SIZE', '50'))
+    MEDIA_DELETE_MAX_RETRIES = int(os.environ.get('MEDIA_DELETE_MAX_RETRIES', '5'))
+    MEDIA_DELETE_RETRY_DELAY = float(os.environ.get('MEDIA_DELETE_RETRY_DELAY', '2.0'))  # seconds, doubled per retry
+    
     # Security
-    BCRYPT_LOG_ROUNDS = 12
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', '12'))  # changing it rehashes passwords on next login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))  # bcrypt hashes running at once
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', '64'))  # hashes allowed to wait for a worker
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '5'))  # seconds to wait for a queue slot before 503
+    
+    # Rate limiting (middleware/rate_limit.py): endpoint or blueprint -> [(key, rate)], key = ip | email | user
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL')  # redis://... to share limits between workers
+    # Reverse proxies (nginx, load balancer) in front of the app whose X-Forwarded-For/-Proto/-Host are trusted;
+    # 0 = clients connect directly (the headers could be forged, request.remote_addr is the client)
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', '0'))
+    RATE_LIMITS = {
+        'auth.login': [('ip', '30/minute'), ('email', '5/minute')],  # credential stuffing
+        'auth.register': [('ip', '5/hour')],
+        'bookings': [('user', '30/minute')],  # seat holds/bookings, applies once the blueprint is registered
+    }
 
@@ -49,6 +49,7 @@ CREATE TABLE actors (
     name VARCHAR(255) NOT NULL,
     bio TEXT,
     photo_url VARCHAR(500),
+    photo_variants JSON,
     date_of_birth DATE,
     nationality VARCHAR(100),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -79,6 +80,10 @@ CREATE TABLE movie_images (
     image_type VARCHAR(50) DEFAULT 'POSTER',
     caption VARCHAR(255),
     display_order INT DEFAULT 0,
+    variants JSON,
+    width INT,
+    height INT,
+    blurhash VARCHAR(64),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE,
     INDEX idx_movie_id (movie_id),
@@ -94,6 +99,10 @@ CREATE TABLE movie_videos (
     title VARCHAR(255),
     duration_seconds INT,
     display_order INT DEFAULT 0,
+    width INT,
+    height INT,
+    bitrate INT,
+    poster_url VARCHAR(500),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE,
     INDEX idx_movie_id (movie_id),
@@ -153,7 +162,9 @@ CREATE TABLE showtimes (
     INDEX idx_show_datetime (show_datetime),
     INDEX idx_movie_id (movie_id),
     INDEX idx_screen_id (screen_id),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_showtimes_screen_datetime (screen_id, show_datetime),
+    INDEX idx_showtimes_movie_datetime (movie_id, show_datetime)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Bảng BOOKINGS
@@ -172,7 +183,9 @@ CREATE TABLE bookings (
     INDEX idx_user_id (user_id),
     INDEX idx_showtime_id (showtime_id),
     INDEX idx_booking_code (booking_code),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_bookings_showtime_status (showtime_id, status),
+    INDEX idx_bookings_user_created (user_id, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Bảng BOOKING_SEATS
@@ -185,7 +198,8 @@ CREATE TABLE booking_seats (
     FOREIGN KEY (seat_id) REFERENCES seats(seat_id) ON DELETE CASCADE,
     UNIQUE KEY unique_booking_seat (booking_id, seat_id),
     INDEX idx_booking_id (booking_id),
-    INDEX idx_seat_id (seat_id)
+    INDEX idx_seat_id (seat_id),
+    INDEX idx_booking_seats_seat_booking (seat_id, booking_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Bảng PAYMENTS
@@ -201,7 +215,8 @@ CREATE TABLE payments (
     FOREIGN KEY (booking_id) REFERENCES bookings(booking_id) ON DELETE CASCADE,
     INDEX idx_booking_id (booking_id),
     INDEX idx_payment_status (payment_status),
-    INDEX idx_transaction_id (transaction_id)
+    INDEX idx_transaction_id (transaction_id),
+    INDEX idx_payments_status_created (payment_status, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Bảng REVIEWS
@@ -250,6 +265,40 @@ CREATE TABLE booking_promotions (
     INDEX idx_promotion_id (promotion_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Bảng DAILY_SALES_STATS (rollup cho dashboard, cập nhật theo sự kiện)
+CREATE TABLE daily_sales_stats (
+    stat_date DATE NOT NULL,
+    cinema_id INT NOT NULL,
+    movie_id INT NOT NULL,
+    bookings_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    seats_sold INT NOT NULL DEFAULT 0,
+    seats_capacity INT NOT NULL DEFAULT 0,
+    showtimes_count INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stat_date, cinema_id, movie_id),
+    INDEX idx_cinema_id (cinema_id),
+    INDEX idx_movie_id (movie_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Bảng DAILY_USER_STATS (số user mới theo ngày)
+CREATE TABLE daily_user_stats (
+    stat_date DATE PRIMARY KEY,
+    new_users INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Bảng REVOKED_TOKENS (JWT đã thu hồi khi logout, xóa dần khi hết hạn)
+CREATE TABLE revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    user_id INT,
+    token_type VARCHAR(10) NOT NULL DEFAULT 'access',
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_expires_at (expires_at),
+    INDEX idx_revoked_at (revoked_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Insert sample data
 
 -- Admin user (password: 123456)
@@ -430,6 +479,10 @@ INSERT INTO promotions (code, name, description, discount_percentage, discount_a
 ('MATINEE20K', 'Matinee Show', 'Save 20,000 VND on shows before 5 PM', NULL, 20000.00, '2024-01-01', '2024-12-31', NULL, 567, TRUE),
 ('BLOCKBUSTER10', 'Blockbuster Deal', '10% off on all blockbuster movies', 10.00, NULL, '2024-11-01', '2024-12-31', 1000, 445, TRUE);
 
+-- Khởi tạo rollup user mới cho dữ liệu mẫu (các ghi sau đó được cập nhật tự động)
+INSERT INTO daily_user_stats (stat_date, new_users)
+SELECT DATE(created_at), COUNT(*) FROM users GROUP BY DATE(created_at);
+
 SELECT 'Database created successfully!' as message;
 SELECT '✅ 2 sample users created:' as info;
 SELECT '   Admin: admin@gmail.com / 123456' as admin_account;
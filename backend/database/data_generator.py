@@ -0,0 +1,679 @@
+"""
+Synthetic Data Generator
+Fills the database with production-like volumes for scale testing
+
+`flask seed generate --scale medium` (or explicit --users/--cinemas/...):
+
+- Users, actors, movies (with cast), cinemas, screens with seat layouts
+  (VIP block in the middle rows, COUPLE seats in the back row), showtimes,
+  bookings with their seats and payments, promotion redemptions and reviews
+- Showtimes follow a per-screen daily schedule (first show 9:00-10:00,
+  movie duration + cleaning gap, last show before 23:30), so screens never
+  overlap; occupancy depends on movie popularity, weekend and evening slots,
+  and how far ahead a future show is
+- Every value comes from one random.Random(seed) and the --start date, so
+  the same arguments on the same database produce the same rows
+- Rows are written with SQLAlchemy Core executemany inserts in batches of
+  --batch-size, parents before children, one transaction per batch;
+  primary keys continue after the current maximum, so existing data is kept
+- Dashboard rollups are rebuilt at the end (Core inserts bypass the ORM
+  events that maintain them)
+"""
+from database.db import db
+from sqlalchemy import bindparam, func, insert, select, update
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+import bcrypt
+import bisect
+import click
+import itertools
+import math
+import random
+import time
+
+
+# Insert order: parents before children (foreign keys)
+TABLE_ORDER = (
+    'users', 'actors', 'movies', 'movie_actors', 'cinemas', 'screens', 'seats', 'promotions',
+    'showtimes', 'bookings', 'booking_seats', 'payments', 'booking_promotions', 'reviews',
+)
+
+SCALES = {
+    'small': {
+        'users': 2000, 'movies': 40, 'actors': 300, 'cinemas': 4, 'screens_per_cinema': 5,
+        'days': 14, 'occupancy': 0.35, 'reviews': 5000, 'promotions': 10, 'promotion_rate': 0.1
+    },
+    'medium': {
+        'users': 100000, 'movies': 300, 'actors': 3000, 'cinemas': 40, 'screens_per_cinema': 8,
+        'days': 30, 'occupancy': 0.3, 'reviews': 200000, 'promotions': 50, 'promotion_rate': 0.1
+    },
+    # ~10k showtimes a day
+    'large': {
+        'users': 1000000, 'movies': 800, 'actors': 10000, 'cinemas': 300, 'screens_per_cinema': 6,
+        'days': 30, 'occupancy': 0.3, 'reviews': 2000000, 'promotions': 200, 'promotion_rate': 0.1
+    },
+}
+
+SYNTHETIC_PASSWORD = 'Synthetic@123'
+
+FAMILY_NAMES = ('Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ', 'Ngô', 'Dương', 'Lý')
+FAMILY_WEIGHTS = (38, 11, 9.5, 7, 5.1, 5, 4.5, 3.9, 3.9, 2.1, 2, 1.4, 1.3, 1.3, 1, 0.5)
+MIDDLE_NAMES = ('Văn', 'Thị', 'Minh', 'Ngọc', 'Thanh', 'Đức', 'Hoài', 'Gia', 'Quốc', 'Anh', 'Bảo', 'Thu')
+GIVEN_NAMES = (
+    'An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hoa', 'Hùng', 'Huy', 'Khánh', 'Lan',
+    'Linh', 'Long', 'Mai', 'Nam', 'Nga', 'Phong', 'Phương', 'Quân', 'Quỳnh', 'Sơn', 'Tâm', 'Thảo', 'Trang',
+    'Trung', 'Tuấn', 'Vy', 'Yến', 'Đạt', 'Khoa', 'My', 'Ngân', 'Nhi', 'Thắng', 'Vinh'
+)
+ACTOR_FIRST = (
+    'James', 'Emma', 'Liam', 'Olivia', 'Noah', 'Sophia', 'Lucas', 'Mia', 'Ethan', 'Chloe', 'Daniel', 'Grace',
+    'Min-ho', 'Ji-woo', 'Haruto', 'Yui', 'Wei', 'Mei', 'Tuấn', 'Ngọc', 'Mateo', 'Lucía', 'Omar', 'Amara'
+)
+ACTOR_LAST = (
+    'Smith', 'Johnson', 'Brown', 'Taylor', 'Anderson', 'Clarke', 'Walker', 'Hughes', 'Moreau', 'Rossi',
+    'Kim', 'Park', 'Lee', 'Tanaka', 'Sato', 'Chen', 'Wang', 'Nguyễn', 'Trần', 'García', 'López', 'Haddad'
+)
+NATIONALITIES = ('American', 'British', 'Korean', 'Japanese', 'Chinese', 'Vietnamese', 'French', 'Spanish')
+TITLE_ADJECTIVES = (
+    'Last', 'Silent', 'Broken', 'Hidden', 'Crimson', 'Endless', 'Lost', 'Golden', 'Frozen', 'Wild', 'Dark',
+    'Midnight', 'Distant', 'Burning', 'Forgotten', 'Electric'
+)
+TITLE_NOUNS = (
+    'Horizon', 'Kingdom', 'Echo', 'River', 'Empire', 'Garden', 'Signal', 'Storm', 'Legacy', 'Voyage', 'Mirror',
+    'Frontier', 'Promise', 'Orbit', 'Harbor', 'Shadow', 'Summer', 'Code'
+)
+GENRES = (
+    'Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy', 'Horror', 'Romance',
+    'Sci-Fi', 'Thriller'
+)
+LANGUAGES = (('English', 60), ('Vietnamese', 15), ('Korean', 10), ('Japanese', 8), ('Chinese', 4), ('French', 3))
+AGE_RATINGS = (('P', 25), ('K', 10), ('T13', 35), ('T16', 20), ('T18', 10))
+CITIES = (
+    # (city, weight, latitude, longitude)
+    ('TP. Hồ Chí Minh', 40, 10.7769, 106.7009),
+    ('Hà Nội', 35, 21.0285, 105.8542),
+    ('Đà Nẵng', 8, 16.0544, 108.2022),
+    ('Hải Phòng', 6, 20.8449, 106.6881),
+    ('Cần Thơ', 5, 10.0452, 105.7469),
+    ('Nha Trang', 3, 12.2388, 109.1967),
+    ('Huế', 3, 16.4637, 107.5909),
+)
+CINEMA_BRANDS = ('MyShowz', 'MyShowz Premium', 'MyShowz Cinema')
+# screen_type: (weight, rows, seats per row, base ticket price)
+SCREEN_TYPES = {
+    '2D': (60, (8, 12), (12, 18), 75000),
+    '3D': (30, (9, 12), (14, 18), 95000),
+    'IMAX': (10, (13, 16), (20, 26), 130000),
+}
+SEAT_PRICE_FACTORS = {'REGULAR': Decimal('1'), 'VIP': Decimal('1.3'), 'COUPLE': Decimal('2.2')}
+PAYMENT_METHODS = (('MOMO', 35), ('VNPAY', 25), ('CREDIT_CARD', 20), ('ZALOPAY', 12), ('CASH', 8))
+REVIEW_COMMENTS = (
+    None, None, 'Phim hay, đáng xem!', 'Kỹ xảo đẹp, nội dung ổn.', 'Hơi dài nhưng cuối phim rất cảm động.',
+    'Diễn viên diễn xuất tốt.', 'Không như kỳ vọng.', 'Âm thanh rạp rất đã.', 'Sẽ xem lại lần nữa.'
+)
+# Group sizes of a booking and their weights
+GROUP_SIZES = (1, 2, 3, 4, 5, 6)
+GROUP_WEIGHTS = (28, 45, 9, 12, 3, 3)
+
+FIRST_SHOW = dt_time(9, 0)
+LAST_SHOW = dt_time(23, 30)
+CLEANING_MINUTES = 20
+
+
+def _weighted(options):
+    """(values, cumulative weights) for rng.choices"""
+    values = [value for value, *_ in options]
+    return values, list(itertools.accumulate(weight for _, weight, *_ in options))
+
+
+PAYMENT_METHOD_CHOICES = _weighted(PAYMENT_METHODS)
+
+
+def _round_price(value):
+    return (Decimal(value) / 1000).quantize(Decimal('1')) * 1000
+
+
+class BatchWriter:
+    """
+    Buffers rows per table, flushes them parents-first with executemany
+    
+    Rows of one unit (a showtime with its bookings, seats and payments) are
+    added in any order; checkpoint() is called between units, so a flush
+    never writes a child without its parent
+    """
+    
+    def __init__(self, engine, batch_size):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.tables = {name: db.metadata.tables[name] for name in TABLE_ORDER}
+        self.buffers = {name: [] for name in TABLE_ORDER}
+        self.counts = dict.fromkeys(TABLE_ORDER, 0)
+        self.pending = 0
+    
+    def add(self, table, row):
+        self.buffers[table].append(row)
+        self.pending += 1
+    
+    def checkpoint(self):
+        if self.pending >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        if not self.pending:
+            return
+        with self.engine.begin() as conn:
+            for name in TABLE_ORDER:
+                rows = self.buffers[name]
+                if rows:
+                    conn.execute(insert(self.tables[name]), rows)
+                    self.counts[name] += len(rows)
+                    self.buffers[name] = []
+        self.pending = 0
+
+
+class SyntheticDataGenerator:
+    """Generates and writes one deterministic data set"""
+    
+    def __init__(self, engine, volumes, seed=42, start=None, batch_size=5000, password_hash=None, log=None):
+        """
+        Args:
+            engine: Target engine (schema already created)
+            volumes (dict): users, movies, actors, cinemas, screens_per_cinema, days,
+                occupancy, reviews, promotions, promotion_rate
+            seed (int): Random seed
+            start (date): First show day (default: today - days/2, so half the shows are past)
+            batch_size (int): Rows per executemany/transaction
+            password_hash (str): Hash stored for every user (default: hash of SYNTHETIC_PASSWORD)
+            log (callable): Progress output (default: print)
+        """
+        self.engine = engine
+        self.volumes = volumes
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.start = start or date.today() - timedelta(days=volumes['days'] // 2)
+        # The synthetic "now": shows before it are COMPLETED, after it are partly booked
+        self.now = datetime.combine(self.start + timedelta(days=volumes['days'] // 2), dt_time(12, 0))
+        self.writer = BatchWriter(engine, batch_size)
+        self.password_hash = password_hash
+        self.log = log or print
+        self.ids = {}
+    
+    def run(self):
+        """
+        Generate everything
+        
+        Returns:
+            dict: Rows written per table
+        """
+        self._next_ids()
+        steps = (
+            ('users', self._users),
+            ('actors', self._actors),
+            ('movies', self._movies),
+            ('cinemas', self._cinemas),
+            ('promotions', self._promotions),
+            ('showtimes + bookings', self._showtimes),
+            ('reviews', self._reviews),
+        )
+        for name, step in steps:
+            started = time.perf_counter()
+            step()
+            self.writer.flush()
+            self.log(f"   {name}: {time.perf_counter() - started:.1f}s")
+        self._update_promotion_usage()
+        return dict(self.writer.counts)
+    
+    def _next_ids(self):
+        """Primary keys continue after the existing rows"""
+        with self.engine.connect() as conn:
+            for name, table in self.writer.tables.items():
+                pk = list(table.primary_key.columns)[0]
+                current = conn.execute(select(func.max(pk))).scalar() or 0
+                self.ids[name] = itertools.count(current + 1)
+    
+    def _id(self, table):
+        return next(self.ids[table])
+    
+    def _timestamp(self, days_back, end=None):
+        """Random moment in the days_back days before end (default: now), later days more likely"""
+        end = end or self.now
+        offset = days_back * 86400 * (1 - math.sqrt(self.rng.random()))
+        return end - timedelta(seconds=int(offset))
+    
+    def _password_hash(self):
+        """bcrypt hash of SYNTHETIC_PASSWORD with a salt drawn from the seed (gensalt is random)"""
+        from utils.password_hasher import password_hasher
+        alphabet = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+        # 22 base64 chars carry 128 bits: the last one only has 2 significant bits
+        salt = ''.join(self.rng.choice(alphabet) for _ in range(21)) + self.rng.choice('.Oeu')
+        salt = f'$2b${password_hasher.rounds:02d}${salt}'.encode('ascii')
+        return bcrypt.hashpw(SYNTHETIC_PASSWORD.encode('utf-8'), salt).decode('utf-8')
+    
+    # ==================== CATALOG ====================
+    
+    def _users(self):
+        rng = self.rng
+        password_hash = self.password_hash
+        if password_hash is None:
+            password_hash = self.password_hash = self._password_hash()
+        self.user_ids = []
+        for _ in range(self.volumes['users']):
+            user_id = self._id('users')
+            created = self._timestamp(730)
+            name = ' '.join((
+                rng.choices(FAMILY_NAMES, FAMILY_WEIGHTS)[0], rng.choice(MIDDLE_NAMES), rng.choice(GIVEN_NAMES)
+            ))
+            self.writer.add('users', {
+                'user_id': user_id,
+                'email': f'user{user_id}@synthetic.myshowz.vn',
+                'password_hash': password_hash,
+                'full_name': name,
+                'phone_number': f'09{rng.randrange(10 ** 8):08d}',
+                'date_of_birth': date(1960, 1, 1) + timedelta(days=rng.randrange(16000)),
+                'role': 'user',
+                'is_active': rng.random() > 0.02,
+                'created_at': created,
+                'updated_at': created
+            })
+            self.user_ids.append(user_id)
+            self.writer.checkpoint()
+    
+    def _actors(self):
+        rng = self.rng
+        self.actor_ids = []
+        for _ in range(self.volumes['actors']):
+            actor_id = self._id('actors')
+            self.writer.add('actors', {
+                'actor_id': actor_id,
+                'name': f'{rng.choice(ACTOR_FIRST)} {rng.choice(ACTOR_LAST)}',
+                'bio': None,
+                'date_of_birth': date(1950, 1, 1) + timedelta(days=rng.randrange(20000)),
+                'nationality': rng.choice(NATIONALITIES),
+                'created_at': self.now,
+                'updated_at': self.now
+            })
+            self.actor_ids.append(actor_id)
+            self.writer.checkpoint()
+    
+    def _movies(self):
+        rng = self.rng
+        languages, language_weights = _weighted(LANGUAGES)
+        age_ratings, age_weights = _weighted(AGE_RATINGS)
+        self.movies = []  # (movie_id, duration, quality)
+        for rank in range(1, self.volumes['movies'] + 1):
+            movie_id = self._id('movies')
+            duration = int(min(max(rng.gauss(120, 20), 80), 190))
+            quality = min(max(rng.gauss(3.6, 0.6), 1.5), 4.9)  # Mean review stars
+            title = rng.choice((
+                f'The {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}',
+                f'{rng.choice(TITLE_NOUNS)} of the {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}',
+                f'{rng.choice(TITLE_NOUNS)} {rng.randint(2, 4)}',
+            ))
+            self.writer.add('movies', {
+                'movie_id': movie_id,
+                'title': title,
+                'description': f'{title}: phim {rng.choice(GENRES).lower()} dài {duration} phút.',
+                'duration_minutes': duration,
+                'release_date': self.start - timedelta(days=rng.randrange(150)),
+                'director': f'{rng.choice(ACTOR_FIRST)} {rng.choice(ACTOR_LAST)}',
+                'genre': ', '.join(rng.sample(GENRES, rng.randint(1, 3))),
+                'language': rng.choices(languages, cum_weights=language_weights)[0],
+                'rating': Decimal(str(round(quality * 2, 1))),
+                'age_rating': rng.choices(age_ratings, cum_weights=age_weights)[0],
+                'is_showing': True,
+                'created_at': self.now,
+                'updated_at': self.now
+            })
+            self.movies.append((movie_id, duration, quality))
+            
+            cast = rng.sample(self.actor_ids, min(len(self.actor_ids), rng.randint(3, 8)))
+            for order, actor_id in enumerate(cast, 1):
+                self.writer.add('movie_actors', {
+                    'movie_actor_id': self._id('movie_actors'),
+                    'movie_id': movie_id,
+                    'actor_id': actor_id,
+                    'role_name': 'Lead' if order <= 2 else 'Supporting',
+                    'character_name': rng.choice(GIVEN_NAMES),
+                    'display_order': order
+                })
+            self.writer.checkpoint()
+        
+        # Popularity is Zipf-like: a few blockbusters take most of the shows and seats
+        weights = [1 / rank ** 0.9 for rank in range(1, len(self.movies) + 1)]
+        self.movie_cum_weights = list(itertools.accumulate(weights))
+        self.movie_popularity = [0.5 + 1.5 * math.sqrt(w / weights[0]) for w in weights]
+    
+    def _cinemas(self):
+        rng = self.rng
+        cities, city_weights = _weighted(CITIES)
+        centers = {city: (lat, lon) for city, _, lat, lon in CITIES}
+        screen_types, screen_weights = _weighted(
+            [(name, weight) for name, (weight, *_) in SCREEN_TYPES.items()]
+        )
+        self.screens = []  # (screen_id, screen_type, [(seat_id, seat_type)])
+        for i in range(self.volumes['cinemas']):
+            cinema_id = self._id('cinemas')
+            city = rng.choices(cities, cum_weights=city_weights)[0]
+            lat, lon = centers[city]
+            self.writer.add('cinemas', {
+                'cinema_id': cinema_id,
+                'name': f'{rng.choice(CINEMA_BRANDS)} {city} {i + 1}',
+                'address': f'{rng.randint(1, 500)} Đường số {rng.randint(1, 60)}, {city}',
+                'city': city,
+                'phone_number': f'028{rng.randrange(10 ** 7):07d}',
+                'latitude': Decimal(str(round(lat + rng.uniform(-0.08, 0.08), 6))),
+                'longitude': Decimal(str(round(lon + rng.uniform(-0.08, 0.08), 6))),
+                'created_at': self.now,
+                'updated_at': self.now
+            })
+            for n in range(1, self.volumes['screens_per_cinema'] + 1):
+                screen_type = rng.choices(screen_types, cum_weights=screen_weights)[0]
+                self._screen(cinema_id, n, screen_type)
+            self.writer.checkpoint()
+    
+    def _screen(self, cinema_id, number, screen_type):
+        """Screen with a seat layout: VIP block in the middle, couple seats in the back row"""
+        rng = self.rng
+        _, (min_rows, max_rows), (min_seats, max_seats), _ = SCREEN_TYPES[screen_type]
+        rows = rng.randint(min_rows, max_rows)
+        per_row = rng.randint(min_seats, max_seats)
+        screen_id = self._id('screens')
+        
+        seats = []
+        vip_rows = range(rows // 3, rows // 3 + max(rows // 4, 1))
+        vip_columns = range(per_row // 4 + 1, per_row - per_row // 4 + 1)
+        for r in range(rows):
+            row_label = chr(ord('A') + r)
+            couple = r == rows - 1
+            for number_in_row in range(1, (per_row // 2 if couple else per_row) + 1):
+                seat_type = 'COUPLE' if couple else 'VIP' if r in vip_rows and number_in_row in vip_columns else 'REGULAR'
+                seat_id = self._id('seats')
+                seats.append((seat_id, seat_type))
+                self.writer.add('seats', {
+                    'seat_id': seat_id,
+                    'screen_id': screen_id,
+                    'seat_row': row_label,
+                    'seat_number': number_in_row,
+                    'seat_type': seat_type,
+                    'is_available': True
+                })
+        
+        self.writer.add('screens', {
+            'screen_id': screen_id,
+            'cinema_id': cinema_id,
+            'screen_name': f'{screen_type} {number}' if screen_type != '2D' else f'Phòng {number}',
+            'total_seats': len(seats),
+            'screen_type': screen_type
+        })
+        self.screens.append((screen_id, screen_type, seats))
+    
+    def _promotions(self):
+        rng = self.rng
+        self.promotions = []  # (promotion_id, valid_from, valid_to, percentage, amount)
+        self.promotion_usage = {}
+        window_start = self.start - timedelta(days=30)
+        for _ in range(self.volumes['promotions']):
+            promotion_id = self._id('promotions')
+            valid_from = window_start + timedelta(days=rng.randrange(self.volumes['days'] + 30))
+            valid_to = valid_from + timedelta(days=rng.randint(14, 90))
+            if rng.random() < 0.7:
+                percentage, amount = Decimal(rng.choice((5, 10, 15, 20, 25, 30))), None
+            else:
+                percentage, amount = None, Decimal(rng.choice((20000, 30000, 50000)))
+            self.writer.add('promotions', {
+                'promotion_id': promotion_id,
+                'code': f'SYN{promotion_id:06d}',
+                'name': f'Ưu đãi {percentage}%' if percentage else f'Giảm {amount:,.0f}đ',
+                'description': 'Khuyến mãi tạo tự động cho kiểm thử tải',
+                'discount_percentage': percentage,
+                'discount_amount': amount,
+                'valid_from': valid_from,
+                'valid_to': valid_to,
+                'usage_limit': None,
+                'used_count': 0,
+                'is_active': True,
+                'created_at': datetime.combine(valid_from, dt_time(0, 0))
+            })
+            self.promotions.append((promotion_id, valid_from, valid_to, percentage, amount))
+            self.writer.checkpoint()
+    
+    # ==================== SHOWTIMES AND BOOKINGS ====================
+    
+    def _showtimes(self):
+        rng = self.rng
+        movie_count = len(self.movies)
+        if not movie_count or not self.user_ids:
+            return
+        for day_offset in range(self.volumes['days']):
+            day = self.start + timedelta(days=day_offset)
+            weekend = day.weekday() >= 4  # Friday to Sunday
+            for screen_id, screen_type, seats in self.screens:
+                base_price = SCREEN_TYPES[screen_type][3]
+                show = datetime.combine(day, FIRST_SHOW) + timedelta(minutes=15 * rng.randint(0, 4))
+                last = datetime.combine(day, LAST_SHOW)
+                while show <= last:
+                    index = bisect.bisect_left(self.movie_cum_weights, rng.random() * self.movie_cum_weights[-1])
+                    index = min(index, movie_count - 1)
+                    movie_id, duration, _ = self.movies[index]
+                    evening = 18 <= show.hour < 22
+                    price = _round_price(base_price * (1.2 if weekend and evening else 1))
+                    occupancy = (
+                        self.volumes['occupancy'] * self.movie_popularity[index]
+                        * (1.35 if weekend else 1) * (1.3 if evening else 0.8) * rng.uniform(0.5, 1.5)
+                    )
+                    self._showtime(movie_id, screen_id, show, price, seats, occupancy)
+                    self.writer.checkpoint()
+                    
+                    # Next show: after the movie and cleaning, on a 5-minute mark
+                    gap = duration + CLEANING_MINUTES
+                    show += timedelta(minutes=gap + (-gap) % 5)
+    
+    def _showtime(self, movie_id, screen_id, show, price, seats, occupancy):
+        rng = self.rng
+        showtime_id = self._id('showtimes')
+        if show > self.now:
+            # Future shows: bookings ramp up over the week before the show
+            days_ahead = (show - self.now).total_seconds() / 86400
+            occupancy *= max(0.0, 1 - days_ahead / 7)
+        sold = min(int(len(seats) * min(occupancy, 0.97)), len(seats))
+        
+        taken = 0
+        if sold:
+            chosen = rng.sample(seats, sold)
+            i = 0
+            while i < sold:
+                size = rng.choices(GROUP_SIZES, GROUP_WEIGHTS)[0]
+                group = chosen[i:i + size]
+                i += size
+                if self._booking(showtime_id, show, price, group):
+                    taken += len(group)
+        
+        self.writer.add('showtimes', {
+            'showtime_id': showtime_id,
+            'movie_id': movie_id,
+            'screen_id': screen_id,
+            'show_datetime': show,
+            'base_price': price,
+            'available_seats': len(seats) - taken,
+            'status': 'COMPLETED' if show < self.now else 'SCHEDULED',
+            'created_at': show - timedelta(days=14)
+        })
+    
+    def _booking(self, showtime_id, show, price, seats):
+        """
+        One booking with its seats, payment and maybe a promotion
+        
+        Returns:
+            bool: True if the booking holds its seats (not cancelled)
+        """
+        rng = self.rng
+        booking_id = self._id('bookings')
+        created = self._timestamp(7, end=min(show, self.now) - timedelta(minutes=10))
+        roll = rng.random()
+        if show > self.now and roll < 0.05:
+            status = 'PENDING'
+        elif roll < 0.12:
+            status = 'CANCELLED'
+        else:
+            status = 'CONFIRMED'
+        
+        subtotal = Decimal(0)
+        for seat_id, seat_type in seats:
+            seat_price = _round_price(price * SEAT_PRICE_FACTORS[seat_type])
+            subtotal += seat_price
+            self.writer.add('booking_seats', {
+                'booking_seat_id': self._id('booking_seats'),
+                'booking_id': booking_id,
+                'seat_id': seat_id,
+                'price': seat_price
+            })
+        
+        discount = Decimal(0)
+        if status == 'CONFIRMED' and self.promotions and rng.random() < self.volumes['promotion_rate']:
+            promotion = rng.choice(self.promotions)
+            promotion_id, valid_from, valid_to, percentage, amount = promotion
+            if valid_from <= created.date() <= valid_to:
+                discount = min(subtotal * percentage / 100 if percentage else amount, subtotal)
+                discount = discount.quantize(Decimal('1'))
+                self.writer.add('booking_promotions', {
+                    'booking_promotion_id': self._id('booking_promotions'),
+                    'booking_id': booking_id,
+                    'promotion_id': promotion_id,
+                    'discount_applied': discount
+                })
+                self.promotion_usage[promotion_id] = self.promotion_usage.get(promotion_id, 0) + 1
+        total = subtotal - discount
+        
+        self.writer.add('bookings', {
+            'booking_id': booking_id,
+            'user_id': self.user_ids[int(len(self.user_ids) * rng.random() ** 1.5)],  # Regulars book more
+            'showtime_id': showtime_id,
+            'booking_code': f'BK{booking_id:010d}',
+            'booking_datetime': created,
+            'total_amount': total,
+            'status': status,
+            'created_at': created,
+            'updated_at': created
+        })
+        
+        methods, method_weights = PAYMENT_METHOD_CHOICES
+        paid = status == 'CONFIRMED'
+        self.writer.add('payments', {
+            'payment_id': self._id('payments'),
+            'booking_id': booking_id,
+            'amount': total,
+            'payment_method': rng.choices(methods, cum_weights=method_weights)[0],
+            'transaction_id': f'TXN{booking_id:012d}' if paid else None,
+            'payment_status': {'CONFIRMED': 'COMPLETED', 'PENDING': 'PENDING', 'CANCELLED': 'REFUNDED'}[status],
+            'payment_datetime': created + timedelta(seconds=rng.randint(20, 300)) if paid else None,
+            'created_at': created
+        })
+        return status != 'CANCELLED'
+    
+    # ==================== REVIEWS ====================
+    
+    def _reviews(self):
+        """Reviews of popular movies by active bookers, one per (user, movie)"""
+        rng = self.rng
+        wanted = min(self.volumes['reviews'], len(self.user_ids) * len(self.movies))
+        if not wanted:
+            return
+        seen = set()
+        comments = REVIEW_COMMENTS
+        attempts = 0
+        while len(seen) < wanted and attempts < wanted * 3:
+            attempts += 1
+            index = min(
+                bisect.bisect_left(self.movie_cum_weights, rng.random() * self.movie_cum_weights[-1]),
+                len(self.movies) - 1
+            )
+            movie_id, _, quality = self.movies[index]
+            user_id = self.user_ids[int(len(self.user_ids) * rng.random() ** 1.5)]
+            if (user_id, movie_id) in seen:
+                continue
+            seen.add((user_id, movie_id))
+            self.writer.add('reviews', {
+                'review_id': self._id('reviews'),
+                'user_id': user_id,
+                'movie_id': movie_id,
+                'rating': min(max(round(rng.gauss(quality, 0.9)), 1), 5),
+                'comment': rng.choice(comments),
+                'created_at': self._timestamp(self.volumes['days'])
+            })
+            self.writer.checkpoint()
+    
+    def _update_promotion_usage(self):
+        if not self.promotion_usage:
+            return
+        table = self.writer.tables['promotions']
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(table).where(table.c.promotion_id == bindparam('pid')).values(used_count=bindparam('used')),
+                [{'pid': pid, 'used': used} for pid, used in self.promotion_usage.items()]
+            )
+
+
+def register_cli(app):
+    """Register `flask seed generate`"""
+    
+    @app.cli.group('seed')
+    def seed_cli():
+        """Synthetic data for development and scale testing"""
+    
+    @seed_cli.command('generate')
+    @click.option('--scale', type=click.Choice(sorted(SCALES)), default='small', help='Preset volumes')
+    @click.option('--users', type=int, help='Users')
+    @click.option('--movies', type=int, help='Movies')
+    @click.option('--actors', type=int, help='Actors')
+    @click.option('--cinemas', type=int, help='Cinemas')
+    @click.option('--screens-per-cinema', type=int, help='Screens per cinema')
+    @click.option('--days', type=int, help='Days of showtimes (half past, half upcoming)')
+    @click.option('--occupancy', type=float, help='Average share of seats sold')
+    @click.option('--reviews', type=int, help='Reviews')
+    @click.option('--promotions', type=int, help='Promotions')
+    @click.option('--promotion-rate', type=float, help='Share of confirmed bookings using a promotion')
+    @click.option('--start', default=None, help='First show day YYYY-MM-DD (default: today - days/2)')
+    @click.option('--seed', 'seed_value', default=42, help='Random seed')
+    @click.option('--batch-size', default=5000, help='Rows per insert batch')
+    @click.option('--create-tables', is_flag=True, help='Create missing tables first (SQLite dev databases)')
+    @click.option('--skip-rollups', is_flag=True, help='Do not rebuild the dashboard rollups afterwards')
+    @click.option('--yes', is_flag=True, help='Do not ask for confirmation')
+    def generate_command(scale, start, seed_value, batch_size, create_tables, skip_rollups, yes, **overrides):
+        """Fill the configured database with deterministic synthetic data"""
+        volumes = dict(SCALES[scale])
+        volumes.update({key: value for key, value in overrides.items() if value is not None})
+        url = db.engine.url.render_as_string(hide_password=True)
+        click.echo(f"Target: {url}")
+        click.echo('Volumes: ' + ', '.join(f'{key}={value}' for key, value in volumes.items()))
+        if not yes:
+            click.confirm('Insert this data?', abort=True)
+        
+        if create_tables:
+            db.create_all(bind_key=None)
+        
+        # Bulk batches and the rollup rebuild are slow and hold their connection
+        # by design: keep them out of the slow query log and long-hold warnings
+        from middleware.slow_query_log import slow_query_log
+        from database.pool_monitor import pool_monitor
+        from services.admin.dashboard_service import DashboardService
+        slow_log_enabled, slow_query_log.enabled = slow_query_log.enabled, False
+        hold_warn, pool_monitor.hold_warn = pool_monitor.hold_warn, float('inf')
+        try:
+            started = time.perf_counter()
+            generator = SyntheticDataGenerator(
+                db.engine, volumes, seed=seed_value,
+                start=date.fromisoformat(start) if start else None,
+                batch_size=batch_size, log=click.echo
+            )
+            counts = generator.run()
+            elapsed = time.perf_counter() - started
+            
+            total = sum(counts.values())
+            click.echo(', '.join(f'{name}={n}' for name, n in counts.items() if n))
+            click.echo(f'{total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)')
+            click.echo(f'Shows from {generator.start} for {volumes["days"]} day(s); user password: {SYNTHETIC_PASSWORD}')
+            
+            if not skip_rollups:
+                click.echo(DashboardService.rebuild_rollups().get('message'))
+        finally:
+            slow_query_log.enabled = slow_log_enabled
+            pool_monitor.hold_warn = hold_warn
@@ -1,12 +1,166 @@
 """
 Database Initialization Module
 Khởi tạo SQLAlchemy và Flask-Migrate
+
+Read/write splitting: service methods marked @read_only run their SELECTs on
+a replica (SQLALCHEMY_REPLICA_URIS), chosen round-robin among the healthy
+ones. Everything else stays on the primary:
+- writes, and reads in a session transaction that has already written
+- reads by a client that committed a write in the last
+  REPLICA_READ_YOUR_WRITES_SECONDS (so it doesn't see replica lag)
+- reads while no replica is healthy
 """
+from flask import has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import event, text
+from utils.cache import TaggedCache
+from database.pool_monitor import pool_monitor
+from contextvars import ContextVar
+from functools import wraps
+import hashlib
+import itertools
+import threading
+import time
+
+
+_read_only = ContextVar('read_only', default=False)
+
+
+def read_only(fn):
+    """Decorator: SELECTs inside fn may be served by a replica"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Picks a replica engine: round-robin over the healthy ones"""
+    
+    def __init__(self):
+        self.bind_keys = []
+        self.health_interval = 10
+        self.retry_after = 30
+        self._health = {}  # bind_key -> (healthy, checked_at)
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._recent_writers = TaggedCache(ttl=5, max_entries=10000)
+    
+    @property
+    def enabled(self):
+        return bool(self.bind_keys)
+    
+    def init_app(self, app):
+        uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+        self.bind_keys = [f'replica_{i}' for i in range(len(uris))]
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        # Same pool options as the primary (string binds would get SQLAlchemy's defaults)
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+        binds.update({key: dict(engine_options, url=uri) for key, uri in zip(self.bind_keys, uris)})
+        app.config['SQLALCHEMY_BINDS'] = binds
+        self.health_interval = app.config.get('REPLICA_HEALTH_CHECK_INTERVAL', self.health_interval)
+        self.retry_after = app.config.get('REPLICA_RETRY_AFTER', self.retry_after)
+        self._health = {}
+        self._recent_writers = TaggedCache(
+            ttl=app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5), max_entries=10000
+        )
+    
+    def choose(self):
+        """
+        Next healthy replica engine
+        
+        Returns:
+            Engine: Replica engine, or None to use the primary
+        """
+        n = len(self.bind_keys)
+        start = next(self._counter)
+        for i in range(n):
+            bind_key = self.bind_keys[(start + i) % n]
+            if self._is_healthy(bind_key):
+                return db.engines[bind_key]
+        return None
+    
+    def mark_unhealthy(self, bind_key):
+        with self._lock:
+            self._health[bind_key] = (False, time.monotonic())
+        print(f"⚠️  Replica {bind_key} marked unhealthy, reads go to other replicas/primary")
+    
+    def _is_healthy(self, bind_key):
+        healthy, checked_at = self._health.get(bind_key, (True, 0.0))
+        interval = self.health_interval if healthy else self.retry_after
+        if time.monotonic() - checked_at < interval:
+            return healthy
+        
+        # Re-check at most once per interval (other threads keep the old answer meanwhile)
+        with self._lock:
+            self._health[bind_key] = (healthy, time.monotonic())
+        try:
+            with db.engines[bind_key].connect() as conn:
+                conn.execute(text('SELECT 1'))
+            healthy = True
+        except Exception as e:
+            print(f"⚠️  Replica {bind_key} health check failed: {e}")
+            healthy = False
+        with self._lock:
+            self._health[bind_key] = (healthy, time.monotonic())
+        return healthy
+    
+    # ==================== READ YOUR WRITES ====================
+    
+    @staticmethod
+    def _client_key():
+        """The caller's token, or its address when unauthenticated"""
+        if not has_request_context():
+            return None
+        client = request.headers.get('Authorization') or request.remote_addr or ''
+        return hashlib.blake2b(client.encode('utf-8'), digest_size=8).hexdigest()
+    
+    def record_write(self):
+        key = self._client_key()
+        if key is not None:
+            self._recent_writers.set(key, True)
+    
+    def recently_wrote(self):
+        key = self._client_key()
+        return key is not None and self._recent_writers.get(key) is not None
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session that sends @read_only SELECTs to a replica"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and replica_router.enabled:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['wrote'] = True
+            elif _read_only.get() and not self.info.get('wrote') and not replica_router.recently_wrote():
+                engine = replica_router.choose()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('wrote', False):
+        replica_router.record_write()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('wrote', None)
+
 
 # Khởi tạo SQLAlchemy instance
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 
@@ -20,6 +174,12 @@ def init_db(app):
     Returns:
         db: SQLAlchemy instance
     """
+    # Kích thước pool (fixed/auto) và pool class có đo thời gian chờ connection
+    pool_monitor.init_app(app)
+    
+    # Replica engines (nếu có) được đăng ký thành binds replica_<i>
+    replica_router.init_app(app)
+    
     # Initialize SQLAlchemy with app
     db.init_app(app)
     
@@ -32,7 +192,8 @@ def init_db(app):
         from models import (
             User, Movie, Cinema, Screen, Review,
             Seat, Showtime, Booking, BookingSeat,
-            Payment, Promotion, BookingPromotion
+            Payment, Promotion, BookingPromotion,
+            DailySalesStat, DailyUserStat
         )
         
         # KHÔNG tự động tạo bảng vì đã có SQL script
@@ -41,5 +202,20 @@ def init_db(app):
         print("✅ Database models loaded successfully")
         print(f"📊 Total models: {len(db.Model.__subclasses__())}")
         
+        # Metrics của connection pool (checkout, chờ, overflow, pre-ping, giữ connection lâu)
+        pool_monitor.instrument(db.engines)
+        
+        # Replica lỗi kết nối: ngừng đọc từ nó cho tới lần kiểm tra sau
+        for bind_key in replica_router.bind_keys:
+            event.listen(db.engines[bind_key], 'handle_error', _replica_error_handler(bind_key))
+        if replica_router.enabled:
+            print(f"📚 Read replicas: {len(replica_router.bind_keys)}")
+        
     return db
 
+
+def _replica_error_handler(bind_key):
+    def handle_error(context):
+        if context.is_disconnect:
+            replica_router.mark_unhealthy(bind_key)
+    return handle_error
@@ -0,0 +1,231 @@
+"""
+Index Benchmark
+Before/after timings of the booking-era access paths on seeded data
+
+`flask sql index-benchmark` builds a scratch database (never the app's),
+fills it with the synthetic data generator (database/data_generator.py,
+--scale small by default), then runs the hot queries twice:
+
+- before: the schema without the composite indexes (single-column indexes
+  only, as in create_database.sql before migration 7c2e91d4a5b3)
+- after: with the composite indexes declared on the models
+
+and prints avg/p95 latency and the query plan of each query for both runs.
+The scratch database is SQLite by default; pass --url with an empty MySQL
+schema to measure on the production engine.
+"""
+from database.db import db
+from database.data_generator import SCALES, TABLE_ORDER, SyntheticDataGenerator
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from datetime import date, datetime, timedelta
+import click
+import os
+import random
+import tempfile
+import time
+
+
+COMPOSITE_INDEXES = (
+    'idx_showtimes_screen_datetime',
+    'idx_showtimes_movie_datetime',
+    'idx_bookings_showtime_status',
+    'idx_bookings_user_created',
+    'idx_booking_seats_seat_booking',
+    'idx_payments_status_created',
+)
+
+# (name, SQL, params(rng, sizes)) - the statements the services run on every booking/listing
+QUERIES = (
+    (
+        'showtimes of a screen in a window',
+        "SELECT showtime_id, show_datetime FROM showtimes "
+        "WHERE screen_id = :screen_id AND show_datetime >= :start AND show_datetime < :end",
+        lambda rng, sizes: _window(rng, sizes, screen_id=rng.randint(1, sizes['screens']), hours=6)
+    ),
+    (
+        'upcoming showtimes of a movie',
+        "SELECT showtime_id, screen_id, show_datetime FROM showtimes "
+        "WHERE movie_id = :movie_id AND show_datetime >= :start "
+        "ORDER BY show_datetime LIMIT 20",
+        lambda rng, sizes: _window(rng, sizes, movie_id=rng.randint(1, sizes['movies']), hours=0)
+    ),
+    (
+        'booked seats of a showtime',
+        "SELECT bs.seat_id FROM bookings b "
+        "JOIN booking_seats bs ON bs.booking_id = b.booking_id "
+        "WHERE b.showtime_id = :showtime_id AND b.status IN ('PENDING', 'CONFIRMED')",
+        lambda rng, sizes: {'showtime_id': rng.randint(1, sizes['showtimes'])}
+    ),
+    (
+        'booking history of a user',
+        "SELECT booking_id, booking_code, total_amount, status FROM bookings "
+        "WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 20",
+        lambda rng, sizes: {'user_id': rng.randint(1, sizes['users'])}
+    ),
+    (
+        'bookings holding a seat',
+        "SELECT booking_id FROM booking_seats WHERE seat_id = :seat_id",
+        lambda rng, sizes: {'seat_id': rng.randint(1, sizes['seats'])}
+    ),
+    (
+        'completed payments in a day',
+        "SELECT COUNT(*), SUM(amount) FROM payments "
+        "WHERE payment_status = 'COMPLETED' AND created_at >= :start AND created_at < :end",
+        lambda rng, sizes: _window(rng, sizes, hours=24)
+    ),
+)
+
+# Fixed first show day: the same --seed gives the same data on every run
+EPOCH = date(2026, 1, 1)
+
+
+def _window(rng, sizes, hours, **params):
+    start = sizes['start'] + timedelta(hours=rng.randint(0, sizes['days'] * 24))
+    params['start'] = start
+    if hours:
+        params['end'] = start + timedelta(hours=hours)
+    return params
+
+
+def _tables():
+    return [db.metadata.tables[name] for name in TABLE_ORDER]
+
+
+def _index(name):
+    for table in _tables():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(name)
+
+
+def explain(conn, sql, params):
+    """One-line query plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on MySQL)"""
+    if conn.dialect.name == 'sqlite':
+        rows = conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params).mappings().all()
+        return '; '.join(row['detail'] for row in rows)
+    rows = conn.execute(text('EXPLAIN ' + sql), params).mappings().all()
+    return '; '.join(f"{row['table']}:{row['type']}:{row['key'] or '-'}" for row in rows)
+
+
+def run_queries(engine, sizes, repeat, seed_value):
+    """
+    Time every query (same parameter sequence on every run)
+    
+    Returns:
+        dict: name -> {avg_ms, p95_ms, plan}
+    """
+    results = {}
+    with engine.connect() as conn:
+        for name, sql, make_params in QUERIES:
+            rng = random.Random(f'{seed_value}:{name}')
+            params = [make_params(rng, sizes) for _ in range(repeat)]
+            statement = text(sql)
+            conn.execute(statement, params[0]).all()  # Warm-up
+            timings = []
+            for p in params:
+                started = time.perf_counter()
+                conn.execute(statement, p).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[name] = {
+                'avg_ms': sum(timings) / len(timings),
+                'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+                'plan': explain(conn, sql, params[0])
+            }
+    return results
+
+
+def benchmark(url, volumes, repeat=200, seed_value=42):
+    """
+    Seed a scratch database and time the hot queries without, then with,
+    the composite indexes
+    
+    Returns:
+        tuple: (seeded row counts, before results, after results)
+    """
+    engine = create_engine(url)
+    tables = _tables()
+    try:
+        db.metadata.drop_all(engine, tables=tables)
+        db.metadata.create_all(engine, tables=tables)
+        for name in COMPOSITE_INDEXES:
+            _index(name).drop(engine)
+        
+        generator = SyntheticDataGenerator(
+            engine, volumes, seed=seed_value, start=EPOCH, password_hash='x', log=lambda message: None
+        )
+        counts = generator.run()
+        # Empty scratch tables: ids run from 1 to the row count
+        sizes = dict(counts, start=datetime.combine(EPOCH, datetime.min.time()), days=volumes['days'])
+        _analyze(engine)
+        before = run_queries(engine, sizes, repeat, seed_value)
+        
+        for name in COMPOSITE_INDEXES:
+            _index(name).create(engine)
+        _analyze(engine)
+        after = run_queries(engine, sizes, repeat, seed_value)
+        return counts, before, after
+    finally:
+        db.metadata.drop_all(engine, tables=tables)
+        engine.dispose()
+
+
+def _analyze(engine):
+    """Refresh planner statistics so both runs plan on the seeded data"""
+    with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text('ANALYZE'))
+        elif engine.dialect.name == 'mysql':
+            conn.execute(text(f"ANALYZE TABLE {', '.join(TABLE_ORDER)}"))
+
+
+def register_cli(app):
+    """Register `flask sql index-benchmark`"""
+    group = app.cli.commands.get('sql')
+    if group is None:
+        @app.cli.group('sql')
+        def group():
+            """SQL diagnostics"""
+    
+    @group.command('index-benchmark')
+    @click.option('--url', default=None, help='Scratch database URL (default: temporary SQLite file)')
+    @click.option('--scale', type=click.Choice(sorted(SCALES)), default='small', help='Generator preset')
+    @click.option('--cinemas', type=int, help='Override the preset: cinemas')
+    @click.option('--days', type=int, help='Override the preset: days of showtimes')
+    @click.option('--repeat', default=200, help='Executions per query and run')
+    @click.option('--seed', 'seed_value', default=42, help='Random seed')
+    def index_benchmark_command(url, scale, cinemas, days, repeat, seed_value):
+        """Hot query latency and plans without/with the composite indexes"""
+        scratch_file = None
+        if url is None:
+            fd, scratch_file = tempfile.mkstemp(prefix='index-benchmark-', suffix='.db')
+            os.close(fd)
+            url = f'sqlite:///{scratch_file}'
+        elif make_url(url) == make_url(app.config['SQLALCHEMY_DATABASE_URI']):
+            raise click.UsageError('--url must point to a scratch database, not the application database')
+        
+        volumes = dict(SCALES[scale])
+        volumes.update({key: value for key, value in (('cinemas', cinemas), ('days', days)) if value})
+        try:
+            click.echo(f'Seeding {make_url(url).render_as_string(hide_password=True)} ...')
+            counts, before, after = benchmark(url, volumes, repeat, seed_value)
+        finally:
+            if scratch_file:
+                os.remove(scratch_file)
+        
+        click.echo(', '.join(f'{name}={n}' for name, n in counts.items()))
+        click.echo(f"{'query':<36} {'before avg':>10} {'p95':>8} {'after avg':>10} {'p95':>8} {'speedup':>8}")
+        for name, _, _ in QUERIES:
+            b, a = before[name], after[name]
+            speedup = b['avg_ms'] / a['avg_ms'] if a['avg_ms'] else float('inf')
+            click.echo(
+                f"{name:<36} {b['avg_ms']:>8.3f}ms {b['p95_ms']:>6.3f}ms "
+                f"{a['avg_ms']:>8.3f}ms {a['p95_ms']:>6.3f}ms {speedup:>7.1f}x"
+            )
+        click.echo('')
+        for name, _, _ in QUERIES:
+            click.echo(name)
+            click.echo(f"   before: {before[name]['plan']}")
+            click.echo(f"   after:  {after[name]['plan']}")
@@ -0,0 +1,316 @@
+"""
+Connection Pool Monitor
+Sizing and instrumentation of the SQLAlchemy connection pools
+
+- DB_POOL_SIZING='auto' sizes the pool from the request threads of a worker
+  and the connections one request holds (DB_CONNECTIONS_PER_REQUEST),
+  capped so WEB_CONCURRENCY workers stay under the server's
+  DB_MAX_CONNECTIONS minus DB_RESERVED_CONNECTIONS
+- Every engine (primary and replicas) counts checkouts, new connections,
+  overflow use, invalidations and pool timeouts, with histograms of the
+  time spent waiting for a connection and of the pool_pre_ping round trip
+- A connection checked out longer than DB_POOL_HOLD_WARN_MS is logged with
+  the request (or thread) that held it and the last statement it ran
+- stats() is served by GET /api/admin/metrics (this worker only)
+"""
+from flask import has_request_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from middleware.sql_profiler import statement_shape
+from collections import deque
+from datetime import datetime
+import bisect
+import math
+import threading
+import time
+
+
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PING_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    """Counts of observations per upper bound (milliseconds)"""
+    
+    __slots__ = ('bounds', 'counts', 'count', 'total')
+    
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+    
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+    
+    def snapshot(self):
+        # [upper bound ms, count] in bound order (a dict would be key-sorted by jsonify)
+        buckets = [[bound, n] for bound, n in zip(self.bounds, self.counts)]
+        buckets.append(['+Inf', self.counts[-1]])
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'buckets': buckets
+        }
+
+
+class PoolStats:
+    """Counters of one engine's pool (kept across pool recreation)"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.overflow_checkouts = 0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.ping_failures = 0
+        self.long_holds = 0
+        self.wait = Histogram(WAIT_BUCKETS_MS)
+        self.ping = Histogram(PING_BUCKETS_MS)
+        self.recent_long_holds = deque(maxlen=20)
+    
+    def record_wait(self, ms, checked_out, overflow):
+        with self.lock:
+            self.wait.observe(ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+    
+    def increment(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def snapshot(self):
+        with self.lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'overflow_checkouts': self.overflow_checkouts,
+                'peak_checked_out': self.peak_checked_out,
+                'peak_overflow': self.peak_overflow,
+                'timeouts': self.timeouts,
+                'invalidations': self.invalidations,
+                'soft_invalidations': self.soft_invalidations,
+                'checkout_wait': self.wait.snapshot(),
+                'pre_ping': dict(self.ping.snapshot(), failures=self.ping_failures),
+                'long_holds': self.long_holds,
+                'recent_long_holds': list(self.recent_long_holds)
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waited for a connection"""
+    
+    stats = None  # PoolStats, set by PoolMonitor.instrument
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.increment('timeouts')
+            raise
+        if self.stats is not None:
+            self.stats.record_wait((time.perf_counter() - started) * 1000, self.checkedout(), self.overflow())
+        return record
+    
+    def recreate(self):
+        # dispose()/invalidation build a new pool: keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_sizing(config):
+    """
+    Pool size and overflow for DB_POOL_SIZING='auto'
+    
+    Args:
+        config (dict): App config
+    
+    Returns:
+        dict: {pool_size, max_overflow, demand, cap}
+    """
+    workers = max(config.get('WEB_CONCURRENCY', 1), 1)
+    demand = max(config.get('DB_POOL_REQUEST_THREADS', 8) * config.get('DB_CONNECTIONS_PER_REQUEST', 1), 1)
+    usable = config.get('DB_MAX_CONNECTIONS', 151) - config.get('DB_RESERVED_CONNECTIONS', 10)
+    cap = max(usable // workers, 1)
+    
+    pool_size = min(demand, cap)
+    # Overflow absorbs background threads (upload workers, token sync) and short spikes
+    max_overflow = min(max(2, math.ceil(demand / 2)), cap - pool_size)
+    return {'pool_size': pool_size, 'max_overflow': max_overflow, 'demand': demand, 'cap': cap}
+
+
+class PoolMonitor:
+    """Applies the pool sizing mode and instruments the app's engines"""
+    
+    def __init__(self):
+        self.mode = 'fixed'
+        self.sizing = {}
+        self.hold_warn = 1.0  # seconds
+        self._stats = {}  # bind key -> PoolStats
+        self._engines = {}
+    
+    def init_app(self, app):
+        """
+        Resolve pool options before the engines are created (called by init_db)
+        
+        Args:
+            app: Flask application instance
+        """
+        self.mode = app.config.get('DB_POOL_SIZING', 'fixed')
+        self.hold_warn = app.config.get('DB_POOL_HOLD_WARN_MS', 1000) / 1000
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        
+        if self.mode == 'auto':
+            self.sizing = pool_sizing(app.config)
+            options['pool_size'] = self.sizing['pool_size']
+            options['max_overflow'] = self.sizing['max_overflow']
+            if self.sizing['demand'] > self.sizing['cap']:
+                print(f"⚠️  DB pool capped at {self.sizing['cap']} connection(s) per worker "
+                      f"({self.sizing['demand']} wanted), requests will wait for connections")
+        elif self.mode != 'fixed':
+            raise ValueError(f"DB_POOL_SIZING must be 'fixed' or 'auto', got {self.mode!r}")
+        
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+        if 'poolclass' not in options and not in_memory:
+            options['poolclass'] = InstrumentedQueuePool
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+        self.sizing = dict(self.sizing, pool_size=options.get('pool_size'), max_overflow=options.get('max_overflow'))
+    
+    def instrument(self, engines):
+        """
+        Attach the pool and engine events (app context, after db.init_app)
+        
+        Args:
+            engines (dict): bind key -> Engine (db.engines)
+        """
+        self._engines = engines
+        for bind_key, engine in engines.items():
+            stats = self._stats.get(bind_key)
+            if stats is None:
+                stats = self._stats[bind_key] = PoolStats()
+            pool = engine.pool
+            if isinstance(pool, InstrumentedQueuePool):
+                pool.stats = stats
+            
+            event.listen(pool, 'connect', lambda *args, stats=stats: stats.increment('connects'))
+            event.listen(pool, 'checkout', self._checkout_listener(stats))
+            event.listen(pool, 'checkin', self._checkin_listener(stats, bind_key))
+            event.listen(pool, 'invalidate', lambda *args, stats=stats: stats.increment('invalidations'))
+            event.listen(pool, 'soft_invalidate', lambda *args, stats=stats: stats.increment('soft_invalidations'))
+            event.listen(engine, 'before_cursor_execute', _track_statement)
+            self._time_pings(engine.dialect, stats)
+    
+    # ==================== EVENTS ====================
+    
+    @staticmethod
+    def _checkout_listener(stats):
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            stats.increment('checkouts')
+            holder = f'{request.method} {request.path}' if has_request_context() \
+                else f'thread {threading.current_thread().name}'
+            # [checked out at, holder, statements, last statement]
+            connection_record.info['pool_hold'] = [time.perf_counter(), holder, 0, None]
+        return on_checkout
+    
+    def _checkin_listener(self, stats, bind_key):
+        def on_checkin(dbapi_connection, connection_record):
+            stats.increment('checkins')
+            hold = connection_record.info.pop('pool_hold', None)
+            if hold is None:
+                return
+            held = time.perf_counter() - hold[0]
+            if held < self.hold_warn:
+                return
+            
+            last = statement_shape(hold[3])[:300] if hold[3] else None
+            entry = {
+                'at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+                'bind': bind_key or 'primary',
+                'held_ms': round(held * 1000, 1),
+                'holder': hold[1],
+                'statements': hold[2],
+                'last_statement': last
+            }
+            with stats.lock:
+                stats.long_holds += 1
+                stats.recent_long_holds.append(entry)
+            print(f"⚠️  DB connection held {entry['held_ms']:.0f}ms by {hold[1]} "
+                  f"({hold[2]} statement(s)), last: {last}")
+        return on_checkin
+    
+    @staticmethod
+    def _time_pings(dialect, stats):
+        """Wrap the dialect's ping (used by pool_pre_ping on every checkout)"""
+        do_ping = dialect.do_ping
+        if getattr(do_ping, 'pool_monitor_wrapped', False):
+            return
+        
+        def timed_ping(dbapi_connection):
+            started = time.perf_counter()
+            ok = False
+            try:
+                ok = do_ping(dbapi_connection)
+                return ok
+            finally:
+                with stats.lock:
+                    stats.ping.observe((time.perf_counter() - started) * 1000)
+                    if not ok:
+                        stats.ping_failures += 1
+        
+        timed_ping.pool_monitor_wrapped = True
+        dialect.do_ping = timed_ping
+    
+    # ==================== METRICS ====================
+    
+    def stats(self):
+        """
+        Pool state and counters per engine
+        
+        Returns:
+            dict: {sizing, pools: {bind: {pool_class, size, max_overflow, checked_out, overflow, idle, ...counters}}}
+        """
+        pools = {}
+        for bind_key, engine in self._engines.items():
+            pool = engine.pool
+            state = {'pool_class': type(pool).__name__}
+            if isinstance(pool, QueuePool):
+                state.update(
+                    size=pool.size(),
+                    max_overflow=pool._max_overflow,
+                    timeout=pool.timeout(),
+                    checked_out=pool.checkedout(),
+                    overflow=max(pool.overflow(), 0),
+                    idle=pool.checkedin()
+                )
+            stats = self._stats.get(bind_key)
+            if stats is not None:
+                state.update(stats.snapshot())
+            pools[bind_key or 'primary'] = state
+        return {'sizing': dict(self.sizing, mode=self.mode), 'pools': pools}
+
+
+def _track_statement(conn, cursor, statement, parameters, context, executemany):
+    # conn.info is the pool connection record's info: count what the holder ran
+    hold = conn.info.get('pool_hold')
+    if hold is not None:
+        hold[2] += 1
+        hold[3] = statement
+
+
+# Shared instance, configured by init_db
+pool_monitor = PoolMonitor()
@@ -1,12 +1,17 @@
 """
 Authentication Middleware
 Các decorators để kiểm tra quyền truy cập
+
+Phân quyền dựa trên claims role/active trong JWT (tạo lúc đăng nhập) và
+cache role/trạng thái user (AuthService.get_user_status), ghi nhớ trên
+flask.g trong mỗi request: request admin bình thường không query DB
 """
 
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 from models.user import User
+from services.auth_service import AuthService
 
 
 def admin_required():
@@ -28,11 +33,13 @@ def admin_required():
                 # Verify JWT token
                 verify_jwt_in_request()
                 
-                # Lấy user_id từ JWT (convert string về int)
-                current_user_id = int(get_jwt_identity())
+                # Token của user thường bị từ chối ngay theo claim role
+                # (token cũ không có claim thì kiểm tra bằng trạng thái bên dưới)
+                if get_jwt().get('role', 'admin') != 'admin':
+                    return _forbidden()
                 
-                # Tìm user trong database
-                user = User.query.get(current_user_id)
+                # Role/trạng thái hiện tại của user (cache, không query DB mỗi request)
+                status = get_current_user_status()
             except Exception as e:
                 print(f"[DEBUG] Exception in admin_required: {e}")
                 return jsonify({
@@ -40,19 +47,22 @@ def admin_required():
                     'message': 'Token không hợp lệ'
                 }), 401
             
-            if not user:
+            if not status:
                 return jsonify({
                     'success': False,
                     'message': 'User không tồn tại'
                 }), 404
             
-            # Kiểm tra role
-            if not user.is_admin():
+            if not status['is_active']:
                 return jsonify({
                     'success': False,
-                    'message': 'Bạn không có quyền truy cập. Chỉ admin mới có thể thực hiện hành động này.'
+                    'message': 'Tài khoản đã bị khóa'
                 }), 403
             
+            # Kiểm tra role
+            if status['role'] != 'admin':
+                return _forbidden()
+            
             # User là admin, cho phép truy cập
             return fn(*args, **kwargs)
         
@@ -60,17 +70,39 @@ def admin_required():
     return wrapper
 
 
+def _forbidden():
+    return jsonify({
+        'success': False,
+        'message': 'Bạn không có quyền truy cập. Chỉ admin mới có thể thực hiện hành động này.'
+    }), 403
+
+
+def get_current_user_status():
+    """
+    Role và trạng thái active của user hiện tại, ghi nhớ trên flask.g
+    Gọi sau verify_jwt_in_request()
+    
+    Returns:
+        dict: {'role': str, 'is_active': bool} hoặc None nếu user không tồn tại
+    """
+    if '_auth_user_status' not in g:
+        g._auth_user_status = AuthService.get_user_status(int(get_jwt_identity()))
+    return g._auth_user_status
+
+
 def get_current_user():
     """
     Helper function để lấy thông tin user hiện tại từ JWT
+    (query DB tối đa một lần mỗi request)
     
     Returns:
         User object hoặc None
     """
     try:
         verify_jwt_in_request()
-        current_user_id = int(get_jwt_identity())
-        return User.query.get(current_user_id)
+        if '_auth_user' not in g:
+            g._auth_user = User.query.get(int(get_jwt_identity()))
+        return g._auth_user
     except Exception:
         return None
 
@@ -82,6 +114,10 @@ def is_current_user_admin():
     Returns:
         Boolean
     """
-    user = get_current_user()
-    return user and user.is_admin()
+    try:
+        verify_jwt_in_request()
+        status = get_current_user_status()
+    except Exception:
+        return False
+    return bool(status and status['is_active'] and status['role'] == 'admin')
 
@@ -0,0 +1,209 @@
+"""
+Rate Limiting Middleware
+Rejects request floods in before_request, before the view runs bcrypt or
+touches the database
+
+- GCRA (generic cell rate algorithm): a smooth sliding window that stores one
+  timestamp per key. 'N/minute' allows bursts of N, then one request every
+  60/N seconds
+- Policies per endpoint ('auth.login') or blueprint ('bookings'), each a list
+  of (key, rate) pairs; key is 'ip', 'email' (from the JSON body) or 'user'
+  (JWT identity, falling back to the IP)
+- In-process sharded store by default (limits are per worker); set
+  RATE_LIMIT_STORAGE_URL=redis://... to share counters between workers
+  (needs the redis package)
+- All limits of a request are checked before any is counted, so a request
+  rejected by one limit (e.g. the email) does not use up the others (the IP)
+- Rejections answer 429 with Retry-After
+- Keys on request.remote_addr: behind a reverse proxy set PROXY_FIX_HOPS so
+  it is the client address (ProxyFix in app.py)
+"""
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+import math
+import threading
+import time
+import zlib
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a rate string
+    
+    Args:
+        rate (str): 'N/second', 'N/minute', 'N/hour' or 'N/day'
+    
+    Returns:
+        tuple: (emission interval, burst tolerance) in seconds
+    """
+    count, _, period = rate.partition('/')
+    count = int(count)
+    seconds = PERIODS[period.strip().rstrip('s')]
+    if count <= 0:
+        raise ValueError(f'Invalid rate: {rate}')
+    interval = seconds / count
+    return interval, seconds - interval
+
+
+class MemoryStore:
+    """GCRA state in sharded dicts, local to the worker process"""
+    
+    def __init__(self, shards=16, max_keys_per_shard=10000):
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+    
+    def hit(self, key, interval, tolerance, count=True):
+        """
+        Count one request for key
+        
+        Args:
+            count (bool): False only checks whether the request would be allowed
+        
+        Returns:
+            float: 0 if allowed, otherwise seconds until the next request is allowed
+        """
+        tats, lock = self._shards[zlib.crc32(key.encode('utf-8')) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tat = max(tats.get(key, now), now)
+            if tat - now > tolerance:
+                return tat - tolerance - now
+            if not count:
+                return 0.0
+            tats[key] = tat + interval
+            if len(tats) > self.max_keys_per_shard:
+                # Keys whose window has fully passed carry no state
+                for stale in [k for k, v in tats.items() if v <= now]:
+                    del tats[stale]
+        return 0.0
+
+
+class RedisStore:
+    """GCRA state in Redis, shared by every worker"""
+    
+    SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+if tat - now > tolerance then
+    return tostring(tat - tolerance - now)
+end
+if ARGV[3] == '0' then
+    return '0'
+end
+redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000))
+return '0'
+"""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+    
+    def hit(self, key, interval, tolerance, count=True):
+        try:
+            return float(self._script(keys=[self.prefix + key], args=[interval, tolerance, int(count)]))
+        except Exception as e:
+            # Fail open: an unreachable Redis must not lock everybody out
+            print(f"⚠️  Rate limit store error: {e}")
+            return 0.0
+
+
+class RateLimiter:
+    """Applies the configured policies to every request"""
+    
+    def __init__(self):
+        self.enabled = True
+        self.store = MemoryStore()
+        self.policies = {}  # endpoint or blueprint -> [(key, interval, tolerance, rate)]
+    
+    def init_app(self, app):
+        """
+        Load policies and storage from the Flask app and install the hook
+        
+        Args:
+            app: Flask application instance
+        """
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.policies = {
+            target: [(key, *parse_rate(rate), rate) for key, rate in limits]
+            for target, limits in app.config.get('RATE_LIMITS', {}).items()
+        }
+        
+        url = app.config.get('RATE_LIMIT_STORAGE_URL')
+        if url:
+            try:
+                self.store = RedisStore(url)
+            except ImportError:
+                print("⚠️  RATE_LIMIT_STORAGE_URL is set but the redis package is not installed, "
+                      "rate limits are per worker")
+        
+        app.before_request(self.check)
+    
+    def check(self):
+        """before_request hook: 429 if any limit of the endpoint/blueprint is exceeded"""
+        if not self.enabled or request.method == 'OPTIONS' or request.endpoint is None:
+            return None
+        
+        # Blueprint limits are shared by all endpoints of the blueprint
+        limits = [
+            (target, limit)
+            for target in (request.endpoint, request.blueprint)
+            for limit in self.policies.get(target, ())
+        ]
+        keys = []
+        for target, (key, interval, tolerance, rate) in limits:
+            identity = self._identity(key)
+            if identity is not None:
+                keys.append((f'{target}:{rate}:{key}:{identity}', interval, tolerance))
+        
+        # Check every limit first: a rejected request consumes none of them
+        retry_after = max((self.store.hit(*limit, count=False) for limit in keys), default=0.0)
+        if retry_after > 0:
+            return self._too_many_requests(retry_after)
+        
+        for limit in keys:
+            # Still counted atomically: concurrent requests may have used the last slot since the check
+            retry_after = self.store.hit(*limit)
+            if retry_after > 0:
+                return self._too_many_requests(retry_after)
+        return None
+    
+    @staticmethod
+    def _too_many_requests(retry_after):
+        response = jsonify({
+            'success': False,
+            'message': 'Quá nhiều yêu cầu, vui lòng thử lại sau'
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+    
+    @staticmethod
+    def _identity(key):
+        """Value a limit is keyed by, or None if the request doesn't carry it"""
+        if key == 'ip':
+            return request.remote_addr or 'unknown'
+        if key == 'email':
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            return email.strip().lower() if isinstance(email, str) and email.strip() else None
+        if key == 'user':
+            try:
+                verify_jwt_in_request(optional=True)
+                user_id = get_jwt_identity()
+            except Exception:
+                user_id = None
+            return f'u{user_id}' if user_id else f'ip{request.remote_addr}'
+        raise ValueError(f'Unknown rate limit key: {key}')
+
+
+# Shared instance, configured in app.py
+rate_limiter = RateLimiter()
@@ -0,0 +1,358 @@
+"""
+Slow Query Log
+Statements slower than SLOW_QUERY_THRESHOLD_MS are written to a rotating
+JSONL file with their parameters, endpoint, call site and query plan
+
+- Every engine is watched, inside and outside requests (CLI, workers)
+- Each process writes (and rotates) its own file, <SLOW_QUERY_LOG_PATH>
+  with the PID before the extension; the report merges them by time
+- SLOW_QUERY_SAMPLE_RATE logs only a fraction of the slow statements, and
+  each statement shape is EXPLAINed at most once per
+  SLOW_QUERY_EXPLAIN_INTERVAL seconds, to bound the overhead
+- The plan comes from EXPLAIN (MySQL) or EXPLAIN QUERY PLAN (SQLite), run on
+  the same DBAPI connection so it sees the same data
+- `flask sql slow-report` ranks statement shapes by total time and marks
+  full scans (MySQL type ALL/index, SQLite 'SCAN <table>', with or
+  without an index: both read every row)
+"""
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from logging.handlers import RotatingFileHandler
+from middleware.sql_profiler import statement_shape
+from datetime import datetime
+import click
+import glob
+import heapq
+import json
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPLAINABLE = ('SELECT', 'WITH')
+MAX_PARAM_LENGTH = 200
+
+
+class SlowQueryLog:
+    """Engine listener writing slow statements to JSONL"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.2  # seconds
+        self.sample_rate = 1.0
+        self.explain = True
+        self.explain_interval = 300
+        self._explained = {}  # shape -> monotonic time of the last EXPLAIN
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('slow_queries')
+        self._logger.propagate = False
+        self._listening = False
+        self._handler_pid = None
+        self._handler_options = {}
+        self.path = None
+    
+    def init_app(self, app):
+        """
+        Configure threshold, sampling and the log file, register the CLI
+        
+        Args:
+            app: Flask application instance
+        """
+        self.enabled = app.config.get('SLOW_QUERY_LOG_ENABLED', True)
+        self.threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000
+        self.sample_rate = app.config.get('SLOW_QUERY_SAMPLE_RATE', self.sample_rate)
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', self.explain)
+        self.explain_interval = app.config.get('SLOW_QUERY_EXPLAIN_INTERVAL', self.explain_interval)
+        self.path = os.path.abspath(app.config.get('SLOW_QUERY_LOG_PATH') or 'logs/slow_queries.jsonl')
+        register_cli(app, self)
+        if not self.enabled:
+            return
+        
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._handler_options = {
+            'maxBytes': app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+            'backupCount': app.config.get('SLOW_QUERY_LOG_BACKUPS', 5),
+            'encoding': 'utf-8'
+        }
+        self._handler_pid = None  # File opened on the first record of each process
+        self._logger.setLevel(logging.INFO)
+        
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+            self._listening = True
+    
+    # ==================== ENGINE EVENTS ====================
+    
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        # On the execution context: a statement that fails leaves nothing behind on the connection
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+    
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_start', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if not self.enabled or elapsed < self.threshold or random.random() >= self.sample_rate:
+            return
+        
+        try:
+            self._log(conn, statement, parameters, executemany, elapsed)
+        except Exception as e:
+            # Logging must never break the query that was just run
+            print(f"⚠️  Slow query log failed: {e}")
+    
+    def _log(self, conn, statement, parameters, executemany, elapsed):
+        shape = statement_shape(statement)
+        record = {
+            'ts': datetime.utcnow().isoformat(timespec='milliseconds') + 'Z',
+            'duration_ms': round(elapsed * 1000, 2),
+            'shape': shape,
+            'statement': statement,
+            'parameters': _loggable(parameters),
+            'executemany': bool(executemany),
+            'database': f'{conn.engine.dialect.name}:{conn.engine.url.database}',
+            'endpoint': None,
+            'method': None,
+            'path': None,
+            'call_site': _call_site(),
+            'explain': None
+        }
+        if has_request_context():
+            record.update(endpoint=request.endpoint, method=request.method, path=request.path)
+        if self.explain and not executemany and self._should_explain(statement, shape):
+            record['explain'] = _explain(conn, statement, parameters)
+        
+        self._ensure_handler()
+        self._logger.info(json.dumps(record, default=str, ensure_ascii=False))
+    
+    def _ensure_handler(self):
+        """
+        Open this process's log file (again after a fork: a preloading server
+        forks its workers after init_app)
+        
+        Rotation renames the file, so processes sharing one file would rotate
+        it from under each other.
+        """
+        if self._handler_pid == os.getpid():
+            return
+        with self._lock:
+            if self._handler_pid == os.getpid():
+                return
+            handler = RotatingFileHandler(_process_path(self.path), **self._handler_options)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            for old in list(self._logger.handlers):
+                self._logger.removeHandler(old)
+                old.close()
+            self._logger.addHandler(handler)
+            self._handler_pid = os.getpid()
+    
+    def _should_explain(self, statement, shape):
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(shape)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            if len(self._explained) >= 4096:
+                self._explained.clear()
+            self._explained[shape] = now
+        return True
+    
+    # ==================== REPORT ====================
+    
+    def read_records(self, path=None):
+        """Records of every process's log and rotated backups, merged oldest first"""
+        path = path or self.path
+        return heapq.merge(
+            *(_read_files(files) for files in _process_logs(path)),
+            key=lambda record: record.get('ts') or ''
+        )
+    
+    def summarize(self, path=None, top=10, full_scans_only=False):
+        """
+        Rank statement shapes by total logged time
+        
+        Args:
+            path (str): Log file (default: the configured one)
+            top (int): Number of shapes to return
+            full_scans_only (bool): Only shapes whose plan reads every row
+        
+        Returns:
+            list: [{shape, count, total_ms, max_ms, p95_ms, full_scan, endpoints, call_sites, explain}]
+        """
+        groups = {}
+        for record in self.read_records(path):
+            group = groups.setdefault(record['shape'], {
+                'durations': [], 'endpoints': {}, 'call_sites': {}, 'explain': None
+            })
+            group['durations'].append(record['duration_ms'])
+            for key, value in (('endpoints', record.get('endpoint')), ('call_sites', record.get('call_site'))):
+                if value:
+                    group[key][value] = group[key].get(value, 0) + 1
+            if record.get('explain') is not None:
+                group['explain'] = record['explain']
+        
+        summary = []
+        for shape, group in groups.items():
+            durations = sorted(group['durations'])
+            summary.append({
+                'shape': shape,
+                'count': len(durations),
+                'total_ms': round(sum(durations), 2),
+                'max_ms': durations[-1],
+                'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                'full_scan': _is_full_scan(group['explain']),
+                'endpoints': _most_common(group['endpoints']),
+                'call_sites': _most_common(group['call_sites']),
+                'explain': group['explain']
+            })
+        if full_scans_only:
+            summary = [item for item in summary if item['full_scan']]
+        summary.sort(key=lambda item: item['total_ms'], reverse=True)
+        return summary[:top]
+
+
+def _process_path(path):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{os.getpid()}{ext}'
+
+
+def _process_logs(path):
+    """Rotated files of each process's log (and of a single shared log), oldest first"""
+    root, ext = os.path.splitext(path)
+    logs = [path] + [
+        log for log in glob.glob(f'{glob.escape(root)}.*{ext}')
+        if log[len(root) + 1:len(log) - len(ext)].isdigit()
+    ]
+    return [_rotated_files(log) for log in logs]
+
+
+def _rotated_files(path):
+    """path.N ... path.1, path (RotatingFileHandler: a higher N is older)"""
+    directory, name = os.path.split(path)
+    prefix = name + '.'
+    backups = [
+        f for f in os.listdir(directory or '.')
+        if f.startswith(prefix) and f[len(prefix):].isdigit()
+    ] if os.path.isdir(directory or '.') else []
+    backups.sort(key=lambda f: int(f[len(prefix):]), reverse=True)
+    files = [os.path.join(directory, f) for f in backups] + [path]
+    return [f for f in files if os.path.exists(f)]
+
+
+def _read_files(files):
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _most_common(counts, limit=3):
+    return [name for name, _ in sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]]
+
+
+def _loggable(parameters):
+    """Parameters as JSON-friendly values, long values truncated"""
+    def clip(value):
+        if isinstance(value, (bytes, bytearray)):
+            return f'<{len(value)} bytes>'
+        if isinstance(value, str) and len(value) > MAX_PARAM_LENGTH:
+            return value[:MAX_PARAM_LENGTH] + '...'
+        return value
+    
+    if isinstance(parameters, dict):
+        return {key: clip(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [
+            _loggable(value) if isinstance(value, (list, tuple, dict)) else clip(value)
+            for value in parameters[:100]
+        ]
+    return clip(parameters)
+
+
+def _call_site():
+    """Innermost application frame (outside this module) that led to the query"""
+    this_file = os.path.abspath(__file__)
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(BACKEND_ROOT) and filename != this_file and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, BACKEND_ROOT)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def _explain(conn, statement, parameters):
+    """Query plan on the raw DBAPI connection (no engine events, same session state)"""
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except Exception as e:
+        return {'error': str(e)}
+    finally:
+        cursor.close()
+
+
+def _is_full_scan(plan):
+    """MySQL: access type ALL or index; SQLite: 'SCAN <table>' (a SEARCH uses an index range)"""
+    if not isinstance(plan, list):
+        return None
+    for row in plan:
+        if str(row.get('type', '')).upper() in ('ALL', 'INDEX'):
+            return True
+        detail = str(row.get('detail', ''))
+        if detail.startswith('SCAN ') and not detail.startswith('SCAN CONSTANT ROW'):
+            return True
+    return False
+
+
+def register_cli(app, log):
+    """Register `flask sql slow-report`"""
+    group = app.cli.commands.get('sql')
+    if group is None:
+        @app.cli.group('sql')
+        def group():
+            """SQL diagnostics"""
+    
+    @group.command('slow-report')
+    @click.option('--path', default=None, help='Slow query log (default: SLOW_QUERY_LOG_PATH)')
+    @click.option('--top', default=10, help='Number of statement shapes to show')
+    @click.option('--full-scans', is_flag=True, help='Only statements whose plan is a full scan')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON')
+    def slow_report_command(path, top, full_scans, as_json):
+        """Top statement shapes by total time in the slow query log"""
+        summary = log.summarize(path, top, full_scans)
+        if as_json:
+            click.echo(json.dumps(summary, indent=2, ensure_ascii=False, default=str))
+            return
+        if not summary:
+            click.echo('No slow queries logged')
+            return
+        for rank, item in enumerate(summary, 1):
+            scan = ' FULL SCAN' if item['full_scan'] else ''
+            click.echo(
+                f"#{rank} {item['count']}x total={item['total_ms']:.0f}ms "
+                f"p95={item['p95_ms']:.0f}ms max={item['max_ms']:.0f}ms{scan}"
+            )
+            click.echo(f"   {item['shape'][:300]}")
+            if item['endpoints']:
+                click.echo(f"   endpoints: {', '.join(item['endpoints'])}")
+            if item['call_sites']:
+                click.echo(f"   call sites: {', '.join(item['call_sites'])}")
+
+
+# Shared instance, configured in app.py
+slow_query_log = SlowQueryLog()
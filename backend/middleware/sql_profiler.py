@@ -0,0 +1,224 @@
+"""
+SQL Profiling Middleware
+Counts the queries each request runs and flags N+1 patterns
+
+- SQLAlchemy cursor events (every engine, replicas included) record the
+  statement count, DB time and statement shapes of the current request
+- A shape is the statement with literals and IN-lists collapsed, so
+  'SELECT ... WHERE movie_id = ?' run once per row shows up as one shape
+  repeated N times
+- A request that runs one shape more than SQL_NPLUSONE_THRESHOLD times is
+  logged, or raises NPlusOneError when SQL_NPLUSONE_RAISE is set (by
+  default when app.testing is on)
+- Server-Timing: db;dur=<ms>;desc="<n> queries" (SQL_SERVER_TIMING, on in
+  debug) lets the browser devtools show DB time per request
+- report() aggregates per endpoint as JSON; SQL_PROFILE_REPORT_PATH writes
+  it to a file when the process exits
+"""
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+from contextvars import ContextVar
+import atexit
+import json
+import re
+import threading
+import time
+
+
+_current = ContextVar('sql_request_stats', default=None)
+
+_STRING_OR_NUMBER = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s|:\w+')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class NPlusOneError(AssertionError):
+    """A request ran the same statement shape more times than allowed"""
+
+
+def statement_shape(statement):
+    """
+    Normalize a SQL statement so repeats with different values compare equal
+    
+    Args:
+        statement (str): SQL as sent to the DBAPI
+    
+    Returns:
+        str: Statement with literals/placeholders as '?' and IN-lists as '(?...)'
+    """
+    shape = _STRING_OR_NUMBER.sub('?', statement)
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _IN_LIST.sub('(?...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class RequestStats:
+    """Queries of one request"""
+    
+    __slots__ = ('queries', 'duration', 'shapes')
+    
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+
+class SqlProfiler:
+    """Per-request SQL statistics"""
+    
+    def __init__(self):
+        self.enabled = True
+        self.threshold = 10
+        self.raise_on_nplusone = None  # None: raise when app.testing
+        self.server_timing = False
+        self._shapes = {}  # statement -> shape (statements repeat, regexes are not free)
+        self._report = {}  # endpoint -> aggregate
+        self._lock = threading.Lock()
+        self._listening = False
+    
+    def init_app(self, app):
+        """
+        Install the engine events and request hooks
+        
+        Args:
+            app: Flask application instance
+        """
+        self.enabled = app.config.get('SQL_PROFILING_ENABLED', True)
+        self.threshold = app.config.get('SQL_NPLUSONE_THRESHOLD', self.threshold)
+        self.raise_on_nplusone = app.config.get('SQL_NPLUSONE_RAISE')
+        self.server_timing = app.config.get('SQL_SERVER_TIMING', app.debug)
+        if not self.enabled:
+            return
+        
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+            self._listening = True
+        
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+        
+        report_path = app.config.get('SQL_PROFILE_REPORT_PATH')
+        if report_path:
+            atexit.register(self.write_report, report_path)
+    
+    # ==================== ENGINE EVENTS ====================
+    
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        # On the execution context, not conn.info: failed statements never reach after_cursor_execute
+        if context is not None and _current.get() is not None:
+            context._sql_profiler_start = time.perf_counter()
+    
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = getattr(context, '_sql_profiler_start', None)
+        if stats is None or started is None:
+            return
+        stats.duration += time.perf_counter() - started
+        stats.queries += 1
+        
+        shape = self._shapes.get(statement)
+        if shape is None:
+            if len(self._shapes) >= 4096:
+                self._shapes.clear()
+            shape = self._shapes[statement] = statement_shape(statement)
+        stats.shapes[shape] += 1
+    
+    # ==================== REQUEST HOOKS ====================
+    
+    @staticmethod
+    def _start_request():
+        g._sql_stats_token = _current.set(RequestStats())
+    
+    def _finish_request(self, response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        
+        db_ms = stats.duration * 1000
+        if self.server_timing:
+            timing = f'db;dur={db_ms:.1f};desc="{stats.queries} queries"'
+            existing = response.headers.get('Server-Timing')
+            response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+        
+        # Unmatched URLs (404 scans) share one key: the per-process report stays bounded
+        endpoint = request.endpoint or '<unmatched>'
+        repeated = {shape: n for shape, n in stats.shapes.items() if n > self.threshold}
+        self._record(endpoint, stats, db_ms, repeated)
+        
+        if repeated:
+            shape, n = max(repeated.items(), key=lambda item: item[1])
+            message = f'N+1 in {endpoint}: {n}x {shape[:300]}'
+            raise_on_nplusone = self.raise_on_nplusone
+            if raise_on_nplusone is None:
+                raise_on_nplusone = current_app.testing
+            if raise_on_nplusone:
+                raise NPlusOneError(message)
+            print(f"⚠️  {message}")
+        return response
+    
+    @staticmethod
+    def _teardown_request(exc=None):
+        token = g.pop('_sql_stats_token', None)
+        if token is not None:
+            _current.reset(token)
+    
+    # ==================== REPORT ====================
+    
+    def _record(self, endpoint, stats, db_ms, repeated):
+        with self._lock:
+            entry = self._report.get(endpoint)
+            if entry is None:
+                entry = self._report[endpoint] = {
+                    'requests': 0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_ms': 0.0,
+                    'max_db_ms': 0.0,
+                    'nplusone_requests': 0,
+                    'repeated_shapes': {}
+                }
+            entry['requests'] += 1
+            entry['queries'] += stats.queries
+            entry['max_queries'] = max(entry['max_queries'], stats.queries)
+            entry['db_ms'] += db_ms
+            entry['max_db_ms'] = max(entry['max_db_ms'], db_ms)
+            if repeated:
+                entry['nplusone_requests'] += 1
+                shapes = entry['repeated_shapes']
+                for shape, n in repeated.items():
+                    shapes[shape] = max(shapes.get(shape, 0), n)
+    
+    def report(self):
+        """
+        Per-endpoint aggregate since the process started
+        
+        Returns:
+            dict: endpoint -> {requests, queries, avg_queries, max_queries, db_ms,
+                  avg_db_ms, max_db_ms, nplusone_requests, repeated_shapes}
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    **entry,
+                    'avg_queries': round(entry['queries'] / entry['requests'], 2),
+                    'db_ms': round(entry['db_ms'], 2),
+                    'avg_db_ms': round(entry['db_ms'] / entry['requests'], 2),
+                    'max_db_ms': round(entry['max_db_ms'], 2),
+                    'repeated_shapes': dict(entry['repeated_shapes'])
+                }
+                for endpoint, entry in sorted(self._report.items())
+            }
+    
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+
+# Shared instance, configured in app.py
+sql_profiler = SqlProfiler()
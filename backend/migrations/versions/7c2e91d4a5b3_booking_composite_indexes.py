@@ -0,0 +1,72 @@
+"""composite indexes for showtime, booking and payment access paths
+
+Revision ID: 7c2e91d4a5b3
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+Baseline is the original schema of database/create_database.sql. Databases
+created from it get the indexes here, and the columns and tables added to
+the script since then in b4d1f0e8c2a7, so run `flask db upgrade` to head.
+Databases created from the current script already have them all and pass
+through unchanged (each index is only created if missing).
+
+On MySQL the indexes are built with ALGORITHM=INPLACE, LOCK=NONE: reads
+and writes (bookings included) continue while the index is built.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e91d4a5b3'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns)
+INDEXES = [
+    # Lịch chiếu của một phòng / một phim trong khoảng thời gian (conflict check, lọc theo ngày)
+    ('showtimes', 'idx_showtimes_screen_datetime', ['screen_id', 'show_datetime']),
+    ('showtimes', 'idx_showtimes_movie_datetime', ['movie_id', 'show_datetime']),
+    # Booking của một suất chiếu theo trạng thái (ghế đã đặt, doanh thu suất chiếu)
+    ('bookings', 'idx_bookings_showtime_status', ['showtime_id', 'status']),
+    # Lịch sử booking của user, mới nhất trước
+    ('bookings', 'idx_bookings_user_created', ['user_id', 'created_at']),
+    # Ghế đã thuộc booking nào (covering: không cần đọc bảng)
+    ('booking_seats', 'idx_booking_seats_seat_booking', ['seat_id', 'booking_id']),
+    # Thanh toán theo trạng thái trong khoảng thời gian (dashboard, đối soát)
+    ('payments', 'idx_payments_status_created', ['payment_status', 'created_at']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, name, columns in INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        if bind.dialect.name == 'mysql':
+            # Online DDL: không khóa bảng khi build index
+            op.execute(
+                f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)}), "
+                f"ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, name, columns in reversed(INDEXES):
+        if name not in _existing_indexes(table):
+            continue
+        if bind.dialect.name == 'mysql':
+            op.execute(f"ALTER TABLE {table} DROP INDEX {name}, ALGORITHM=INPLACE, LOCK=NONE")
+        else:
+            op.drop_index(name, table_name=table)
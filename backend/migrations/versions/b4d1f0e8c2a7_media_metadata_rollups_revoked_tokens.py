@@ -0,0 +1,132 @@
+"""media metadata columns, dashboard rollup tables and revoked tokens
+
+Revision ID: b4d1f0e8c2a7
+Revises: 7c2e91d4a5b3
+Create Date: 2026-10-19 10:00:00.000000
+
+Schema added to database/create_database.sql alongside the composite
+indexes, for databases created from the original script:
+
+- actors.photo_variants, movie_images.variants/width/height/blurhash
+  (image derivatives, dimensions + BlurHash)
+- movie_videos.width/height/bitrate/poster_url (probed video metadata)
+- daily_sales_stats, daily_user_stats (dashboard rollups)
+- revoked_tokens (JWT logout)
+
+Like the index revision, every column and table is only created if missing,
+so databases created from the current script pass through unchanged.
+daily_user_stats is backfilled from users when it is created here (as the
+script does); fill daily_sales_stats with `flask rollups rebuild`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d1f0e8c2a7'
+down_revision = '7c2e91d4a5b3'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, type) - all nullable
+COLUMNS = [
+    # Ảnh responsive (thumb/card/hero) của ảnh diễn viên
+    ('actors', 'photo_variants', sa.JSON()),
+    # Ảnh phim: variants, kích thước gốc và BlurHash (placeholder)
+    ('movie_images', 'variants', sa.JSON()),
+    ('movie_images', 'width', sa.Integer()),
+    ('movie_images', 'height', sa.Integer()),
+    ('movie_images', 'blurhash', sa.String(64)),
+    # Video: độ phân giải, bitrate, ảnh poster trích từ video
+    ('movie_videos', 'width', sa.Integer()),
+    ('movie_videos', 'height', sa.Integer()),
+    ('movie_videos', 'bitrate', sa.Integer()),
+    ('movie_videos', 'poster_url', sa.String(500)),
+]
+
+TABLE_OPTIONS = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _existing_columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _updated_at():
+    # MySQL: ON UPDATE như trong create_database.sql (các dialect khác: model tự set onupdate)
+    if op.get_bind().dialect.name == 'mysql':
+        default = sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')
+    else:
+        default = sa.text('CURRENT_TIMESTAMP')
+    return sa.Column('updated_at', sa.DateTime(), server_default=default, nullable=True)
+
+
+def upgrade():
+    for table, name, type_ in COLUMNS:
+        if name not in _existing_columns(table):
+            op.add_column(table, sa.Column(name, type_, nullable=True))
+    
+    tables = _existing_tables()
+    
+    if 'daily_sales_stats' not in tables:
+        op.create_table(
+            'daily_sales_stats',
+            sa.Column('stat_date', sa.Date(), nullable=False),
+            sa.Column('cinema_id', sa.Integer(), nullable=False),
+            sa.Column('movie_id', sa.Integer(), nullable=False),
+            sa.Column('bookings_count', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('revenue', sa.Numeric(14, 2), server_default='0', nullable=False),
+            sa.Column('seats_sold', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('seats_capacity', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('showtimes_count', sa.Integer(), server_default='0', nullable=False),
+            _updated_at(),
+            sa.PrimaryKeyConstraint('stat_date', 'cinema_id', 'movie_id'),
+            **TABLE_OPTIONS
+        )
+        op.create_index('idx_cinema_id', 'daily_sales_stats', ['cinema_id'])
+        op.create_index('idx_movie_id', 'daily_sales_stats', ['movie_id'])
+    
+    if 'daily_user_stats' not in tables:
+        op.create_table(
+            'daily_user_stats',
+            sa.Column('stat_date', sa.Date(), nullable=False),
+            sa.Column('new_users', sa.Integer(), server_default='0', nullable=False),
+            _updated_at(),
+            sa.PrimaryKeyConstraint('stat_date'),
+            **TABLE_OPTIONS
+        )
+        # Khởi tạo rollup user mới từ dữ liệu hiện có (các ghi sau đó được cập nhật tự động)
+        op.execute(
+            "INSERT INTO daily_user_stats (stat_date, new_users) "
+            "SELECT DATE(created_at), COUNT(*) FROM users WHERE created_at IS NOT NULL GROUP BY DATE(created_at)"
+        )
+    
+    if 'revoked_tokens' not in tables:
+        op.create_table(
+            'revoked_tokens',
+            sa.Column('jti', sa.String(64), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('token_type', sa.String(10), server_default='access', nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('revoked_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+            sa.PrimaryKeyConstraint('jti'),
+            **TABLE_OPTIONS
+        )
+        op.create_index('idx_expires_at', 'revoked_tokens', ['expires_at'])
+        op.create_index('idx_revoked_at', 'revoked_tokens', ['revoked_at'])
+
+
+def downgrade():
+    tables = _existing_tables()
+    for table in ('revoked_tokens', 'daily_user_stats', 'daily_sales_stats'):
+        if table in tables:
+            op.drop_table(table)
+    
+    for table, name, _ in reversed(COLUMNS):
+        if name in _existing_columns(table):
+            op.drop_column(table, name)
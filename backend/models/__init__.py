@@ -14,6 +14,8 @@ Thứ tự import quan trọng để tránh circular import:
 10. Promotion (độc lập)
 11. BookingPromotion (phụ thuộc Booking, Promotion)
 12. Review (phụ thuộc User, Movie)
+13. DailySalesStat, DailyUserStat (bảng rollup cho dashboard, độc lập)
+14. RevokedToken (JWT đã thu hồi, độc lập)
 """
 
 # Independent models
@@ -32,6 +34,12 @@ from models.showtime import Showtime
 from models.booking import Booking, BookingSeat, BookingPromotion
 from models.payment import Payment
 
+# Dashboard rollups
+from models.dashboard_stats import DailySalesStat, DailyUserStat
+
+# Auth
+from models.revoked_token import RevokedToken
+
 __all__ = [
     # Users
     'User',
@@ -64,4 +72,11 @@ __all__ = [
     # Promotions
     'Promotion',
     'BookingPromotion',
+    
+    # Dashboard rollups
+    'DailySalesStat',
+    'DailyUserStat',
+    
+    # Auth
+    'RevokedToken',
 ]
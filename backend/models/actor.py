@@ -1,7 +1,7 @@
 """
 Actor and Movie-Actor relationship Models
 Schema:
-- actors (actor_id, name, bio, photo_url, date_of_birth, nationality, created_at, updated_at)
+- actors (actor_id, name, bio, photo_url, photo_variants, date_of_birth, nationality, created_at, updated_at)
 - movie_actors (movie_actor_id, movie_id, actor_id, role_name, character_name, display_order)
 """
 from database.db import db
@@ -17,6 +17,7 @@ class Actor(db.Model):
     name = db.Column(db.String(255), nullable=False, index=True)
     bio = db.Column(db.Text, nullable=True)
     photo_url = db.Column(db.String(500), nullable=True)
+    photo_variants = db.Column(db.JSON, nullable=True)  # Ảnh resize (thumb/card/hero) + placeholder
     date_of_birth = db.Column(db.Date, nullable=True)
     nationality = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -35,6 +36,7 @@ class Actor(db.Model):
             'name': self.name,
             'bio': self.bio,
             'photo_url': self.photo_url,
+            'photo_variants': self.photo_variants,
             'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
             'nationality': self.nationality,
             'created_at': self.created_at.isoformat() if self.created_at else None,
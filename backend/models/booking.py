@@ -37,6 +37,12 @@ class Booking(db.Model):
     payment = db.relationship('Payment', back_populates='booking', uselist=False, cascade='all, delete-orphan')
     booking_promotions = db.relationship('BookingPromotion', back_populates='booking', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Composite indexes (migration 7c2e91d4a5b3): booking theo suất chiếu + trạng thái, lịch sử booking của user
+    __table_args__ = (
+        db.Index('idx_bookings_showtime_status', 'showtime_id', 'status'),
+        db.Index('idx_bookings_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Booking {self.booking_code}>'
     
@@ -77,6 +83,8 @@ class BookingSeat(db.Model):
     # Unique constraint
     __table_args__ = (
         db.UniqueConstraint('booking_id', 'seat_id', name='unique_booking_seat'),
+        # Ghế đã được đặt chưa: tra theo seat_id, booking_id nằm sẵn trong index
+        db.Index('idx_booking_seats_seat_booking', 'seat_id', 'booking_id'),
     )
     
     def __repr__(self):
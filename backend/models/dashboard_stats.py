@@ -0,0 +1,65 @@
+"""
+Dashboard rollup Models
+Schema:
+- daily_sales_stats (stat_date, cinema_id, movie_id, bookings_count, revenue,
+                     seats_sold, seats_capacity, showtimes_count, updated_at)
+- daily_user_stats (stat_date, new_users, updated_at)
+
+Các bảng này được cập nhật tăng dần theo sự kiện booking/payment/showtime
+(xem services/admin/dashboard_service.py), không có foreign key để giữ lại
+số liệu lịch sử khi xóa phim/rạp.
+"""
+from database.db import db
+from datetime import datetime
+
+
+class DailySalesStat(db.Model):
+    """Model cho bảng daily_sales_stats (rollup theo ngày, rạp, phim)"""
+    __tablename__ = 'daily_sales_stats'
+    
+    # Columns
+    stat_date = db.Column(db.Date, primary_key=True)
+    cinema_id = db.Column(db.Integer, primary_key=True, index=True)
+    movie_id = db.Column(db.Integer, primary_key=True, index=True)
+    bookings_count = db.Column(db.Integer, default=0, nullable=False)  # Theo ngày đặt vé
+    revenue = db.Column(db.Numeric(14, 2), default=0, nullable=False)  # Theo ngày thanh toán
+    seats_sold = db.Column(db.Integer, default=0, nullable=False)  # Theo ngày chiếu
+    seats_capacity = db.Column(db.Integer, default=0, nullable=False)  # Theo ngày chiếu
+    showtimes_count = db.Column(db.Integer, default=0, nullable=False)  # Theo ngày chiếu
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<DailySalesStat {self.stat_date} cinema={self.cinema_id} movie={self.movie_id}>'
+    
+    def to_dict(self):
+        """Chuyển đổi object thành dictionary"""
+        return {
+            'stat_date': self.stat_date.isoformat() if self.stat_date else None,
+            'cinema_id': self.cinema_id,
+            'movie_id': self.movie_id,
+            'bookings_count': self.bookings_count,
+            'revenue': float(self.revenue) if self.revenue else 0.0,
+            'seats_sold': self.seats_sold,
+            'seats_capacity': self.seats_capacity,
+            'showtimes_count': self.showtimes_count
+        }
+
+
+class DailyUserStat(db.Model):
+    """Model cho bảng daily_user_stats (số user mới theo ngày)"""
+    __tablename__ = 'daily_user_stats'
+    
+    # Columns
+    stat_date = db.Column(db.Date, primary_key=True)
+    new_users = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<DailyUserStat {self.stat_date}>'
+    
+    def to_dict(self):
+        """Chuyển đổi object thành dictionary"""
+        return {
+            'stat_date': self.stat_date.isoformat() if self.stat_date else None,
+            'new_users': self.new_users
+        }
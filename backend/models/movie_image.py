@@ -1,7 +1,7 @@
 """
 Movie Image Model
 Schema:
-- movie_images (image_id, movie_id, image_url, image_type, caption, display_order, created_at)
+- movie_images (image_id, movie_id, image_url, image_type, caption, display_order, variants, width, height, blurhash, created_at)
 """
 from database.db import db
 from datetime import datetime
@@ -18,6 +18,10 @@ class MovieImage(db.Model):
     image_type = db.Column(db.String(50), default='POSTER', nullable=True, index=True)
     caption = db.Column(db.String(255), nullable=True)
     display_order = db.Column(db.Integer, default=0, nullable=True)
+    variants = db.Column(db.JSON, nullable=True)  # Ảnh resize (thumb/card/hero, WebP + JPEG) + placeholder
+    width = db.Column(db.Integer, nullable=True)  # Kích thước ảnh gốc (đã xoay theo EXIF)
+    height = db.Column(db.Integer, nullable=True)
+    blurhash = db.Column(db.String(64), nullable=True)  # Placeholder ~30 ký tự (blurha.sh)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -35,5 +39,9 @@ class MovieImage(db.Model):
             'image_type': self.image_type,
             'caption': self.caption,
             'display_order': self.display_order,
+            'variants': self.variants,
+            'width': self.width,
+            'height': self.height,
+            'blurhash': self.blurhash,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
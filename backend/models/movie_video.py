@@ -1,7 +1,7 @@
 """
 Movie Video Model
 Schema:
-- movie_videos (video_id, movie_id, video_url, video_type, title, duration_seconds, display_order, created_at)
+- movie_videos (video_id, movie_id, video_url, video_type, title, duration_seconds, display_order, width, height, bitrate, poster_url, created_at)
 """
 from database.db import db
 from datetime import datetime
@@ -19,6 +19,10 @@ class MovieVideo(db.Model):
     title = db.Column(db.String(255), nullable=True)
     duration_seconds = db.Column(db.Integer, nullable=True)
     display_order = db.Column(db.Integer, default=0, nullable=True)
+    width = db.Column(db.Integer, nullable=True)  # Đọc từ header file video (MP4/WebM)
+    height = db.Column(db.Integer, nullable=True)
+    bitrate = db.Column(db.Integer, nullable=True)  # bit/s
+    poster_url = db.Column(db.String(500), nullable=True)  # Khung hình đại diện (cần ffmpeg)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -37,5 +41,9 @@ class MovieVideo(db.Model):
             'title': self.title,
             'duration_seconds': self.duration_seconds,
             'display_order': self.display_order,
+            'width': self.width,
+            'height': self.height,
+            'bitrate': self.bitrate,
+            'poster_url': self.poster_url,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
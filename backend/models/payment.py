@@ -24,6 +24,11 @@ class Payment(db.Model):
     # Relationships
     booking = db.relationship('Booking', back_populates='payment')
     
+    # Composite index (migration 7c2e91d4a5b3): doanh thu theo trạng thái thanh toán trong một khoảng thời gian
+    __table_args__ = (
+        db.Index('idx_payments_status_created', 'payment_status', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Payment booking_id={self.booking_id}>'
     
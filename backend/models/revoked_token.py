@@ -0,0 +1,35 @@
+"""
+Revoked Token Model
+Schema:
+- revoked_tokens (jti, user_id, token_type, expires_at, revoked_at)
+
+JWT đã bị thu hồi (logout). Mỗi worker giữ bản sao trong bộ nhớ
+(services/token_revocation.py); dòng hết hạn được tự động xóa.
+"""
+from database.db import db
+from datetime import datetime
+
+
+class RevokedToken(db.Model):
+    """Model cho bảng revoked_tokens"""
+    __tablename__ = 'revoked_tokens'
+    
+    # Columns
+    jti = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    token_type = db.Column(db.String(10), default='access', nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # Sau thời điểm này token tự hết hạn, dòng có thể xóa
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # Worker khác đồng bộ theo cột này
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
+    
+    def to_dict(self):
+        """Chuyển đổi object thành dictionary"""
+        return {
+            'jti': self.jti,
+            'user_id': self.user_id,
+            'token_type': self.token_type,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None
+        }
@@ -26,6 +26,12 @@ class Showtime(db.Model):
     screen = db.relationship('Screen', back_populates='showtimes')
     bookings = db.relationship('Booking', back_populates='showtime', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Composite indexes (migration 7c2e91d4a5b3): lịch chiếu theo phòng / theo phim trong một khoảng thời gian
+    __table_args__ = (
+        db.Index('idx_showtimes_screen_datetime', 'screen_id', 'show_datetime'),
+        db.Index('idx_showtimes_movie_datetime', 'movie_id', 'show_datetime'),
+    )
+    
     def __repr__(self):
         return f'<Showtime movie_id={self.movie_id} at {self.show_datetime}>'
     
@@ -4,8 +4,8 @@ Schema: users (user_id, email, password_hash, full_name, phone_number, date_of_b
         role, created_at, updated_at, is_active)
 """
 from database.db import db
+from utils.password_hasher import password_hasher
 from datetime import datetime
-import bcrypt
 
 
 class User(db.Model):
@@ -32,12 +32,16 @@ class User(db.Model):
         return f'<User {self.email}>'
     
     def set_password(self, password):
-        """Mã hóa và lưu mật khẩu"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Mã hóa và lưu mật khẩu (bcrypt chạy trên password_hasher)"""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Kiểm tra mật khẩu"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_hasher.verify(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """Hash được tạo với cost khác BCRYPT_LOG_ROUNDS hiện tại"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def is_admin(self):
         """Kiểm tra user có phải admin không"""
@@ -3,40 +3,171 @@ Admin accounts routes
 Handle CRUD operations for user accounts
 """
 from flask import Blueprint, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from middleware.auth_middleware import admin_required
+from services.admin.accounts_service import AccountsService
+from utils.password_hasher import PasswordHasherBusy
 
 accounts_bp = Blueprint('admin_accounts', __name__)
 
+# Upper bound of user_ids in one bulk request (one UPDATE ... IN (...))
+BULK_MAX_ACCOUNTS = 500
+
+
+def _hasher_busy():
+    """503 + Retry-After when the bcrypt queue is full (same as login)"""
+    return jsonify({'success': False, 'message': 'Password hashing is busy, please retry'}), 503, {'Retry-After': '1'}
+
 
 @accounts_bp.route('', methods=['GET'])
+@admin_required()
 def list_accounts():
-    """List all user accounts with pagination."""
-    # TODO: Implement user listing logic
-    return jsonify({'success': True, 'data': []}), 200
+    """
+    List user accounts with cursor pagination and filters
+    Query params: cursor, limit, role, is_active, search (email prefix)
+    """
+    cursor = request.args.get('cursor', None, type=str)
+    limit = request.args.get('limit', 20, type=int)
+    role = request.args.get('role', None, type=str)
+    search = request.args.get('search', None, type=str)
+    
+    # Handle is_active filter
+    is_active = None
+    is_active_param = request.args.get('is_active', None)
+    if is_active_param is not None:
+        is_active = is_active_param.lower() == 'true'
+    
+    result = AccountsService.get_all_accounts(
+        cursor=cursor,
+        limit=limit,
+        role=role,
+        is_active=is_active,
+        email_prefix=search.strip() if search else None
+    )
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
 
 
 @accounts_bp.route('', methods=['POST'])
+@admin_required()
 def create_account():
-    """Create a new user account."""
-    # TODO: Implement account creation logic
-    return jsonify({'success': False, 'message': 'Not implemented'}), 501
+    """
+    Create a new user account
+    Body: {email, password, full_name, phone_number, date_of_birth, role}
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'message': 'No data provided'}), 400
+    
+    try:
+        result = AccountsService.create_account(data)
+    except PasswordHasherBusy:
+        return _hasher_busy()
+    
+    if result['success']:
+        return jsonify(result), 201
+    else:
+        return jsonify(result), 400
 
 
 @accounts_bp.route('/<int:user_id>', methods=['GET'])
+@admin_required()
 def get_account(user_id):
-    """Get specific user account details."""
-    # TODO: Implement get account logic
-    return jsonify({'success': False, 'message': 'Not implemented'}), 501
+    """Get specific user account details with booking stats"""
+    result = AccountsService.get_account_by_id(user_id)
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 404
 
 
 @accounts_bp.route('/<int:user_id>', methods=['PUT'])
+@admin_required()
 def update_account(user_id):
-    """Update user account information."""
-    # TODO: Implement update account logic
-    return jsonify({'success': False, 'message': 'Not implemented'}), 501
+    """Update user account information"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'message': 'No data provided'}), 400
+    
+    # Only JSON booleans: 0 or "false" would slip past the lockout check below
+    if 'is_active' in data and not isinstance(data['is_active'], bool):
+        return jsonify({'success': False, 'message': 'is_active must be true or false'}), 400
+    
+    # Admins cannot lock themselves out
+    if user_id == int(get_jwt_identity()) and (
+        data.get('is_active') is False or data.get('role', 'admin') != 'admin'
+    ):
+        return jsonify({'success': False, 'message': 'Cannot deactivate or demote your own account'}), 400
+    
+    try:
+        result = AccountsService.update_account(user_id, data)
+    except PasswordHasherBusy:
+        return _hasher_busy()
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
 
 
 @accounts_bp.route('/<int:user_id>', methods=['DELETE'])
+@admin_required()
 def delete_account(user_id):
     """Delete a user account."""
-    # TODO: Implement delete account logic
-    return jsonify({'success': False, 'message': 'Not implemented'}), 501
+    if user_id == int(get_jwt_identity()):
+        return jsonify({'success': False, 'message': 'Cannot delete your own account'}), 400
+    
+    result = AccountsService.delete_account(user_id)
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
+
+
+@accounts_bp.route('/bulk', methods=['POST'])
+@admin_required()
+def bulk_update_accounts():
+    """
+    Activate, deactivate or change the role of many accounts at once
+    Body: {action: 'activate' | 'deactivate' | 'set_role', user_ids: [...], role}
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'message': 'No data provided'}), 400
+    
+    action = data.get('action')
+    user_ids = data.get('user_ids')
+    
+    # A string would be iterated character by character, booleans are ints in Python
+    if not isinstance(user_ids, list) or \
+            not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+        return jsonify({'success': False, 'message': 'user_ids must be a list of integers'}), 400
+    if len(user_ids) > BULK_MAX_ACCOUNTS:
+        return jsonify({
+            'success': False,
+            'message': f'Too many accounts: at most {BULK_MAX_ACCOUNTS} per request'
+        }), 400
+    
+    current_user_id = int(get_jwt_identity())
+    
+    if action == 'activate':
+        result = AccountsService.bulk_set_active(user_ids, True, exclude_user_id=current_user_id)
+    elif action == 'deactivate':
+        result = AccountsService.bulk_set_active(user_ids, False, exclude_user_id=current_user_id)
+    elif action == 'set_role':
+        result = AccountsService.bulk_set_role(user_ids, data.get('role'), exclude_user_id=current_user_id)
+    else:
+        return jsonify({'success': False, 'message': f'Invalid action: {action}'}), 400
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
@@ -2,26 +2,53 @@
 Admin dashboard routes
 Handle dashboard statistics and overview data
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+from middleware.auth_middleware import admin_required
+from database.pool_monitor import pool_monitor
+from middleware.sql_profiler import sql_profiler
+from services.admin.dashboard_service import DashboardService
 
 dashboard_bp = Blueprint('admin_dashboard', __name__)
 
 
 @dashboard_bp.route('/stats', methods=['GET'])
+@admin_required()
 def get_stats():
     """Return dashboard statistics.
     
     Returns key metrics for admin dashboard including:
-    - Total users
-    - Total movies
-    - Total bookings
-    - Revenue
+    - Total users, movies, bookings and revenue
+    - Today's bookings, revenue, new users and occupancy (with change vs yesterday)
+    - Daily series and top movies / cinemas by revenue
+    
+    Query params: days (length of the daily series, default 7)
     """
-    # TODO: Query real data from database
-    data = {
-        'total_users': 124,
-        'total_movies': 56,
-        'total_bookings': 1423,
-        'revenue_today': 1520.50
-    }
-    return jsonify({'success': True, 'data': data}), 200
+    days = request.args.get('days', 7, type=int)
+    result = DashboardService.get_dashboard_stats(days=days)
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
+
+
+@dashboard_bp.route('/sql-report', methods=['GET'])
+@admin_required()
+def get_sql_report():
+    """Per-endpoint query counts, DB time and repeated statement shapes (this worker only)"""
+    return jsonify({
+        'success': True,
+        'data': sql_profiler.report()
+    }), 200
+
+
+@dashboard_bp.route('/metrics', methods=['GET'])
+@admin_required()
+def get_metrics():
+    """Connection pool sizing, checkout waits, overflow, invalidations and pre-ping cost (this worker only)"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'db_pool': pool_monitor.stats()
+        }
+    }), 200
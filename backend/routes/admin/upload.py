@@ -2,11 +2,14 @@
 Upload Routes - Handle file uploads for images and videos
 """
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import get_jwt_identity
 from werkzeug.utils import secure_filename
 from middleware.auth_middleware import admin_required
-import os
-import uuid
-from datetime import datetime
+from services.media.chunked_upload import ChunkedUploadService
+from services.media.content_store import content_store
+from services.media.file_server import media_file_server
+from services.media.image_derivatives import image_pipeline
+from services.media.video_metadata import video_pipeline
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -24,6 +27,12 @@ def allowed_file(filename, file_type='images'):
         return ext in ALLOWED_VIDEO_EXTENSIONS
     return False
 
+def _video_metadata(file_url):
+    """Probe the container headers (duration/resolution); faststart and poster run once a movie uses the video"""
+    metadata = video_pipeline.metadata_for(file_url)
+    return {key: metadata[key] for key in ('duration_seconds', 'width', 'height', 'bitrate')}
+
+
 @upload_bp.route('/upload', methods=['POST'])
 @admin_required()
 def upload_file():
@@ -55,35 +64,166 @@ def upload_file():
                 'message': f'Invalid file type. Allowed: {ALLOWED_IMAGE_EXTENSIONS if file_type == "images" else ALLOWED_VIDEO_EXTENSIONS}'
             }), 400
         
-        # Create upload directory if not exists
-        upload_folder = os.path.join('uploads', file_type)
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Generate unique filename
         original_filename = secure_filename(file.filename)
         file_ext = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{file_ext}"
         
-        # Save file
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
+        # Save under the content hash (identical files share one URL)
+        stored = content_store.store_stream(file.stream, file_ext, file_type)
         
-        # Return URL (relative path that backend will serve)
-        file_url = f"/uploads/{file_type}/{unique_filename}"
+        data = {
+            'url': stored['url'],
+            'filename': stored['filename'],
+            'original_filename': original_filename,
+            'type': file_type,
+            'sha256': stored['sha256'],
+            'deduplicated': stored['deduplicated']
+        }
+        
+        if file_type == 'images':
+            # Dimensions are read from the header now; resizing runs in the background
+            metadata = image_pipeline.metadata_for(stored['url'])
+            data['width'] = metadata['width']
+            data['height'] = metadata['height']
+            if metadata['variants'] is None:
+                image_pipeline.submit(stored['url'])
+        else:
+            data.update(_video_metadata(stored['url']))
         
         return jsonify({
             'success': True,
             'message': 'File uploaded successfully',
-            'data': {
-                'url': file_url,
-                'filename': unique_filename,
-                'original_filename': original_filename,
-                'type': file_type
-            }
+            'data': data
         }), 200
-        
+    
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Upload failed: {str(e)}'
         }), 500
+
+
+# ==================== CHUNKED (RESUMABLE) UPLOAD ====================
+
+@upload_bp.route('/upload/sessions', methods=['POST'])
+@admin_required()
+def initiate_upload():
+    """
+    Start a resumable upload
+    
+    Request body:
+        {"filename": "trailer.mp4", "type": "videos", "size": 734003200, "sha256": "<optional hex>"}
+    """
+    data = request.get_json(silent=True) or {}
+    file_type = data.get('type', 'videos')
+    original_filename = secure_filename(data.get('filename') or '')
+    
+    if not original_filename:
+        return jsonify({
+            'success': False,
+            'message': 'No file selected'
+        }), 400
+    
+    if not allowed_file(original_filename, file_type):
+        return jsonify({
+            'success': False,
+            'message': f'Invalid file type. Allowed: {ALLOWED_IMAGE_EXTENSIONS if file_type == "images" else ALLOWED_VIDEO_EXTENSIONS}'
+        }), 400
+    
+    try:
+        total_size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'File size is required'
+        }), 400
+    
+    result = ChunkedUploadService.initiate_upload(
+        original_filename, file_type, total_size,
+        checksum=data.get('sha256'),
+        created_by=int(get_jwt_identity())
+    )
+    
+    if result['success']:
+        return jsonify(result), 201
+    return jsonify(result), 400
+
+
+@upload_bp.route('/upload/sessions/<upload_id>', methods=['GET'])
+@admin_required()
+def get_upload_status(upload_id):
+    """Get received/missing chunks of an upload (to resume after a disconnect)"""
+    result = ChunkedUploadService.get_upload_status(upload_id)
+    
+    if result['success']:
+        return jsonify(result), 200
+    return jsonify(result), 404
+
+
+@upload_bp.route('/upload/sessions/<upload_id>/chunks/<int:index>', methods=['PUT'])
+@admin_required()
+def upload_chunk(upload_id, index):
+    """
+    Upload one chunk as the raw request body (application/octet-stream)
+    
+    Headers:
+        X-Chunk-SHA256: optional SHA-256 (hex) of the chunk
+    """
+    if request.content_length is None:
+        return jsonify({
+            'success': False,
+            'message': 'Content-Length is required'
+        }), 411
+    
+    result = ChunkedUploadService.upload_chunk(
+        upload_id, index, request.stream, request.content_length,
+        checksum=request.headers.get('X-Chunk-SHA256')
+    )
+    
+    if result['success']:
+        return jsonify(result), 200
+    if result['message'] == 'Upload session not found':
+        return jsonify(result), 404
+    return jsonify(result), 400
+
+
+@upload_bp.route('/upload/sessions/<upload_id>/complete', methods=['POST'])
+@admin_required()
+def complete_upload(upload_id):
+    """Assemble the upload and move it into uploads/<type>/"""
+    result = ChunkedUploadService.complete_upload(upload_id)
+    
+    if result['success']:
+        if result['data']['type'] == 'images':
+            metadata = image_pipeline.metadata_for(result['data']['url'])
+            result['data']['width'] = metadata['width']
+            result['data']['height'] = metadata['height']
+            if metadata['variants'] is None:
+                image_pipeline.submit(result['data']['url'])
+        else:
+            result['data'].update(_video_metadata(result['data']['url']))
+        result['message'] = 'File uploaded successfully'
+        return jsonify(result), 200
+    if result['message'] == 'Upload session not found':
+        return jsonify(result), 404
+    return jsonify(result), 400
+
+
+@upload_bp.route('/upload/sessions/<upload_id>', methods=['DELETE'])
+@admin_required()
+def abort_upload(upload_id):
+    """Cancel an upload and delete its temp file"""
+    result = ChunkedUploadService.abort_upload(upload_id)
+    
+    if result['success']:
+        return jsonify(result), 200
+    return jsonify(result), 404
+
+
+@upload_bp.route('/upload/cache-stats', methods=['GET'])
+@admin_required()
+def get_media_cache_stats():
+    """Hit/miss counters of the /uploads metadata and hot-file caches (this worker only)"""
+    return jsonify({
+        'success': True,
+        'data': media_file_server.stats()
+    }), 200
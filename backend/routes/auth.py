@@ -4,8 +4,10 @@ Các endpoints cho authentication: login, register, logout, etc.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, decode_token
 from services.auth_service import AuthService
+from services.token_revocation import token_revocation
+from utils.password_hasher import PasswordHasherBusy
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -72,13 +74,19 @@ def register():
                 }), 400
         
         # Register user
-        success, message, user = AuthService.register_user(
-            email=email,
-            password=password,
-            full_name=full_name,
-            phone_number=phone_number,
-            date_of_birth=date_of_birth
-        )
+        try:
+            success, message, user = AuthService.register_user(
+                email=email,
+                password=password,
+                full_name=full_name,
+                phone_number=phone_number,
+                date_of_birth=date_of_birth
+            )
+        except PasswordHasherBusy:
+            return jsonify({
+                'success': False,
+                'message': 'Hệ thống đang bận, vui lòng thử lại sau'
+            }), 503, {'Retry-After': '1'}
         
         if not success:
             return jsonify({
@@ -136,7 +144,13 @@ def login():
             }), 400
         
         # Login user
-        success, message, tokens, user = AuthService.login_user(email, password)
+        try:
+            success, message, tokens, user = AuthService.login_user(email, password)
+        except PasswordHasherBusy:
+            return jsonify({
+                'success': False,
+                'message': 'Hệ thống đang bận, vui lòng thử lại sau'
+            }), 503, {'Retry-After': '1'}
         
         if not success:
             return jsonify({
@@ -192,14 +206,41 @@ def get_current_user():
 @jwt_required()
 def logout():
     """
-    Endpoint đăng xuất
-    Note: Với JWT, việc logout chủ yếu được xử lý ở client side
-    bằng cách xóa token
+    Endpoint đăng xuất: thu hồi access token hiện tại
+    (và refresh token nếu được gửi kèm)
+    
+    Request body (optional):
+        {
+            "refresh_token": "..."
+        }
     """
-    return jsonify({
-        'success': True,
-        'message': 'Đăng xuất thành công'
-    }), 200
+    try:
+        current_user_id = int(get_jwt_identity())
+        claims = get_jwt()
+        token_revocation.revoke(claims['jti'], claims['exp'], current_user_id, claims.get('type', 'access'))
+        
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                refresh_claims = decode_token(refresh_token)
+            except Exception:
+                refresh_claims = None
+            # Chỉ thu hồi refresh token của chính user này
+            if refresh_claims and refresh_claims.get('sub') == str(current_user_id):
+                token_revocation.revoke(
+                    refresh_claims['jti'], refresh_claims['exp'], current_user_id, refresh_claims.get('type', 'refresh')
+                )
+        
+        return jsonify({
+            'success': True,
+            'message': 'Đăng xuất thành công'
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Lỗi server: {str(e)}'
+        }), 500
 
 
 @auth_bp.route('/health', methods=['GET'])
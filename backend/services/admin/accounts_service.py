@@ -0,0 +1,366 @@
+"""
+Account Management Service
+Handles business logic for user accounts: listing, CRUD and bulk status/role changes
+"""
+from database.db import db
+from models.user import User
+from models.booking import Booking
+from models.payment import Payment
+from services.auth_service import AuthService
+from services.admin.dashboard_service import PAID_PAYMENT_STATUS
+from utils.password_hasher import PasswordHasherBusy
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func, case
+from datetime import datetime
+import base64
+import json
+
+
+VALID_ROLES = ('user', 'admin')
+
+
+class AccountsService:
+    """Service class for user account management operations"""
+    
+    @staticmethod
+    def get_all_accounts(cursor=None, limit=20, role=None, is_active=None, email_prefix=None):
+        """
+        Get user accounts with keyset (cursor) pagination and filters
+        
+        Without a search the list is ordered by user_id desc, so role/is_active
+        filters walk idx_role / idx_is_active (InnoDB secondary indexes carry
+        the primary key). With email_prefix the list is ordered by email and
+        walks the unique email index with a LIKE 'prefix%' range.
+        
+        Args:
+            cursor (str): Opaque cursor from the previous page (None = first page)
+            limit (int): Number of items per page
+            role (str): Filter by role ('user' / 'admin')
+            is_active (bool): Filter by active status
+            email_prefix (str): Search by email prefix
+        
+        Returns:
+            dict: Account list with booking stats and the next cursor
+        """
+        try:
+            limit = max(1, min(limit, 100))
+            query = User.query
+            
+            # Apply filters
+            if role:
+                query = query.filter(User.role == role)
+            
+            if is_active is not None:
+                query = query.filter(User.is_active == is_active)
+            
+            after = AccountsService._decode_cursor(cursor)
+            
+            if email_prefix:
+                query = query.filter(User.email.like(f'{_escape_like(email_prefix)}%', escape='\\'))
+                if after is not None:
+                    query = query.filter(User.email > after)
+                query = query.order_by(User.email)
+            else:
+                if after is not None:
+                    query = query.filter(User.user_id < after)
+                query = query.order_by(User.user_id.desc())
+            
+            # Fetch one extra row to know whether there is a next page
+            users = query.limit(limit + 1).all()
+            has_next = len(users) > limit
+            users = users[:limit]
+            
+            stats = AccountsService._booking_stats([user.user_id for user in users])
+            
+            accounts = []
+            for user in users:
+                user_dict = user.to_dict()
+                user_dict.update(stats.get(user.user_id, {'booking_count': 0, 'lifetime_spend': 0.0}))
+                accounts.append(user_dict)
+            
+            next_cursor = None
+            if has_next and users:
+                last = users[-1]
+                next_cursor = AccountsService._encode_cursor(last.email if email_prefix else last.user_id)
+            
+            return {
+                'success': True,
+                'data': accounts,
+                'pagination': {
+                    'limit': limit,
+                    'next_cursor': next_cursor,
+                    'has_next': has_next
+                }
+            }
+        except ValueError:
+            return {'success': False, 'message': 'Invalid cursor'}
+        except SQLAlchemyError as e:
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+    
+    @staticmethod
+    def get_account_by_id(user_id):
+        """
+        Get user account details by ID with booking stats
+        
+        Args:
+            user_id (int): User ID
+        
+        Returns:
+            dict: Account details
+        """
+        try:
+            user = User.query.get(user_id)
+            
+            if not user:
+                return {'success': False, 'message': 'Account not found'}
+            
+            user_dict = user.to_dict()
+            user_dict.update(AccountsService._booking_stats([user_id]).get(
+                user_id, {'booking_count': 0, 'lifetime_spend': 0.0}
+            ))
+            
+            return {'success': True, 'data': user_dict}
+        except SQLAlchemyError as e:
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+    
+    @staticmethod
+    def create_account(data):
+        """
+        Create a new user account
+        
+        Args:
+            data (dict): Account data (email, password, full_name, phone_number,
+                         date_of_birth, role)
+        
+        Returns:
+            dict: Created account data
+        """
+        try:
+            date_of_birth = datetime.strptime(data['date_of_birth'], '%Y-%m-%d').date() \
+                if data.get('date_of_birth') else None
+        except ValueError:
+            return {'success': False, 'message': 'Invalid date_of_birth format (YYYY-MM-DD)'}
+        
+        role = data.get('role', 'user')
+        if role not in VALID_ROLES:
+            return {'success': False, 'message': f'Invalid role: {role}'}
+        
+        success, message, user = AuthService.register_user(
+            email=(data.get('email') or '').strip(),
+            password=data.get('password') or '',
+            full_name=data.get('full_name') or '',
+            phone_number=data.get('phone_number'),
+            date_of_birth=date_of_birth,
+            role=role
+        )
+        
+        if not success:
+            return {'success': False, 'message': message}
+        
+        return {'success': True, 'data': user.to_dict(), 'message': 'Account created successfully'}
+    
+    @staticmethod
+    def update_account(user_id, data):
+        """
+        Update user account information
+        
+        Args:
+            user_id (int): User ID
+            data (dict): Updated account data
+        
+        Returns:
+            dict: Updated account data
+        """
+        try:
+            user = User.query.get(user_id)
+            
+            if not user:
+                return {'success': False, 'message': 'Account not found'}
+            
+            # Validate before touching the user
+            if 'full_name' in data and (not data['full_name'] or not data['full_name'].strip()):
+                return {'success': False, 'message': 'Full name is required'}
+            if 'role' in data and data['role'] not in VALID_ROLES:
+                return {'success': False, 'message': f"Invalid role: {data['role']}"}
+            if 'is_active' in data and not isinstance(data['is_active'], bool):
+                return {'success': False, 'message': 'is_active must be true or false'}
+            if data.get('password'):
+                is_valid, msg = AuthService.validate_password(data['password'])
+                if not is_valid:
+                    return {'success': False, 'message': msg}
+            
+            # Update fields
+            if 'full_name' in data:
+                user.full_name = data['full_name'].strip()
+            if 'phone_number' in data:
+                user.phone_number = data['phone_number']
+            if 'date_of_birth' in data:
+                user.date_of_birth = datetime.strptime(data['date_of_birth'], '%Y-%m-%d').date() \
+                    if data['date_of_birth'] else None
+            if 'role' in data:
+                user.role = data['role']
+            if 'is_active' in data:
+                user.is_active = data['is_active']
+            if data.get('password'):
+                user.set_password(data['password'])
+            
+            db.session.commit()
+            
+            if 'role' in data or 'is_active' in data:
+                AuthService.invalidate_user_status(user.user_id)
+            
+            return {'success': True, 'data': user.to_dict(), 'message': 'Account updated successfully'}
+        
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+        except ValueError as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Invalid data format: {str(e)}'}
+    
+    @staticmethod
+    def delete_account(user_id):
+        """
+        Delete a user account (cascade delete bookings and reviews)
+        
+        Args:
+            user_id (int): User ID
+        
+        Returns:
+            dict: Success status
+        """
+        try:
+            user = User.query.get(user_id)
+            
+            if not user:
+                return {'success': False, 'message': 'Account not found'}
+            
+            db.session.delete(user)
+            db.session.commit()
+            AuthService.invalidate_user_status(user_id)
+            
+            return {'success': True, 'message': 'Account deleted successfully'}
+        
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+    
+    @staticmethod
+    def bulk_set_active(user_ids, is_active, exclude_user_id=None):
+        """
+        Activate or deactivate many accounts with one UPDATE statement
+        
+        Args:
+            user_ids (list): User IDs
+            is_active (bool): New active status
+            exclude_user_id (int): Account that must not be changed (the acting admin)
+        
+        Returns:
+            dict: Number of updated accounts
+        """
+        return AccountsService._bulk_update(
+            user_ids, {User.is_active: bool(is_active)}, exclude_user_id,
+            User.is_active != bool(is_active)
+        )
+    
+    @staticmethod
+    def bulk_set_role(user_ids, role, exclude_user_id=None):
+        """
+        Change the role of many accounts with one UPDATE statement
+        
+        Args:
+            user_ids (list): User IDs
+            role (str): New role ('user' / 'admin')
+            exclude_user_id (int): Account that must not be changed (the acting admin)
+        
+        Returns:
+            dict: Number of updated accounts
+        """
+        if role not in VALID_ROLES:
+            return {'success': False, 'message': f'Invalid role: {role}'}
+        
+        return AccountsService._bulk_update(
+            user_ids, {User.role: role}, exclude_user_id, User.role != role
+        )
+    
+    @staticmethod
+    def _bulk_update(user_ids, values, exclude_user_id, changed_criterion):
+        """Apply a set-based UPDATE to the given accounts, skipping rows already in that state"""
+        try:
+            user_ids = {int(user_id) for user_id in user_ids or []}
+            user_ids.discard(exclude_user_id)
+            
+            if not user_ids:
+                return {'success': False, 'message': 'No accounts selected'}
+            
+            values = dict(values)
+            values[User.updated_at] = datetime.utcnow()
+            
+            updated_count = User.query.filter(
+                User.user_id.in_(user_ids),
+                changed_criterion
+            ).update(values, synchronize_session=False)
+            
+            db.session.commit()
+            AuthService.invalidate_user_status(*user_ids)
+            
+            return {
+                'success': True,
+                'data': {'updated_count': updated_count},
+                'message': f'{updated_count} accounts updated successfully'
+            }
+        except (TypeError, ValueError):
+            db.session.rollback()
+            return {'success': False, 'message': 'Invalid user_ids'}
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+    
+    @staticmethod
+    def _booking_stats(user_ids):
+        """
+        Booking count and lifetime spend for a page of users in one grouped query
+        
+        Returns:
+            dict: user_id -> {'booking_count', 'lifetime_spend'}
+        """
+        if not user_ids:
+            return {}
+        
+        rows = db.session.query(
+            Booking.user_id,
+            func.count(Booking.booking_id),
+            func.coalesce(func.sum(case(
+                (Payment.payment_status == PAID_PAYMENT_STATUS, Payment.amount), else_=0
+            )), 0)
+        ).outerjoin(
+            Payment, Payment.booking_id == Booking.booking_id
+        ).filter(
+            Booking.user_id.in_(user_ids)
+        ).group_by(Booking.user_id).all()
+        
+        return {
+            user_id: {'booking_count': booking_count, 'lifetime_spend': float(spend)}
+            for user_id, booking_count, spend in rows
+        }
+    
+    @staticmethod
+    def _encode_cursor(value):
+        return base64.urlsafe_b64encode(json.dumps({'k': value}).encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['k']
+        except (TypeError, KeyError, UnicodeError, ValueError, base64.binascii.Error):
+            raise ValueError('Invalid cursor')
+
+
+def _escape_like(value):
+    """Escape LIKE wildcards so the prefix is matched literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -2,17 +2,34 @@
 Cinema Management Service
 Handles business logic for cinemas, screens, and seats CRUD operations
 """
-from database.db import db
+from database.db import db, read_only
 from models.movie import Cinema, Screen
 from models.seat import Seat
+from models.showtime import Showtime
+from models.booking import Booking, BookingSeat
+from utils.cache import TaggedCache
+from config import Config
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import desc
+from sqlalchemy import desc, func, case, exists, or_
+from datetime import datetime, timedelta
+
+
+CANCELLED_STATUS = 'CANCELLED'
+
+# Cinema detail read model, invalidated by tag 'cinema:<id>' on admin writes
+cinema_detail_cache = TaggedCache(ttl=Config.CINEMA_DETAIL_CACHE_TTL, max_entries=512)
+
+
+def cinema_tag(cinema_id):
+    """Cache tag for everything derived from one cinema"""
+    return f'cinema:{cinema_id}'
 
 
 class CinemasService:
     """Service class for cinema management operations"""
     
     @staticmethod
+    @read_only
     def get_all_cinemas(page=1, per_page=10, city=None, search=None):
         """
         Get all cinemas with pagination and filters
@@ -76,27 +93,142 @@ class CinemasService:
             dict: Cinema details with screens
         """
         try:
-            cinema = Cinema.query.get(cinema_id)
+            cinema_dict = CinemasService._get_cinema_detail(cinema_id)
             
-            if not cinema:
+            if not cinema_dict:
                 return {'success': False, 'message': 'Cinema not found'}
             
-            cinema_dict = cinema.to_dict()
-            
-            # Get screens with seat count
-            screens = []
-            for screen in cinema.screens:
-                screen_dict = screen.to_dict()
-                screen_dict['seat_count'] = screen.seats.count()
-                screens.append(screen_dict)
-            
-            cinema_dict['screens'] = screens
-            cinema_dict['total_screens'] = len(screens)
-            
             return {'success': True, 'data': cinema_dict}
         except SQLAlchemyError as e:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
+    @staticmethod
+    def _get_cinema_detail(cinema_id):
+        """
+        Cinema detail read model (cached by cinema tag)
+        
+        Returns the cinema with its screens, seat counts by seat_type,
+        upcoming showtime counts and today's occupancy, loaded with a single
+        grouped statement: the cinema outer-joined to its screens and to
+        per-screen aggregates of seats, showtimes and sold seats.
+        
+        Args:
+            cinema_id (int): Cinema ID
+        
+        Returns:
+            dict: Cinema details, or None if the cinema does not exist
+        """
+        cache_key = ('cinema_detail', cinema_id)
+        cached = cinema_detail_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        now = datetime.now()
+        today_start = datetime.combine(now.date(), datetime.min.time())
+        tomorrow_start = today_start + timedelta(days=1)
+        not_cancelled = lambda status: or_(status.is_(None), status != CANCELLED_STATUS)
+        is_today = (Showtime.show_datetime >= today_start) & (Showtime.show_datetime < tomorrow_start)
+        
+        # Seats per screen and seat_type
+        seat_stats = db.session.query(
+            Seat.screen_id.label('screen_id'),
+            Seat.seat_type.label('seat_type'),
+            func.count(Seat.seat_id).label('seat_count')
+        ).join(
+            Screen, Seat.screen_id == Screen.screen_id
+        ).filter(
+            Screen.cinema_id == cinema_id
+        ).group_by(Seat.screen_id, Seat.seat_type).subquery()
+        
+        # Upcoming and today's showtimes per screen (index range on show_datetime)
+        show_stats = db.session.query(
+            Showtime.screen_id.label('screen_id'),
+            func.sum(case((Showtime.show_datetime >= now, 1), else_=0)).label('upcoming'),
+            func.sum(case((is_today, 1), else_=0)).label('today_showtimes')
+        ).join(
+            Screen, Showtime.screen_id == Screen.screen_id
+        ).filter(
+            Screen.cinema_id == cinema_id,
+            Showtime.show_datetime >= today_start,
+            not_cancelled(Showtime.status)
+        ).group_by(Showtime.screen_id).subquery()
+        
+        # Seats sold for today's showtimes per screen
+        sold_stats = db.session.query(
+            Showtime.screen_id.label('screen_id'),
+            func.count(BookingSeat.booking_seat_id).label('sold')
+        ).join(
+            Booking, BookingSeat.booking_id == Booking.booking_id
+        ).join(
+            Showtime, Booking.showtime_id == Showtime.showtime_id
+        ).join(
+            Screen, Showtime.screen_id == Screen.screen_id
+        ).filter(
+            Screen.cinema_id == cinema_id,
+            is_today,
+            not_cancelled(Showtime.status),
+            not_cancelled(Booking.status)
+        ).group_by(Showtime.screen_id).subquery()
+        
+        rows = db.session.query(
+            Cinema,
+            Screen,
+            seat_stats.c.seat_type,
+            seat_stats.c.seat_count,
+            show_stats.c.upcoming,
+            show_stats.c.today_showtimes,
+            sold_stats.c.sold
+        ).outerjoin(
+            Screen, Screen.cinema_id == Cinema.cinema_id
+        ).outerjoin(
+            seat_stats, seat_stats.c.screen_id == Screen.screen_id
+        ).outerjoin(
+            show_stats, show_stats.c.screen_id == Screen.screen_id
+        ).outerjoin(
+            sold_stats, sold_stats.c.screen_id == Screen.screen_id
+        ).filter(
+            Cinema.cinema_id == cinema_id
+        ).order_by(Screen.screen_id).all()
+        
+        if not rows:
+            return None
+        
+        cinema_dict = rows[0][0].to_dict()
+        
+        # One row per (screen, seat_type): fold them into screens
+        screens = {}
+        for _, screen, seat_type, seat_count, upcoming, today_showtimes, sold in rows:
+            if screen is None:
+                continue
+            
+            screen_dict = screens.get(screen.screen_id)
+            if screen_dict is None:
+                screen_dict = screen.to_dict()
+                screen_dict['seat_count'] = 0
+                screen_dict['seat_counts_by_type'] = {}
+                screen_dict['upcoming_showtimes'] = int(upcoming or 0)
+                screen_dict['today_showtimes'] = int(today_showtimes or 0)
+                screen_dict['today_seats_sold'] = int(sold or 0)
+                capacity = (screen.total_seats or 0) * screen_dict['today_showtimes']
+                screen_dict['today_occupancy'] = round(screen_dict['today_seats_sold'] / capacity, 4) if capacity else 0.0
+                screens[screen.screen_id] = screen_dict
+            
+            if seat_count:
+                screen_dict['seat_count'] += seat_count
+                screen_dict['seat_counts_by_type'][seat_type or 'REGULAR'] = seat_count
+        
+        screens = list(screens.values())
+        today_capacity = sum((screen['total_seats'] or 0) * screen['today_showtimes'] for screen in screens)
+        today_sold = sum(screen['today_seats_sold'] for screen in screens)
+        
+        cinema_dict['screens'] = screens
+        cinema_dict['total_screens'] = len(screens)
+        cinema_dict['upcoming_showtimes'] = sum(screen['upcoming_showtimes'] for screen in screens)
+        cinema_dict['today_occupancy'] = round(today_sold / today_capacity, 4) if today_capacity else 0.0
+        
+        cinema_detail_cache.set(cache_key, cinema_dict, tags=[cinema_tag(cinema_id)])
+        return cinema_dict
+    
     @staticmethod
     def create_cinema(data):
         """
@@ -170,6 +302,7 @@ class CinemasService:
                 cinema.longitude = data['longitude']
             
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(cinema_id))
             
             return {
                 'success': True,
@@ -197,16 +330,22 @@ class CinemasService:
             if not cinema:
                 return {'success': False, 'message': 'Cinema not found'}
             
-            # Check if cinema has any showtimes
-            for screen in cinema.screens:
-                if screen.showtimes.count() > 0:
-                    return {
-                        'success': False,
-                        'message': 'Cannot delete cinema with active showtimes'
-                    }
+            # Check if cinema has any showtimes (single EXISTS query)
+            has_showtimes = db.session.query(
+                exists().where(
+                    Showtime.screen_id == Screen.screen_id,
+                    Screen.cinema_id == cinema_id
+                )
+            ).scalar()
+            if has_showtimes:
+                return {
+                    'success': False,
+                    'message': 'Cannot delete cinema with active showtimes'
+                }
             
             db.session.delete(cinema)
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(cinema_id))
             
             return {
                 'success': True,
@@ -223,6 +362,9 @@ class CinemasService:
         """
         Get all screens for a cinema
         
+        Not @read_only: it fills the shared cinema detail cache, which must
+        not hold a lagging replica's view after a write invalidated the tag
+        
         Args:
             cinema_id (int): Cinema ID
             
@@ -230,22 +372,17 @@ class CinemasService:
             dict: List of screens with seat count
         """
         try:
-            cinema = Cinema.query.get(cinema_id)
+            cinema_dict = CinemasService._get_cinema_detail(cinema_id)
             
-            if not cinema:
+            if not cinema_dict:
                 return {'success': False, 'message': 'Cinema not found'}
             
-            screens = []
-            for screen in cinema.screens:
-                screen_dict = screen.to_dict()
-                screen_dict['seat_count'] = screen.seats.count()
-                screens.append(screen_dict)
-            
-            return {'success': True, 'data': screens}
+            return {'success': True, 'data': cinema_dict['screens']}
         except SQLAlchemyError as e:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
     @staticmethod
+    @read_only
     def get_screen_by_id(screen_id):
         """
         Get screen details by ID with seats
@@ -312,6 +449,7 @@ class CinemasService:
             
             db.session.add(screen)
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(cinema_id))
             
             return {
                 'success': True,
@@ -347,6 +485,7 @@ class CinemasService:
                 screen.screen_type = data['screen_type']
             
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(screen.cinema_id))
             
             return {
                 'success': True,
@@ -374,15 +513,20 @@ class CinemasService:
             if not screen:
                 return {'success': False, 'message': 'Screen not found'}
             
-            # Check if screen has any showtimes
-            if screen.showtimes.count() > 0:
+            # Check if screen has any showtimes (single EXISTS query)
+            has_showtimes = db.session.query(
+                exists().where(Showtime.screen_id == screen_id)
+            ).scalar()
+            if has_showtimes:
                 return {
                     'success': False,
                     'message': 'Cannot delete screen with active showtimes'
                 }
             
+            cinema_id = screen.cinema_id
             db.session.delete(screen)
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(cinema_id))
             
             return {
                 'success': True,
@@ -446,6 +590,7 @@ class CinemasService:
             total_seats_count = Seat.query.filter_by(screen_id=screen_id).count()
             screen.total_seats = total_seats_count
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(screen.cinema_id))
             
             return {
                 'success': True,
@@ -514,6 +659,7 @@ class CinemasService:
                 seat.is_available = data['is_available']
             
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(seat.screen.cinema_id))
             
             return {
                 'success': True,
@@ -551,6 +697,7 @@ class CinemasService:
                 total_seats_count = Seat.query.filter_by(screen_id=screen_id).count()
                 screen.total_seats = total_seats_count
                 db.session.commit()
+                cinema_detail_cache.invalidate_tag(cinema_tag(screen.cinema_id))
             
             return {
                 'success': True,
@@ -586,6 +733,7 @@ class CinemasService:
                 total_seats_count = Seat.query.filter_by(screen_id=screen_id).count()
                 screen.total_seats = total_seats_count
                 db.session.commit()
+                cinema_detail_cache.invalidate_tag(cinema_tag(screen.cinema_id))
             
             return {
                 'success': True,
@@ -0,0 +1,566 @@
+"""
+Dashboard Service
+Serves admin dashboard metrics from the daily rollup tables
+
+The rollups (daily_sales_stats, daily_user_stats) are maintained incrementally:
+ORM events on Booking, BookingSeat, Payment, Showtime and User record the
+change each row makes, and the merged deltas are upserted once per flush in
+the same transaction. Writes that bypass the ORM (bulk updates, raw SQL,
+ON DELETE CASCADE in the database) are repaired by rebuild_rollups(), which
+recomputes a date range from the base tables.
+"""
+from database.db import db
+from models.user import User
+from models.movie import Movie, Cinema, Screen
+from models.showtime import Showtime
+from models.booking import Booking, BookingSeat
+from models.payment import Payment
+from models.dashboard_stats import DailySalesStat, DailyUserStat
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import event, func, select, inspect, insert, update, cast, or_
+from sqlalchemy.orm import object_session
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+import click
+
+
+CANCELLED_STATUS = 'CANCELLED'
+PAID_PAYMENT_STATUS = 'COMPLETED'
+
+SALES_KEY = ('stat_date', 'cinema_id', 'movie_id')
+SALES_METRICS = ('bookings_count', 'revenue', 'seats_sold', 'seats_capacity', 'showtimes_count')
+USER_KEY = ('stat_date',)
+
+DELTAS_KEY = 'dashboard_rollup_deltas'
+CACHE_KEY = 'dashboard_rollup_cache'
+
+
+class DashboardService:
+    """Service class for admin dashboard statistics"""
+    
+    @staticmethod
+    def get_dashboard_stats(days=7, top=5):
+        """
+        Get dashboard statistics from the rollup tables
+        
+        Args:
+            days (int): Number of days in the daily series (including today)
+            top (int): Number of top movies / cinemas by revenue in that window
+        
+        Returns:
+            dict: Totals, today vs yesterday, daily series and top lists
+        """
+        try:
+            days = max(2, min(days, 90))
+            today = datetime.utcnow().date()
+            start = today - timedelta(days=days - 1)
+            
+            # Daily series for the window (rollup rows only, indexed by stat_date)
+            series_rows = db.session.query(
+                DailySalesStat.stat_date,
+                func.sum(DailySalesStat.bookings_count),
+                func.sum(DailySalesStat.revenue),
+                func.sum(DailySalesStat.seats_sold),
+                func.sum(DailySalesStat.seats_capacity)
+            ).filter(
+                DailySalesStat.stat_date >= start
+            ).group_by(DailySalesStat.stat_date).all()
+            
+            user_rows = db.session.query(
+                DailyUserStat.stat_date, DailyUserStat.new_users
+            ).filter(DailyUserStat.stat_date >= start).all()
+            new_users_by_day = {_as_date(d): n for d, n in user_rows}
+            
+            daily = {}
+            for stat_date, bookings, revenue, seats_sold, capacity in series_rows:
+                daily[_as_date(stat_date)] = {
+                    'bookings': int(bookings or 0),
+                    'revenue': float(revenue or 0),
+                    'seats_sold': int(seats_sold or 0),
+                    'seats_capacity': int(capacity or 0)
+                }
+            
+            series = []
+            for offset in range(days):
+                day = start + timedelta(days=offset)
+                entry = daily.get(day, {'bookings': 0, 'revenue': 0.0, 'seats_sold': 0, 'seats_capacity': 0})
+                entry['date'] = day.isoformat()
+                entry['new_users'] = new_users_by_day.get(day, 0)
+                entry['occupancy'] = _ratio(entry['seats_sold'], entry['seats_capacity'])
+                series.append(entry)
+            
+            today_stats = series[-1]
+            yesterday_stats = series[-2]
+            
+            # All-time totals (summed over rollups, never over bookings/payments)
+            total_bookings, total_revenue = db.session.query(
+                func.coalesce(func.sum(DailySalesStat.bookings_count), 0),
+                func.coalesce(func.sum(DailySalesStat.revenue), 0)
+            ).one()
+            total_users = db.session.query(
+                func.coalesce(func.sum(DailyUserStat.new_users), 0)
+            ).scalar()
+            total_movies, showing_movies = db.session.query(
+                func.count(Movie.movie_id),
+                func.coalesce(func.sum(cast(Movie.is_showing, db.Integer)), 0)
+            ).one()
+            
+            return {
+                'success': True,
+                'data': {
+                    'total_users': int(total_users),
+                    'total_movies': int(total_movies),
+                    'showing_movies': int(showing_movies),
+                    'total_bookings': int(total_bookings),
+                    'total_revenue': float(total_revenue),
+                    'bookings_today': today_stats['bookings'],
+                    'revenue_today': today_stats['revenue'],
+                    'new_users_today': today_stats['new_users'],
+                    'occupancy_today': today_stats['occupancy'],
+                    'changes': {
+                        'bookings': _percent_change(today_stats['bookings'], yesterday_stats['bookings']),
+                        'revenue': _percent_change(today_stats['revenue'], yesterday_stats['revenue']),
+                        'new_users': _percent_change(today_stats['new_users'], yesterday_stats['new_users']),
+                        'occupancy': _percent_change(today_stats['occupancy'], yesterday_stats['occupancy'])
+                    },
+                    'daily': series,
+                    'top_movies': DashboardService._top_by_revenue(
+                        DailySalesStat.movie_id, Movie, Movie.movie_id, Movie.title, start, top
+                    ),
+                    'top_cinemas': DashboardService._top_by_revenue(
+                        DailySalesStat.cinema_id, Cinema, Cinema.cinema_id, Cinema.name, start, top
+                    )
+                }
+            }
+        except SQLAlchemyError as e:
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+    
+    @staticmethod
+    def _top_by_revenue(group_column, model, model_id, model_name, start, limit):
+        """Top entities by revenue since start, from the rollup table"""
+        rows = db.session.query(
+            group_column,
+            model_name,
+            func.sum(DailySalesStat.bookings_count),
+            func.sum(DailySalesStat.revenue),
+            func.sum(DailySalesStat.seats_sold),
+            func.sum(DailySalesStat.seats_capacity)
+        ).outerjoin(
+            model, model_id == group_column
+        ).filter(
+            DailySalesStat.stat_date >= start
+        ).group_by(
+            group_column, model_name
+        ).order_by(
+            func.sum(DailySalesStat.revenue).desc()
+        ).limit(limit).all()
+        
+        return [{
+            'id': entity_id,
+            'name': name,
+            'bookings': int(bookings or 0),
+            'revenue': float(revenue or 0),
+            'occupancy': _ratio(int(seats_sold or 0), int(capacity or 0))
+        } for entity_id, name, bookings, revenue, seats_sold, capacity in rows]
+    
+    @staticmethod
+    def rebuild_rollups(start_date=None, end_date=None):
+        """
+        Recompute the rollup tables from the base tables (backfill / repair)
+        
+        Each metric is computed with one grouped query over its own date
+        column, so the job reads every base row in the range exactly once.
+        
+        Args:
+            start_date (date): First day to rebuild (None = from the beginning)
+            end_date (date): Last day to rebuild (None = up to now)
+        
+        Returns:
+            dict: Number of rollup rows written
+        """
+        try:
+            sales = {}
+            
+            def add(rows, metrics):
+                for row in rows:
+                    key = (_as_date(row[0]), row[1], row[2])
+                    entry = sales.setdefault(key, dict.fromkeys(SALES_METRICS, 0))
+                    for metric, value in zip(metrics, row[3:]):
+                        entry[metric] += value or 0
+            
+            not_cancelled = lambda status: or_(status.is_(None), status != CANCELLED_STATUS)
+            
+            # Bookings by booking date
+            booking_day = func.date(Booking.created_at)
+            add(_in_range(
+                db.session.query(booking_day, Screen.cinema_id, Showtime.movie_id, func.count(Booking.booking_id))
+                .join(Showtime, Booking.showtime_id == Showtime.showtime_id)
+                .join(Screen, Showtime.screen_id == Screen.screen_id)
+                .filter(not_cancelled(Booking.status)),
+                Booking.created_at, start_date, end_date
+            ).group_by(booking_day, Screen.cinema_id, Showtime.movie_id), ('bookings_count',))
+            
+            # Seats sold by show date
+            show_day = func.date(Showtime.show_datetime)
+            add(_in_range(
+                db.session.query(show_day, Screen.cinema_id, Showtime.movie_id, func.count(BookingSeat.booking_seat_id))
+                .join(Booking, BookingSeat.booking_id == Booking.booking_id)
+                .join(Showtime, Booking.showtime_id == Showtime.showtime_id)
+                .join(Screen, Showtime.screen_id == Screen.screen_id)
+                .filter(not_cancelled(Booking.status)),
+                Showtime.show_datetime, start_date, end_date
+            ).group_by(show_day, Screen.cinema_id, Showtime.movie_id), ('seats_sold',))
+            
+            # Revenue by payment date
+            paid_at = func.coalesce(Payment.payment_datetime, Payment.created_at)
+            payment_day = func.date(paid_at)
+            add(_in_range(
+                db.session.query(payment_day, Screen.cinema_id, Showtime.movie_id, func.sum(Payment.amount))
+                .join(Booking, Payment.booking_id == Booking.booking_id)
+                .join(Showtime, Booking.showtime_id == Showtime.showtime_id)
+                .join(Screen, Showtime.screen_id == Screen.screen_id)
+                .filter(Payment.payment_status == PAID_PAYMENT_STATUS),
+                paid_at, start_date, end_date
+            ).group_by(payment_day, Screen.cinema_id, Showtime.movie_id), ('revenue',))
+            
+            # Showtimes and capacity by show date
+            add(_in_range(
+                db.session.query(show_day, Screen.cinema_id, Showtime.movie_id,
+                                 func.count(Showtime.showtime_id), func.sum(Screen.total_seats))
+                .join(Screen, Showtime.screen_id == Screen.screen_id)
+                .filter(not_cancelled(Showtime.status)),
+                Showtime.show_datetime, start_date, end_date
+            ).group_by(show_day, Screen.cinema_id, Showtime.movie_id), ('showtimes_count', 'seats_capacity'))
+            
+            # New users by registration date
+            user_day = func.date(User.created_at)
+            user_rows = _in_range(
+                db.session.query(user_day, func.count(User.user_id)),
+                User.created_at, start_date, end_date
+            ).group_by(user_day).all()
+            
+            # Replace the rollup rows in the range
+            for model in (DailySalesStat, DailyUserStat):
+                query = model.query
+                if start_date:
+                    query = query.filter(model.stat_date >= start_date)
+                if end_date:
+                    query = query.filter(model.stat_date <= end_date)
+                query.delete(synchronize_session=False)
+            
+            now = datetime.utcnow()
+            sales_rows = [
+                dict(zip(SALES_KEY, key), updated_at=now, **metrics)
+                for key, metrics in sales.items()
+                if (not start_date or key[0] >= start_date) and (not end_date or key[0] <= end_date)
+            ]
+            user_stat_rows = [
+                {'stat_date': _as_date(day), 'new_users': count, 'updated_at': now}
+                for day, count in user_rows
+            ]
+            
+            if sales_rows:
+                db.session.execute(insert(DailySalesStat.__table__), sales_rows)
+            if user_stat_rows:
+                db.session.execute(insert(DailyUserStat.__table__), user_stat_rows)
+            
+            db.session.commit()
+            
+            return {
+                'success': True,
+                'data': {'sales_rows': len(sales_rows), 'user_rows': len(user_stat_rows)},
+                'message': 'Dashboard rollups rebuilt successfully'
+            }
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Database error: {str(e)}'}
+
+
+# ==================== HELPERS ====================
+
+def _as_date(value):
+    """func.date() returns a string on SQLite and a date on MySQL"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def _percent_change(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) * 100.0 / previous, 1)
+
+
+def _in_range(query, column, start_date, end_date):
+    """Filter a datetime column by day range without wrapping it in a function"""
+    if start_date:
+        query = query.filter(column >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.filter(column < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+# ==================== INCREMENTAL ROLLUPS ====================
+#
+# Each tracked model has a contribution function that maps a row's values to
+# the rollup deltas it is responsible for. Inserts add the contribution,
+# deletes subtract it, and updates of a tracked attribute subtract the old
+# contribution and add the new one.
+
+def _lookup(connection, session, key, statement):
+    """Cache small context lookups for the duration of one flush"""
+    cache = session.info.setdefault(CACHE_KEY, {})
+    if key not in cache:
+        cache[key] = connection.execute(statement).first()
+    return cache[key]
+
+
+def _screen_context(connection, session, screen_id):
+    return _lookup(connection, session, ('screen', screen_id), select(
+        Screen.cinema_id, Screen.total_seats
+    ).where(Screen.screen_id == screen_id))
+
+
+def _showtime_context(connection, session, showtime_id):
+    return _lookup(connection, session, ('showtime', showtime_id), select(
+        Screen.cinema_id, Showtime.movie_id, Showtime.show_datetime
+    ).join(Screen, Showtime.screen_id == Screen.screen_id).where(Showtime.showtime_id == showtime_id))
+
+
+def _booking_context(connection, session, booking_id):
+    return _lookup(connection, session, ('booking', booking_id), select(
+        Booking.status, Screen.cinema_id, Showtime.movie_id, Showtime.show_datetime
+    ).join(Showtime, Booking.showtime_id == Showtime.showtime_id)
+     .join(Screen, Showtime.screen_id == Screen.screen_id)
+     .where(Booking.booking_id == booking_id))
+
+
+def _sold_seats(connection, booking_filter):
+    return connection.execute(
+        select(func.count(BookingSeat.booking_seat_id))
+        .join(Booking, BookingSeat.booking_id == Booking.booking_id)
+        .where(booking_filter)
+    ).scalar() or 0
+
+
+def _booking_contribution(connection, session, values, operation):
+    if values['status'] == CANCELLED_STATUS:
+        return []
+    context = _showtime_context(connection, session, values['showtime_id'])
+    if not context:
+        return []
+    cinema_id, movie_id, show_datetime = context
+    
+    # Seats are inserted after the booking, so a new booking has none yet
+    seats = 0 if operation == 'insert' else \
+        _sold_seats(connection, Booking.booking_id == values['booking_id'])
+    
+    created = values['created_at'] or datetime.utcnow()
+    return [
+        (DailySalesStat, (created.date(), cinema_id, movie_id), {'bookings_count': 1}),
+        (DailySalesStat, (show_datetime.date(), cinema_id, movie_id), {'seats_sold': seats})
+    ]
+
+
+def _booking_seat_contribution(connection, session, values, operation):
+    context = _booking_context(connection, session, values['booking_id'])
+    if not context or context[0] == CANCELLED_STATUS:
+        return []
+    _, cinema_id, movie_id, show_datetime = context
+    return [(DailySalesStat, (show_datetime.date(), cinema_id, movie_id), {'seats_sold': 1})]
+
+
+def _payment_contribution(connection, session, values, operation):
+    if values['payment_status'] != PAID_PAYMENT_STATUS:
+        return []
+    context = _booking_context(connection, session, values['booking_id'])
+    if not context:
+        return []
+    _, cinema_id, movie_id, _ = context
+    paid_at = values['payment_datetime'] or values['created_at'] or datetime.utcnow()
+    return [(DailySalesStat, (paid_at.date(), cinema_id, movie_id), {'revenue': Decimal(values['amount'] or 0)})]
+
+
+def _showtime_contribution(connection, session, values, operation):
+    if values['status'] == CANCELLED_STATUS:
+        return []
+    context = _screen_context(connection, session, values['screen_id'])
+    if not context:
+        return []
+    cinema_id, total_seats = context
+    
+    # Sold seats follow the showtime when it is moved to another day/movie/screen
+    seats = 0 if operation == 'insert' else _sold_seats(connection, _and_not_cancelled(
+        Booking.showtime_id == values['showtime_id']
+    ))
+    
+    return [(DailySalesStat, (values['show_datetime'].date(), cinema_id, values['movie_id']), {
+        'showtimes_count': 1,
+        'seats_capacity': total_seats or 0,
+        'seats_sold': seats
+    })]
+
+
+def _user_contribution(connection, session, values, operation):
+    created = values['created_at'] or datetime.utcnow()
+    return [(DailyUserStat, (created.date(),), {'new_users': 1})]
+
+
+def _and_not_cancelled(criterion):
+    return criterion & or_(Booking.status.is_(None), Booking.status != CANCELLED_STATUS)
+
+
+# model -> (tracked attributes, contribution function)
+TRACKED_MODELS = {
+    Booking: (('booking_id', 'showtime_id', 'status', 'created_at'), _booking_contribution),
+    BookingSeat: (('booking_id',), _booking_seat_contribution),
+    Payment: (('booking_id', 'amount', 'payment_status', 'payment_datetime', 'created_at'), _payment_contribution),
+    Showtime: (('showtime_id', 'movie_id', 'screen_id', 'show_datetime', 'status'), _showtime_contribution),
+    User: (('created_at',), _user_contribution),
+}
+
+
+def _record(target, connection, values, operation, sign):
+    attrs, contribution = TRACKED_MODELS[type(target)]
+    session = object_session(target)
+    deltas = session.info.setdefault(DELTAS_KEY, {})
+    
+    for model, key, metrics in contribution(connection, session, values, operation):
+        entry = deltas.setdefault((model, key), {})
+        for metric, value in metrics.items():
+            entry[metric] = entry.get(metric, 0) + sign * value
+
+
+def _current_values(target, attrs):
+    return {attr: getattr(target, attr) for attr in attrs}
+
+
+def _after_insert(mapper, connection, target):
+    attrs = TRACKED_MODELS[type(target)][0]
+    _record(target, connection, _current_values(target, attrs), 'insert', 1)
+
+
+def _after_delete(mapper, connection, target):
+    attrs = TRACKED_MODELS[type(target)][0]
+    _record(target, connection, _current_values(target, attrs), 'delete', -1)
+
+
+def _after_update(mapper, connection, target):
+    attrs = TRACKED_MODELS[type(target)][0]
+    state = inspect(target)
+    
+    old_values = {}
+    changed = False
+    for attr in attrs:
+        history = state.attrs[attr].history
+        current = getattr(target, attr)
+        old_values[attr] = history.deleted[0] if history.deleted else current
+        if _normalize(attr, old_values[attr]) != _normalize(attr, current):
+            changed = True
+    
+    if changed:
+        _record(target, connection, old_values, 'update', -1)
+        _record(target, connection, _current_values(target, attrs), 'update', 1)
+
+
+def _normalize(attr, value):
+    """Status changes only matter when they cross the cancelled/paid boundary"""
+    if attr == 'status':
+        return value == CANCELLED_STATUS
+    if attr == 'payment_status':
+        return value == PAID_PAYMENT_STATUS
+    return value
+
+
+def _upsert(connection, model, key, metrics):
+    """Add metric deltas to one rollup row, creating it if needed"""
+    table = model.__table__
+    key_columns = SALES_KEY if model is DailySalesStat else USER_KEY
+    now = datetime.utcnow()
+    values = dict(zip(key_columns, key), updated_at=now, **metrics)
+    increments = {metric: table.c[metric] + value for metric, value in metrics.items()}
+    increments['updated_at'] = now
+    
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        connection.execute(mysql_insert(table).values(**values).on_duplicate_key_update(**increments))
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        connection.execute(dialect_insert(table).values(**values).on_conflict_do_update(
+            index_elements=list(key_columns), set_=increments
+        ))
+    else:
+        where = [table.c[column] == value for column, value in zip(key_columns, key)]
+        result = connection.execute(update(table).where(*where).values(**increments))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**values))
+
+
+def _after_flush(session, flush_context):
+    session.info.pop(CACHE_KEY, None)
+    deltas = session.info.pop(DELTAS_KEY, None)
+    if not deltas:
+        return
+    
+    connection = session.connection()
+    for (model, key), metrics in deltas.items():
+        metrics = {metric: value for metric, value in metrics.items() if value}
+        if metrics:
+            _upsert(connection, model, key, metrics)
+
+
+def _clear_pending(session, *args):
+    session.info.pop(CACHE_KEY, None)
+    session.info.pop(DELTAS_KEY, None)
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    pass
+
+
+def init_dashboard_rollups(app):
+    """
+    Register the incremental rollup listeners and the backfill CLI command
+    
+    Args:
+        app: Flask application instance
+    """
+    for model, (attrs, _) in TRACKED_MODELS.items():
+        event.listen(model, 'after_insert', _after_insert)
+        event.listen(model, 'after_update', _after_update)
+        event.listen(model, 'after_delete', _after_delete)
+        
+        # Load the previous value on assignment so updates can undo it,
+        # even when the object was expired by a commit
+        for attr in attrs:
+            event.listen(getattr(model, attr), 'set', _noop_set, active_history=True)
+    
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'after_soft_rollback', _clear_pending)
+    
+    @app.cli.group('rollups')
+    def rollups_cli():
+        """Dashboard rollup maintenance"""
+    
+    @rollups_cli.command('rebuild')
+    @click.option('--from', 'start', default=None, help='First day to rebuild (YYYY-MM-DD)')
+    @click.option('--to', 'end', default=None, help='Last day to rebuild (YYYY-MM-DD)')
+    def rebuild_command(start, end):
+        """Recompute dashboard rollups from bookings, payments, showtimes and users"""
+        result = DashboardService.rebuild_rollups(
+            start_date=date.fromisoformat(start) if start else None,
+            end_date=date.fromisoformat(end) if end else None
+        )
+        click.echo(result.get('message'))
+        if result['success']:
+            click.echo(f"  sales rows: {result['data']['sales_rows']}, user rows: {result['data']['user_rows']}")
@@ -2,21 +2,24 @@
 Movie Management Service
 Handles business logic for movies CRUD operations including actors, images, and videos
 """
-from database.db import db
+from database.db import db, read_only
 from models.movie import Movie
 from models.actor import Actor, MovieActor
 from models.movie_image import MovieImage
 from models.movie_video import MovieVideo
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import desc, or_
+from sqlalchemy import desc, or_, insert, update, delete
+from services.media.deletion_queue import deletion_queue
+from services.media.image_derivatives import image_pipeline
+from services.media.video_metadata import video_pipeline
 from datetime import datetime
-import os
 
 
 class MoviesService:
     """Service class for movie management operations"""
     
     @staticmethod
+    @read_only
     def get_all_movies(page=1, per_page=10, is_showing=None, search=None):
         """
         Get all movies with pagination and filters
@@ -65,6 +68,13 @@ class MoviesService:
                 if not poster_image:
                     poster_image = movie.images.first()
                 movie_dict['poster_url'] = poster_image.image_url if poster_image else None
+                # The list only shows the thumb: not the full variants manifest (hero/card, inline placeholder)
+                variants = poster_image.variants if poster_image else None
+                movie_dict['poster_thumb'] = (variants.get('sizes') or {}).get('thumb') if variants else None
+                # Known size + BlurHash: clients reserve the box and paint a placeholder before loading
+                movie_dict['poster_width'] = poster_image.width if poster_image else None
+                movie_dict['poster_height'] = poster_image.height if poster_image else None
+                movie_dict['poster_blurhash'] = poster_image.blurhash if poster_image else None
                 
                 movies.append(movie_dict)
             
@@ -84,6 +94,7 @@ class MoviesService:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
     @staticmethod
+    @read_only
     def get_movie_by_id(movie_id):
         """
         Get movie details by ID with actors, images, and videos
@@ -178,7 +189,8 @@ class MoviesService:
                         image_url=image_data['image_url'],
                         image_type=image_data.get('image_type', 'POSTER'),
                         caption=image_data.get('caption'),
-                        display_order=image_data.get('display_order', 0)
+                        display_order=image_data.get('display_order', 0),
+                        **image_pipeline.metadata_for(image_data['image_url'])
                     )
                     db.session.add(movie_image)
             
@@ -187,11 +199,7 @@ class MoviesService:
                 for video_data in data['videos']:
                     movie_video = MovieVideo(
                         movie_id=movie.movie_id,
-                        video_url=video_data['video_url'],
-                        video_type=video_data.get('video_type', 'TRAILER'),
-                        title=video_data.get('title'),
-                        duration_seconds=video_data.get('duration_seconds'),
-                        display_order=video_data.get('display_order', 0)
+                        **MoviesService._video_columns(video_data)
                     )
                     db.session.add(movie_video)
             
@@ -248,72 +256,46 @@ class MoviesService:
             
             movie.updated_at = datetime.utcnow()
             
-            # Update actors (delete old, add new)
+            # Sync actors (keyed by actor_id)
             if 'actors' in data:
-                # Delete existing actors
-                MovieActor.query.filter_by(movie_id=movie_id).delete()
-                
-                # Add new actors
-                for actor_data in data['actors']:
-                    movie_actor = MovieActor(
-                        movie_id=movie_id,
-                        actor_id=actor_data['actor_id'],
-                        role_name=actor_data.get('role_name'),
-                        character_name=actor_data.get('character_name'),
-                        display_order=actor_data.get('display_order', 0)
-                    )
-                    db.session.add(movie_actor)
+                MoviesService._sync_children(
+                    MovieActor, MovieActor.movie_actor_id, 'actor_id', movie_id,
+                    [{
+                        'actor_id': actor_data['actor_id'],
+                        'role_name': actor_data.get('role_name'),
+                        'character_name': actor_data.get('character_name'),
+                        'display_order': actor_data.get('display_order', 0)
+                    } for actor_data in data['actors']],
+                    unique=True
+                )
             
-            # Update images (delete old, add new)
+            # Sync images (keyed by image_url)
             if 'images' in data:
-                # Get old images to delete files
-                old_images = MovieImage.query.filter_by(movie_id=movie_id).all()
-                new_image_urls = [img['image_url'] for img in data['images']]
+                removed_urls = MoviesService._sync_children(
+                    MovieImage, MovieImage.image_id, 'image_url', movie_id,
+                    [{
+                        'image_url': image_data['image_url'],
+                        'image_type': image_data.get('image_type', 'POSTER'),
+                        'caption': image_data.get('caption'),
+                        'display_order': image_data.get('display_order', 0),
+                        **image_pipeline.metadata_for(image_data['image_url'])
+                    } for image_data in data['images']]
+                )
                 
                 # Delete files for removed images
-                for old_image in old_images:
-                    if old_image.image_url not in new_image_urls:
-                        MoviesService._delete_uploaded_file(old_image.image_url)
-                
-                # Delete all old image records
-                MovieImage.query.filter_by(movie_id=movie_id).delete()
-                
-                # Add new images
-                for image_data in data['images']:
-                    movie_image = MovieImage(
-                        movie_id=movie_id,
-                        image_url=image_data['image_url'],
-                        image_type=image_data.get('image_type', 'POSTER'),
-                        caption=image_data.get('caption'),
-                        display_order=image_data.get('display_order', 0)
-                    )
-                    db.session.add(movie_image)
+                for image_url in removed_urls:
+                    MoviesService._delete_uploaded_file(image_url)
             
-            # Update videos (delete old, add new)
+            # Sync videos (keyed by video_url)
             if 'videos' in data:
-                # Get old videos to delete files
-                old_videos = MovieVideo.query.filter_by(movie_id=movie_id).all()
-                new_video_urls = [vid['video_url'] for vid in data['videos']]
+                removed_urls = MoviesService._sync_children(
+                    MovieVideo, MovieVideo.video_id, 'video_url', movie_id,
+                    [MoviesService._video_columns(video_data) for video_data in data['videos']]
+                )
                 
                 # Delete files for removed videos
-                for old_video in old_videos:
-                    if old_video.video_url not in new_video_urls:
-                        MoviesService._delete_uploaded_file(old_video.video_url)
-                
-                # Delete all old video records
-                MovieVideo.query.filter_by(movie_id=movie_id).delete()
-                
-                # Add new videos
-                for video_data in data['videos']:
-                    movie_video = MovieVideo(
-                        movie_id=movie_id,
-                        video_url=video_data['video_url'],
-                        video_type=video_data.get('video_type', 'TRAILER'),
-                        title=video_data.get('title'),
-                        duration_seconds=video_data.get('duration_seconds'),
-                        display_order=video_data.get('display_order', 0)
-                    )
-                    db.session.add(movie_video)
+                for video_url in removed_urls:
+                    MoviesService._delete_uploaded_file(video_url)
             
             db.session.commit()
             
@@ -361,6 +343,7 @@ class MoviesService:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
     @staticmethod
+    @read_only
     def get_all_actors(search=None):
         """
         Get all actors for selection
@@ -385,26 +368,105 @@ class MoviesService:
         except SQLAlchemyError as e:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
+    @staticmethod
+    def _sync_children(model, pk_column, key_field, movie_id, items, unique=False):
+        """
+        Diff-sync child rows of a movie against the submitted list
+        
+        Existing rows are fetched once and matched to the submitted items by
+        key_field. Unchanged rows are left alone; changed rows, new items and
+        removed rows are applied as one bulk UPDATE, INSERT and DELETE.
+        
+        Args:
+            model: Child model class (MovieActor, MovieImage, MovieVideo)
+            pk_column: Primary key column of the child model
+            key_field (str): Column used to match submitted items to rows
+            movie_id (int): Parent movie ID
+            items (list): Submitted rows as dicts of column values
+            unique (bool): Keep only the first item per key (unique constraint)
+            
+        Returns:
+            list: Key values no longer used by any row (deduplicated)
+        """
+        fields = list(items[0].keys()) if items else [key_field]
+        columns = [getattr(model, field) for field in fields]
+        
+        # One fetch of the current children, grouped by key
+        existing = {}
+        for row in db.session.query(pk_column, *columns).filter(model.movie_id == movie_id):
+            existing.setdefault(getattr(row, key_field), []).append(row)
+        
+        to_insert = []
+        to_update = []
+        seen_keys = set()
+        for item in items:
+            key = item[key_field]
+            if unique and key in seen_keys:
+                continue
+            seen_keys.add(key)
+            
+            matches = existing.get(key)
+            if not matches:
+                to_insert.append(dict(item, movie_id=movie_id))
+                continue
+            
+            row = matches.pop(0)
+            if any(getattr(row, field) != item[field] for field in fields):
+                to_update.append(dict(item, **{pk_column.key: row[0]}))
+        
+        # Whatever was not matched has been removed
+        removed = [row for rows in existing.values() for row in rows]
+        
+        # Delete first so re-added keys don't hit unique constraints
+        if removed:
+            db.session.execute(
+                delete(model).where(pk_column.in_([row[0] for row in removed])),
+                execution_options={'synchronize_session': False}
+            )
+        if to_update:
+            db.session.execute(update(model), to_update)
+        if to_insert:
+            db.session.execute(insert(model), to_insert)
+        
+        # A duplicate row of a kept key is deleted, but its key is still in use
+        return list(dict.fromkeys(
+            getattr(row, key_field) for row in removed if getattr(row, key_field) not in seen_keys
+        ))
+    
+    @staticmethod
+    def _video_columns(video_data):
+        """
+        Column values for a submitted video
+        
+        Duration, resolution and bitrate of uploaded files are read from the
+        container headers; the submitted duration is only a fallback.
+        """
+        metadata = video_pipeline.metadata_for(video_data['video_url'])
+        # Faststart copy and poster frame once the row is committed
+        video_pipeline.submit_after_commit(video_data['video_url'])
+        return {
+            'video_url': video_data['video_url'],
+            'video_type': video_data.get('video_type', 'TRAILER'),
+            'title': video_data.get('title'),
+            'duration_seconds': metadata['duration_seconds'] or video_data.get('duration_seconds'),
+            'display_order': video_data.get('display_order', 0),
+            'width': metadata['width'],
+            'height': metadata['height'],
+            'bitrate': metadata['bitrate'],
+            'poster_url': metadata['poster_url']
+        }
+    
     @staticmethod
     def _delete_uploaded_file(file_url):
         """
-        Delete uploaded file from filesystem
+        Schedule an uploaded file for deletion once the current transaction commits
+        
+        The file is removed by the background deletion worker, so a rollback
+        keeps the file and slow disks don't stall the request.
         
         Args:
             file_url (str): File URL (e.g., /uploads/images/filename.jpg)
         """
-        try:
-            # Only delete files from uploads folder (not external URLs)
-            if file_url and file_url.startswith('/uploads/'):
-                # Get the file path relative to backend folder
-                file_path = os.path.join('uploads', file_url.split('/uploads/')[-1])
-                
-                # Check if file exists and delete it
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    print(f"Deleted file: {file_path}")
-                else:
-                    print(f"File not found: {file_path}")
-        except Exception as e:
-            # Log error but don't fail the operation
-            print(f"Error deleting file {file_url}: {str(e)}")
+        for derivative_url in image_pipeline.derivative_urls(file_url) + video_pipeline.derivative_urls(file_url):
+            deletion_queue.enqueue_after_commit(derivative_url)
+        deletion_queue.enqueue_after_commit(file_url)
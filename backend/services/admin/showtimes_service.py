@@ -2,18 +2,20 @@
 Showtimes service for admin operations
 Handles business logic for showtime management
 """
-from database.db import db
+from database.db import db, read_only
 from models.showtime import Showtime
 from models.movie import Movie, Cinema, Screen
+from services.admin.cinemas_service import cinema_detail_cache, cinema_tag
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, func
-from datetime import datetime, date, time
+from sqlalchemy import and_
+from datetime import datetime, date, time, timedelta
 
 
 class ShowtimesService:
     """Service class for managing showtimes"""
     
     @staticmethod
+    @read_only
     def get_all_showtimes(movie_id=None, cinema_id=None, show_date=None):
         """Get all showtimes with optional filters"""
         try:
@@ -41,7 +43,12 @@ class ShowtimesService:
                 # Parse date if string
                 if isinstance(show_date, str):
                     show_date = datetime.strptime(show_date, '%Y-%m-%d').date()
-                query = query.filter(func.date(Showtime.show_datetime) == show_date)
+                # Range on the raw column (not DATE(show_datetime)) so the index can be used
+                day_start = datetime.combine(show_date, datetime.min.time())
+                query = query.filter(
+                    Showtime.show_datetime >= day_start,
+                    Showtime.show_datetime < day_start + timedelta(days=1)
+                )
             
             # Order by datetime descending
             query = query.order_by(Showtime.show_datetime.desc())
@@ -74,6 +81,7 @@ class ShowtimesService:
             raise Exception(f"Database error: {str(e)}")
     
     @staticmethod
+    @read_only
     def get_showtime_by_id(showtime_id):
         """Get showtime details by ID"""
         try:
@@ -166,6 +174,7 @@ class ShowtimesService:
             
             db.session.add(showtime)
             db.session.commit()
+            cinema_detail_cache.invalidate_tag(cinema_tag(screen.cinema_id))
             
             return ShowtimesService.get_showtime_by_id(showtime.showtime_id)
         except ValueError as e:
@@ -184,6 +193,9 @@ class ShowtimesService:
             if not showtime:
                 return None
             
+            # Cinemas whose detail view shows this showtime (before and after a screen move)
+            affected_screens = {showtime.screen_id}
+            
             # Update fields if provided
             if 'movie_id' in data:
                 movie = Movie.query.get(data['movie_id'])
@@ -196,6 +208,7 @@ class ShowtimesService:
                 if not screen:
                     raise ValueError("Screen not found")
                 showtime.screen_id = data['screen_id']
+                affected_screens.add(screen.screen_id)
             
             if 'show_datetime' in data:
                 show_datetime = data['show_datetime']
@@ -210,6 +223,7 @@ class ShowtimesService:
                 showtime.status = data['status']
             
             db.session.commit()
+            ShowtimesService._invalidate_cinema_details(affected_screens)
             
             return ShowtimesService.get_showtime_by_id(showtime_id)
         except ValueError as e:
@@ -232,8 +246,10 @@ class ShowtimesService:
             if showtime.bookings.count() > 0:
                 raise ValueError("Cannot delete showtime with existing bookings")
             
+            screen_id = showtime.screen_id
             db.session.delete(showtime)
             db.session.commit()
+            ShowtimesService._invalidate_cinema_details([screen_id])
             
             return True
         except ValueError as e:
@@ -243,6 +259,14 @@ class ShowtimesService:
             db.session.rollback()
             raise Exception(f"Database error: {str(e)}")
     
+    @staticmethod
+    def _invalidate_cinema_details(screen_ids):
+        """Drop cached cinema detail views for the cinemas owning these screens"""
+        cinema_ids = db.session.query(Screen.cinema_id).filter(
+            Screen.screen_id.in_(screen_ids)
+        ).distinct().all()
+        cinema_detail_cache.invalidate_tag(*[cinema_tag(cinema_id) for cinema_id, in cinema_ids])
+    
     @staticmethod
     def get_available_screens_for_datetime(cinema_id, show_datetime, duration_minutes):
         """Get screens available at a specific datetime considering movie duration"""
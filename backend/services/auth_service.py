@@ -5,11 +5,20 @@ Xử lý logic nghiệp vụ cho authentication
 
 from models.user import User
 from database.db import db
+from utils.cache import TaggedCache
+from utils.password_hasher import PasswordHasherBusy
+from config import Config
 from flask_jwt_extended import create_access_token, create_refresh_token
 from datetime import datetime
 import re
 
 
+# Role/trạng thái của user theo user_id, dùng cho phân quyền mà không query DB mỗi request.
+# Cache nằm trong từng worker: thay đổi ở worker này có hiệu lực ngay (invalidate_user_status),
+# các worker khác chậm tối đa AUTH_STATUS_CACHE_TTL giây
+user_status_cache = TaggedCache(ttl=Config.AUTH_STATUS_CACHE_TTL, max_entries=4096)
+
+
 class AuthService:
     """Service class cho authentication"""
     
@@ -85,6 +94,10 @@ class AuthService:
             
             return True, "Đăng ký thành công", new_user
             
+        except PasswordHasherBusy:
+            # Route trả 503 + Retry-After như login
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             return False, f"Lỗi: {str(e)}", None
@@ -116,9 +129,20 @@ class AuthService:
             if not user.check_password(password):
                 return False, "Email hoặc mật khẩu không đúng", None, None
             
-            # Tạo tokens (identity phải là string)
-            access_token = create_access_token(identity=str(user.user_id))
-            refresh_token = create_refresh_token(identity=str(user.user_id))
+            # Cost bcrypt đã đổi: băm lại mật khẩu (lỗi ở đây không chặn đăng nhập)
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"⚠️  Password rehash failed for user {user.user_id}: {e}")
+            
+            # Tạo tokens (identity phải là string), kèm role/trạng thái để phân quyền không cần query DB
+            claims = AuthService.status_claims(user)
+            access_token = create_access_token(identity=str(user.user_id), additional_claims=claims)
+            refresh_token = create_refresh_token(identity=str(user.user_id), additional_claims=claims)
+            user_status_cache.set(user.user_id, {'role': user.role, 'is_active': bool(user.is_active)})
             
             tokens = {
                 'access_token': access_token,
@@ -127,6 +151,8 @@ class AuthService:
             
             return True, "Đăng nhập thành công", tokens, user
             
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             return False, f"Lỗi: {str(e)}", None, None
     
@@ -145,4 +171,46 @@ class AuthService:
             return User.query.get(user_id)
         except Exception:
             return None
+    
+    @staticmethod
+    def status_claims(user):
+        """
+        Claims role/trạng thái nhúng vào JWT
+        
+        Args:
+            user: User object
+            
+        Returns:
+            dict: {'role': ..., 'active': ...}
+        """
+        return {'role': user.role, 'active': bool(user.is_active)}
+    
+    @staticmethod
+    def get_user_status(user_id):
+        """
+        Lấy role và trạng thái active của user (có cache)
+        
+        Args:
+            user_id: ID của user
+            
+        Returns:
+            dict: {'role': str, 'is_active': bool} hoặc None nếu user không tồn tại
+        """
+        status = user_status_cache.get(user_id)
+        if status is not None:
+            return status
+        
+        row = db.session.query(User.role, User.is_active).filter(User.user_id == user_id).first()
+        if row is None:
+            return None
+        
+        status = {'role': row.role, 'is_active': bool(row.is_active)}
+        user_status_cache.set(user_id, status)
+        return status
+    
+    @staticmethod
+    def invalidate_user_status(*user_ids):
+        """Xóa cache role/trạng thái sau khi tài khoản bị đổi role, khóa hoặc xóa"""
+        for user_id in user_ids:
+            user_status_cache.delete(int(user_id))
 
@@ -0,0 +1,4 @@
+"""
+Media services package
+Background processing and storage helpers for uploaded images and videos
+"""
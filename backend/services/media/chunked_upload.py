@@ -0,0 +1,382 @@
+"""
+Chunked Upload Service
+Resumable uploads for large files (trailers) in fixed-size chunks
+
+Protocol:
+1. initiate_upload  -> upload_id, chunk_size, total_chunks
+2. upload_chunk(N)  -> raw bytes of chunk N, optionally with its SHA-256
+3. get_upload_status -> received / missing chunks (resume after disconnect)
+4. complete_upload  -> atomic rename into the content-addressed store
+
+Each session lives in <UPLOAD_FOLDER>/.incoming/<upload_id>/:
+- manifest.json  (written once at initiate)
+- data.part      (preallocated to the final size, chunks written with pwrite)
+- chunks/<N>     (marker holding the chunk's SHA-256, written after the data is synced)
+Chunks may arrive in any order and concurrently; no file is shared for writing
+except data.part, where every chunk owns its own byte range.
+"""
+from flask import current_app
+from services.media.content_store import content_store
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+
+INCOMING_DIR = '.incoming'
+READ_BLOCK_SIZE = 1024 * 1024
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ChunkedUploadService:
+    """Service class for resumable chunked uploads"""
+    
+    @staticmethod
+    def initiate_upload(original_filename, file_type, total_size, checksum=None, created_by=None):
+        """
+        Start an upload session and preallocate its temp file
+        
+        Args:
+            original_filename (str): Sanitized client filename (with extension)
+            file_type (str): 'images' or 'videos'
+            total_size (int): File size in bytes
+            checksum (str): Optional SHA-256 (hex) of the whole file, checked on complete
+            created_by (int): Admin user ID
+        
+        Returns:
+            dict: Session info (upload_id, chunk_size, total_chunks)
+        """
+        max_size = current_app.config.get('UPLOAD_MAX_FILE_SIZE')
+        if total_size <= 0:
+            return {'success': False, 'message': 'File size must be greater than 0'}
+        if max_size and total_size > max_size:
+            return {'success': False, 'message': f'File too large (max {max_size} bytes)'}
+        if checksum and not re.fullmatch(r'[0-9a-fA-F]{64}', checksum):
+            return {'success': False, 'message': 'Invalid checksum (expected SHA-256 hex)'}
+        
+        ChunkedUploadService.cleanup_expired_sessions()
+        
+        chunk_size = current_app.config.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+        upload_id = uuid.uuid4().hex
+        session_dir = _session_dir(upload_id)
+        manifest = {
+            'upload_id': upload_id,
+            'original_filename': original_filename,
+            'file_type': file_type,
+            'total_size': total_size,
+            'chunk_size': chunk_size,
+            'total_chunks': (total_size + chunk_size - 1) // chunk_size,
+            'checksum': checksum.lower() if checksum else None,
+            'created_by': created_by,
+            'created_at': time.time()
+        }
+        
+        try:
+            os.makedirs(os.path.join(session_dir, 'chunks'))
+            
+            fd = os.open(os.path.join(session_dir, 'data.part'), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+            try:
+                _preallocate(fd, total_size)
+            finally:
+                os.close(fd)
+            
+            _write_atomic(os.path.join(session_dir, 'manifest.json'), json.dumps(manifest))
+        except OSError as e:
+            shutil.rmtree(session_dir, ignore_errors=True)
+            return {'success': False, 'message': f'Could not create upload session: {str(e)}'}
+        
+        return {'success': True, 'data': _public_manifest(manifest, received=[])}
+    
+    @staticmethod
+    def upload_chunk(upload_id, index, stream, content_length, checksum=None):
+        """
+        Write one chunk at its offset in the temp file
+        
+        Args:
+            upload_id (str): Upload session ID
+            index (int): Chunk index (0-based)
+            stream: Readable request body stream
+            content_length (int): Declared body length
+            checksum (str): Optional SHA-256 (hex) of the chunk
+        
+        Returns:
+            dict: Chunk receipt with the number of received chunks
+        """
+        manifest = _load_manifest(upload_id)
+        if manifest is None:
+            return {'success': False, 'message': 'Upload session not found'}
+        
+        if index < 0 or index >= manifest['total_chunks']:
+            return {'success': False, 'message': 'Chunk index out of range'}
+        
+        offset = index * manifest['chunk_size']
+        expected = min(manifest['chunk_size'], manifest['total_size'] - offset)
+        if content_length != expected:
+            return {'success': False, 'message': f'Chunk {index} must be exactly {expected} bytes'}
+        
+        session_dir = _session_dir(upload_id)
+        marker_path = os.path.join(session_dir, 'chunks', str(index))
+        
+        # Re-sent chunk (client retried after losing our response): keep the stored data
+        try:
+            with open(marker_path, encoding='utf-8') as f:
+                stored_sha256 = f.read().strip()
+            if not checksum or checksum.lower() == stored_sha256:
+                return ChunkedUploadService._chunk_receipt(manifest, index, stored_sha256)
+        except FileNotFoundError:
+            pass
+        
+        digest = hashlib.sha256()
+        written = 0
+        
+        try:
+            fd = os.open(os.path.join(session_dir, 'data.part'), os.O_WRONLY)
+        except FileNotFoundError:
+            return {'success': False, 'message': 'Upload session not found'}
+        
+        try:
+            # Stream the body in bounded blocks straight to its byte range
+            while written < expected:
+                block = stream.read(min(READ_BLOCK_SIZE, expected - written))
+                if not block:
+                    break
+                digest.update(block)
+                view = memoryview(block)
+                while view:
+                    n = os.pwrite(fd, view, offset + written)
+                    written += n
+                    view = view[n:]
+            
+            if written != expected:
+                return {'success': False, 'message': f'Incomplete chunk {index}: received {written} of {expected} bytes'}
+            
+            chunk_sha256 = digest.hexdigest()
+            if checksum and checksum.lower() != chunk_sha256:
+                return {'success': False, 'message': f'Checksum mismatch for chunk {index}'}
+            
+            # Data must be durable before the marker says the chunk is there
+            _datasync(fd)
+        finally:
+            os.close(fd)
+        
+        try:
+            _write_atomic(marker_path, chunk_sha256)
+            os.utime(session_dir)  # Active sessions are not expired by cleanup
+        except FileNotFoundError:
+            return {'success': False, 'message': 'Upload session not found'}
+        
+        return ChunkedUploadService._chunk_receipt(manifest, index, chunk_sha256)
+    
+    @staticmethod
+    def _chunk_receipt(manifest, index, chunk_sha256):
+        return {
+            'success': True,
+            'data': {
+                'upload_id': manifest['upload_id'],
+                'index': index,
+                'sha256': chunk_sha256,
+                'received_count': len(_received_chunks(manifest['upload_id'])),
+                'total_chunks': manifest['total_chunks']
+            }
+        }
+    
+    @staticmethod
+    def get_upload_status(upload_id):
+        """
+        Get the received and missing chunks of a session (used to resume)
+        
+        Args:
+            upload_id (str): Upload session ID
+        
+        Returns:
+            dict: Session info with received/missing chunk indexes
+        """
+        manifest = _load_manifest(upload_id)
+        if manifest is None:
+            return {'success': False, 'message': 'Upload session not found'}
+        
+        return {'success': True, 'data': _public_manifest(manifest, _received_chunks(upload_id))}
+    
+    @staticmethod
+    def complete_upload(upload_id):
+        """
+        Verify all chunks arrived and move the file into the content store (atomic rename)
+        
+        Args:
+            upload_id (str): Upload session ID
+        
+        Returns:
+            dict: Stored file info (url, filename, original_filename, type, sha256)
+        """
+        manifest = _load_manifest(upload_id)
+        if manifest is None:
+            return {'success': False, 'message': 'Upload session not found'}
+        
+        received = set(_received_chunks(upload_id))
+        missing = [i for i in range(manifest['total_chunks']) if i not in received]
+        if missing:
+            return {
+                'success': False,
+                'message': f'{len(missing)} chunk(s) missing',
+                'data': {'missing': missing[:100]}
+            }
+        
+        session_dir = _session_dir(upload_id)
+        part_path = os.path.join(session_dir, 'data.part')
+        
+        try:
+            # One pass over the file: verifies the client checksum and gives the content address
+            sha256 = _file_sha256(part_path)
+            if manifest['checksum'] and sha256 != manifest['checksum']:
+                return {'success': False, 'message': 'File checksum mismatch'}
+            
+            file_type = manifest['file_type']
+            file_ext = manifest['original_filename'].rsplit('.', 1)[1].lower()
+            
+            # Same filesystem (both under UPLOAD_FOLDER), so this is an atomic rename
+            stored = content_store.store_file(part_path, file_ext, file_type, sha256=sha256)
+        except FileNotFoundError:
+            return {'success': False, 'message': 'Upload session not found'}
+        except OSError as e:
+            return {'success': False, 'message': f'Could not finalize upload: {str(e)}'}
+        
+        shutil.rmtree(session_dir, ignore_errors=True)
+        
+        return {
+            'success': True,
+            'data': {
+                'url': stored['url'],
+                'filename': stored['filename'],
+                'original_filename': manifest['original_filename'],
+                'type': file_type,
+                'size': stored['size'],
+                'sha256': stored['sha256'],
+                'deduplicated': stored['deduplicated']
+            }
+        }
+    
+    @staticmethod
+    def abort_upload(upload_id):
+        """
+        Discard an upload session and its temp file
+        
+        Args:
+            upload_id (str): Upload session ID
+        
+        Returns:
+            dict: Success status
+        """
+        if _load_manifest(upload_id) is None:
+            return {'success': False, 'message': 'Upload session not found'}
+        
+        shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+        return {'success': True, 'message': 'Upload cancelled'}
+    
+    @staticmethod
+    def cleanup_expired_sessions():
+        """
+        Remove sessions older than UPLOAD_SESSION_TTL
+        
+        Returns:
+            int: Number of removed sessions
+        """
+        ttl = current_app.config.get('UPLOAD_SESSION_TTL', 86400)
+        incoming = os.path.join(_upload_root(), INCOMING_DIR)
+        cutoff = time.time() - ttl
+        removed = 0
+        
+        try:
+            entries = list(os.scandir(incoming))
+        except FileNotFoundError:
+            return 0
+        
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        
+        if removed:
+            print(f"Removed {removed} expired upload session(s)")
+        return removed
+
+
+# ==================== HELPERS ====================
+
+def _upload_root():
+    return os.path.abspath(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def _session_dir(upload_id):
+    return os.path.join(_upload_root(), INCOMING_DIR, upload_id)
+
+
+def _load_manifest(upload_id):
+    """Read a session manifest, or None for unknown/malformed IDs"""
+    if not upload_id or not UPLOAD_ID_PATTERN.match(upload_id):
+        return None
+    try:
+        with open(os.path.join(_session_dir(upload_id), 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _received_chunks(upload_id):
+    try:
+        return sorted(int(name) for name in os.listdir(os.path.join(_session_dir(upload_id), 'chunks'))
+                      if name.isdigit())
+    except FileNotFoundError:
+        return []
+
+
+def _public_manifest(manifest, received):
+    received_set = set(received)
+    return {
+        'upload_id': manifest['upload_id'],
+        'original_filename': manifest['original_filename'],
+        'type': manifest['file_type'],
+        'total_size': manifest['total_size'],
+        'chunk_size': manifest['chunk_size'],
+        'total_chunks': manifest['total_chunks'],
+        'received': list(received),
+        'missing': [i for i in range(manifest['total_chunks']) if i not in received_set]
+    }
+
+
+def _preallocate(fd, size):
+    """Reserve disk space up front; fall back to a sparse file where fallocate is unsupported"""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
+def _datasync(fd):
+    if hasattr(os, 'fdatasync'):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def _write_atomic(path, content):
+    tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
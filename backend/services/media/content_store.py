@@ -0,0 +1,243 @@
+"""
+Content-Addressed Upload Store
+Uploads are stored by the SHA-256 of their bytes:
+
+    /uploads/<type>/<hash[:2]>/<hash>.<ext>     (type = images / videos)
+
+- The same file uploaded twice is stored once (same URL)
+- A stored URL never changes content, so it is served as immutable
+- A file is shared by every row that references its URL (MovieImage.image_url,
+  MovieVideo.video_url, Actor.photo_url). Its reference count is the number of
+  such rows, checked by the deletion worker right before unlinking, so a file
+  still used by another movie is kept.
+- A file (re)uploaded within the grace period (UPLOAD_GC_GRACE_HOURS) is kept
+  too: a dedup hit returns the URL of an existing file that may already be
+  queued for deletion, before the row that will use it is saved. If that row
+  is never saved, `flask uploads gc` collects the file after the same period.
+"""
+from database.db import db
+from sqlalchemy import or_, select, union
+import glob
+import hashlib
+import os
+import re
+import time
+import uuid
+
+
+READ_BLOCK_SIZE = 1024 * 1024
+CONTENT_PATH_PATTERN = re.compile(
+    r'^(images|videos)/[0-9a-f]{2}/(?:[0-9a-f]{64}\.\w+|derived/[0-9a-f]{64}(?:-\w+)?\.\w+)$'
+)
+
+
+class ContentStore:
+    """Stores uploads under their content hash and tracks who still uses them"""
+
+    def __init__(self):
+        self.app = None
+        self.upload_folder = None
+        self.grace_seconds = 86400
+
+    def init_app(self, app):
+        """
+        Configure the store and guard the deletion queue with reference checks
+
+        Args:
+            app: Flask application instance
+        """
+        from services.media.deletion_queue import deletion_queue
+
+        self.app = app
+        self.upload_folder = os.path.abspath(app.config.get('UPLOAD_FOLDER', 'uploads'))
+        self.grace_seconds = app.config.get('UPLOAD_GC_GRACE_HOURS', 24) * 3600
+        deletion_queue.guard = self.unreferenced_paths
+
+    # ==================== STORE ====================
+
+    def store_stream(self, stream, file_ext, file_type):
+        """
+        Stream an upload through SHA-256 into the store
+
+        Args:
+            stream: Readable binary stream
+            file_ext (str): Lower-case extension without the dot
+            file_type (str): 'images' or 'videos'
+
+        Returns:
+            dict: url, filename, sha256, size, deduplicated
+        """
+        tmp_path = self._tmp_path()
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                for block in iter(lambda: stream.read(READ_BLOCK_SIZE), b''):
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+            return self._commit(tmp_path, digest.hexdigest(), size, file_ext, file_type)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def store_file(self, path, file_ext, file_type, sha256=None):
+        """
+        Move an already written file (e.g. an assembled chunked upload) into the store
+
+        Args:
+            path (str): File inside the upload folder (it is renamed or removed)
+            file_ext (str): Lower-case extension without the dot
+            file_type (str): 'images' or 'videos'
+            sha256 (str): Known (verified) SHA-256 of the file, hashed here otherwise
+
+        Returns:
+            dict: url, filename, sha256, size, deduplicated
+        """
+        if sha256 is None:
+            sha256 = _file_sha256(path)
+
+        try:
+            return self._commit(path, sha256.lower(), os.path.getsize(path), file_ext, file_type)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _commit(self, tmp_path, sha256, size, file_ext, file_type):
+        """Rename the temp file to its content address, unless that content is already stored"""
+        relative = f'{file_type}/{sha256[:2]}/{sha256}.{file_ext}'
+        target = os.path.join(self._root(), relative)
+        deduplicated = os.path.exists(target)
+
+        if deduplicated:
+            # Fresh mtime: the grace period (deletion guard, orphan collector) covers the new reference
+            try:
+                os.utime(target)
+            except FileNotFoundError:
+                deduplicated = False  # Deleted since the check: store this copy
+
+        if not deduplicated:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+
+        return {
+            'url': f'/uploads/{relative}',
+            'filename': f'{sha256}.{file_ext}',
+            'sha256': sha256,
+            'size': size,
+            'deduplicated': deduplicated
+        }
+
+    def _tmp_path(self):
+        incoming = os.path.join(self._root(), '.incoming')
+        os.makedirs(incoming, exist_ok=True)
+        return os.path.join(incoming, f'{uuid.uuid4().hex}.tmp')
+
+    def _root(self):
+        return self.upload_folder or os.path.abspath('uploads')
+
+    # ==================== REFERENCES ====================
+
+    @staticmethod
+    def is_immutable(relative_path):
+        """True for content-addressed files (and their derivatives), which never change"""
+        return bool(CONTENT_PATH_PATTERN.match(relative_path))
+
+    def unreferenced_paths(self, paths):
+        """
+        Deletion-queue guard: keep only paths no row references any more
+
+        Derivatives (.../derived/<stem>-<size>.<ext>) follow their source image.
+        Paths whose source was (re)uploaded within the grace period are kept
+        as well, since the row that will use it may not be saved yet.
+
+        Args:
+            paths (list): Absolute file paths queued for deletion
+
+        Returns:
+            list: Paths that are safe to delete
+        """
+        root = self._root()
+        source_of = {}
+        for path in paths:
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            source_of[path] = self._source_prefix(relative)
+
+        with self.app.app_context():
+            try:
+                referenced = self._referenced_prefixes(set(source_of.values()))
+            finally:
+                db.session.remove()
+
+        cutoff = time.time() - self.grace_seconds
+        recent = {prefix for prefix in set(source_of.values()) if self._source_mtime(prefix) > cutoff}
+
+        return [path for path, prefix in source_of.items() if prefix not in referenced and prefix not in recent]
+
+    def _source_mtime(self, prefix):
+        """Latest mtime of the source file(s) '/uploads/<dir>/<stem>.<ext>' (0 if none is left)"""
+        pattern = os.path.join(self._root(), glob.escape(prefix[len('/uploads/'):]) + '*')
+        mtimes = []
+        for path in glob.glob(pattern):
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                pass
+        return max(mtimes, default=0)
+
+    @staticmethod
+    def _source_prefix(relative):
+        """
+        URL prefix of the source file: '/uploads/<dir>/<stem>.'
+        ('images/ab/derived/<hash>-thumb.webp' -> '/uploads/images/ab/<hash>.')
+        """
+        folder, filename = relative.rsplit('/', 1) if '/' in relative else ('', relative)
+        stem = filename.rsplit('.', 1)[0]
+        if folder == 'derived' or folder.endswith('/derived'):
+            folder = folder[:-len('derived')].rstrip('/')
+            if '-' in stem:
+                stem = stem.rsplit('-', 1)[0]
+        return f"/uploads/{folder + '/' if folder else ''}{stem}."
+
+    @staticmethod
+    def _referenced_prefixes(prefixes):
+        """Which source prefixes are still used by a MovieImage / MovieVideo / Actor row"""
+        from models.movie_image import MovieImage
+        from models.movie_video import MovieVideo
+        from models.actor import Actor
+
+        if not prefixes:
+            return set()
+
+        def like_any(column):
+            return or_(*[column.like(_escape_like(prefix) + '%', escape='\\') for prefix in prefixes])
+
+        rows = db.session.execute(union(
+            select(MovieImage.image_url).where(like_any(MovieImage.image_url)),
+            select(MovieVideo.video_url).where(like_any(MovieVideo.video_url)),
+            select(Actor.photo_url).where(like_any(Actor.photo_url))
+        )).scalars()
+
+        referenced = set()
+        for url in rows:
+            for prefix in prefixes:
+                if url.startswith(prefix) and '/' not in url[len(prefix):]:
+                    referenced.add(prefix)
+        return referenced
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# Shared instance, configured in app.py
+content_store = ContentStore()
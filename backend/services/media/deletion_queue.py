@@ -0,0 +1,349 @@
+"""
+Media Deletion Queue
+Deletes uploaded files in a background worker once the DB transaction commits
+
+Flow:
+1. Service code calls enqueue_after_commit(file_url) inside a transaction
+2. On commit, the pending URLs are journaled to disk and handed to the worker
+   (on rollback they are discarded, so no file is lost for a failed write)
+3. The worker unlinks files in batches and retries failures with backoff
+   (an optional guard can veto files that are still in use)
+4. On startup, journals left by processes that are gone are claimed and replayed
+
+Each process keeps its own journal (<MEDIA_DELETE_JOURNAL>.<pid>.jsonl) and
+only ever compacts that one, so worker processes never drop each other's
+pending deletions.
+"""
+from database.db import db
+from sqlalchemy import event
+import glob
+import json
+import os
+import queue
+import threading
+import time
+
+
+SESSION_KEY = 'pending_media_deletions'
+
+
+class MediaDeletionQueue:
+    """Post-commit file deletion queue backed by a worker thread and an on-disk journal"""
+    
+    def __init__(self):
+        self.upload_folder = None
+        self.journal_base = None
+        self.batch_size = 50
+        self.batch_wait = 0.5
+        self.max_retries = 5
+        self.retry_delay = 2.0
+        self.guard = None  # callable(paths) -> paths safe to delete
+        
+        self._queue = queue.Queue()
+        self._pending = {}  # path -> attempts
+        self._lock = threading.Lock()
+        self._worker = None
+    
+    def init_app(self, app):
+        """
+        Configure the queue from the Flask app and replay the journal
+        
+        Args:
+            app: Flask application instance
+        """
+        self.upload_folder = os.path.abspath(app.config.get('UPLOAD_FOLDER', 'uploads'))
+        self.journal_base = app.config.get('MEDIA_DELETE_JOURNAL') or \
+            os.path.join(self.upload_folder, '.pending_deletions.jsonl')
+        self.batch_size = app.config.get('MEDIA_DELETE_BATCH_SIZE', self.batch_size)
+        self.max_retries = app.config.get('MEDIA_DELETE_MAX_RETRIES', self.max_retries)
+        self.retry_delay = app.config.get('MEDIA_DELETE_RETRY_DELAY', self.retry_delay)
+        
+        # Push pending deletions to the worker only once the transaction is durable
+        event.listen(db.session, 'after_commit', self._on_commit)
+        event.listen(db.session, 'after_soft_rollback', self._on_rollback)
+        
+        self._replay_journals()
+    
+    @property
+    def journal_path(self):
+        """This process's journal (resolved per call: a preloading server forks after init_app)"""
+        if not self.journal_base:
+            return None
+        root, ext = os.path.splitext(self.journal_base)
+        return f'{root}.{os.getpid()}{ext}'
+    
+    # ==================== REQUEST PATH ====================
+    
+    def enqueue_after_commit(self, file_url):
+        """
+        Schedule an uploaded file for deletion when the current transaction commits
+        
+        Args:
+            file_url (str): File URL (e.g., /uploads/images/filename.jpg)
+        """
+        path = self.url_to_path(file_url)
+        if path:
+            db.session.info.setdefault(SESSION_KEY, set()).add(path)
+    
+    def enqueue(self, paths):
+        """
+        Journal and enqueue file paths for deletion immediately
+        
+        Args:
+            paths (iterable): Absolute file paths inside the upload folder
+        """
+        self._add(paths)
+    
+    def _add(self, paths, replayed=False):
+        with self._lock:
+            new_paths = [path for path in dict.fromkeys(paths) if path not in self._pending]
+            for path in new_paths:
+                self._pending[path] = 0
+            if replayed:
+                # Written once to this process's journal (the claimed files are removed afterwards)
+                self._rewrite_journal()
+            elif new_paths:
+                self._append_journal(new_paths)
+            if not new_paths:
+                return
+        
+        for path in new_paths:
+            self._queue.put(path)
+        self._ensure_worker()
+    
+    def url_to_path(self, file_url):
+        """
+        Map an /uploads/ URL to a file path, ignoring external URLs
+        
+        Returns:
+            str: Absolute file path or None
+        """
+        if not file_url or not file_url.startswith('/uploads/'):
+            return None
+        
+        folder = self.upload_folder or os.path.abspath('uploads')
+        path = os.path.abspath(os.path.join(folder, file_url.split('/uploads/', 1)[-1]))
+        
+        # Never delete anything outside the upload folder
+        if not path.startswith(folder + os.sep):
+            return None
+        return path
+    
+    def pending_count(self):
+        """Number of files waiting to be deleted"""
+        with self._lock:
+            return len(self._pending)
+    
+    def _on_commit(self, session):
+        paths = session.info.pop(SESSION_KEY, None)
+        if paths:
+            self.enqueue(paths)
+    
+    def _on_rollback(self, session, previous_transaction):
+        # A savepoint rollback keeps the outer transaction (and its deletions) alive
+        if not previous_transaction.nested:
+            session.info.pop(SESSION_KEY, None)
+    
+    # ==================== WORKER ====================
+    
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='media-deletion-worker', daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        retries = []  # (due_time, path)
+        
+        while True:
+            timeout = None
+            if retries:
+                timeout = max(0.0, min(due for due, _ in retries) - time.monotonic())
+            
+            # Block for the first item, then collect a batch
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+                deadline = time.monotonic() + self.batch_wait
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                pass
+            
+            now = time.monotonic()
+            batch.extend(path for due, path in retries if due <= now)
+            retries = [(due, path) for due, path in retries if due > now]
+            
+            if batch:
+                retries.extend(self._process_batch(batch))
+    
+    def _process_batch(self, batch):
+        """
+        Unlink a batch of files
+        
+        Returns:
+            list: (due_time, path) entries to retry later
+        """
+        done = []
+        retries = []
+        deleted = 0
+        
+        if self.guard is not None:
+            try:
+                allowed = set(self.guard(batch))
+            except Exception as e:
+                print(f"Error checking files before deletion: {str(e)}")
+                for path in batch:
+                    self._retry_later(path, e, done, retries)
+                batch = []
+            else:
+                kept = [path for path in batch if path not in allowed]
+                if kept:
+                    print(f"Kept {len(kept)} file(s) that are still referenced or were uploaded recently")
+                done.extend(kept)
+                batch = [path for path in batch if path in allowed]
+        
+        for path in batch:
+            try:
+                os.remove(path)
+                done.append(path)
+                deleted += 1
+            except FileNotFoundError:
+                done.append(path)
+            except OSError as e:
+                self._retry_later(path, e, done, retries)
+        
+        with self._lock:
+            for path in done:
+                self._pending.pop(path, None)
+            self._rewrite_journal()
+        
+        if deleted:
+            print(f"Deleted {deleted} uploaded file(s)")
+        
+        return retries
+    
+    def _retry_later(self, path, error, done, retries):
+        """Count a failed attempt: schedule a retry with exponential backoff, or give up"""
+        with self._lock:
+            attempts = self._pending.get(path, 0) + 1
+            self._pending[path] = attempts
+        
+        if attempts >= self.max_retries:
+            print(f"Giving up deleting file {path}: {str(error)}")
+            done.append(path)
+        else:
+            delay = self.retry_delay * (2 ** (attempts - 1))
+            retries.append((time.monotonic() + delay, path))
+    
+    # ==================== JOURNAL ====================
+    
+    def _append_journal(self, paths):
+        if not self.journal_path:
+            return
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                for path in paths:
+                    f.write(json.dumps({'path': path}) + '\n')
+        except OSError as e:
+            print(f"Error writing deletion journal: {str(e)}")
+    
+    def _rewrite_journal(self):
+        """Compact the journal down to the still-pending paths (caller holds the lock)"""
+        if not self.journal_path:
+            return
+        try:
+            if not self._pending:
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                return
+            
+            tmp_path = self.journal_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for path in self._pending:
+                    f.write(json.dumps({'path': path}) + '\n')
+            os.replace(tmp_path, self.journal_path)
+        except OSError as e:
+            print(f"Error compacting deletion journal: {str(e)}")
+    
+    def _replay_journals(self):
+        """Claim the journals of processes that are gone (crash, restart) and queue their paths"""
+        if not self.journal_base:
+            return
+        
+        root, ext = os.path.splitext(self.journal_base)
+        candidates = [self.journal_base]  # Single shared journal of older versions
+        candidates += glob.glob(f'{glob.escape(root)}.*{ext}')
+        candidates += glob.glob(f'{glob.escape(root)}.*{ext}.claimed-*')  # Claimed by a process that died replaying
+        
+        paths = []
+        claimed = []
+        for journal in sorted(set(candidates)):
+            owner = _journal_owner(journal, root, ext)
+            if owner is None and journal != self.journal_base:
+                continue  # Not a journal
+            # Our own journal at startup was left by an earlier process with the same PID
+            if owner is not None and owner != os.getpid() and _pid_alive(owner):
+                continue
+            # Rename before reading: of several starting processes only one claims a journal
+            claim = f"{journal.split('.claimed-')[0]}.claimed-{os.getpid()}-{len(claimed)}"
+            try:
+                os.rename(journal, claim)
+            except OSError:
+                continue
+            claimed.append(claim)
+            paths.extend(self._read_journal(claim))
+        
+        if paths:
+            print(f"Replaying {len(set(paths))} pending file deletion(s)")
+        if claimed:
+            self._add(paths, replayed=True)
+        for claim in claimed:
+            try:
+                os.remove(claim)
+            except OSError as e:
+                print(f"Error removing replayed deletion journal: {str(e)}")
+    
+    @staticmethod
+    def _read_journal(path):
+        paths = []
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        paths.append(json.loads(line)['path'])
+                    except (ValueError, KeyError):
+                        continue  # Torn write from a crash
+        except OSError as e:
+            print(f"Error reading deletion journal: {str(e)}")
+        return paths
+
+
+def _journal_owner(journal, root, ext):
+    """PID of the process writing a journal ('<root>.<pid><ext>[.claimed-<pid>-<n>]'), None for the shared one"""
+    if '.claimed-' in journal:
+        owner = journal.rsplit('.claimed-', 1)[1].split('-')[0]
+    elif journal.startswith(root + '.') and journal.endswith(ext):
+        owner = journal[len(root) + 1:len(journal) - len(ext)]
+    else:
+        return None
+    return int(owner) if owner.isdigit() else None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+# Shared instance, configured in app.py
+deletion_queue = MediaDeletionQueue()
@@ -0,0 +1,448 @@
+"""
+Media File Server
+Streams uploaded files with HTTP range support and bounded memory use
+
+- Whole files and ranges that run to EOF are handed to wsgi.file_wrapper
+  (gunicorn/uwsgi turn this into sendfile)
+- Other ranges are streamed by a generator reading fixed-size chunks
+- Supports suffix ranges (bytes=-N), multipart/byteranges, If-Range,
+  conditional GET (ETag / Last-Modified) and HEAD
+- File metadata (size, mtime, MIME) is cached for a short TTL instead of
+  stat-ing the file on every request
+- Small hot files (posters, thumbnails, the first ranges of trailers) are
+  kept in a bounded in-memory LRU keyed by the file's ETag, so a file that
+  changes on disk is re-read once its metadata is re-stat-ed; concurrent
+  misses for the same file share one disk read
+"""
+from flask import Response, jsonify, request
+from werkzeug.http import http_date
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+from collections import OrderedDict, namedtuple
+from utils.cache import SingleFlight, TaggedCache
+from services.media.content_store import content_store
+import mimetypes
+import os
+import threading
+import uuid
+
+
+FileMeta = namedtuple('FileMeta', 'path size mtime mime etag')
+
+
+def _etag(st):
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+class HotFileCache:
+    """
+    Bounded LRU of small file contents
+    
+    Entries are keyed by filename and tagged with the ETag they were read
+    under; a lookup with a different ETag (the file was replaced) drops the
+    entry and reads the file again.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_file_size=1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self._entries = OrderedDict()  # filename -> (etag, data)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+    
+    def get(self, filename, meta):
+        """
+        Return the file's bytes, reading them on a miss
+        
+        Returns:
+            bytes: File contents, or None if the file is too large to cache
+                   or changed while it was being read (stream it instead)
+        """
+        if meta.size > self.max_file_size or meta.size > self.max_bytes:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                if entry[0] == meta.etag:
+                    self._entries.move_to_end(filename)
+                    self.hits += 1
+                    return entry[1]
+                self._remove(filename)
+                self.stale += 1
+            self.misses += 1
+        
+        data, _ = self._flights.do((filename, meta.etag), lambda: self._load(filename, meta))
+        return data
+    
+    def _load(self, filename, meta):
+        with open(meta.path, 'rb') as f:
+            if _etag(os.fstat(f.fileno())) != meta.etag:
+                return None
+            data = f.read()
+        if len(data) != meta.size:
+            return None
+        
+        with self._lock:
+            self._remove(filename)
+            self._entries[filename] = (meta.etag, data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return data
+    
+    def delete(self, filename):
+        with self._lock:
+            self._remove(filename)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'coalesced': self._flights.shared
+            }
+    
+    def _remove(self, filename):
+        """Drop one entry (caller holds the lock)"""
+        entry = self._entries.pop(filename, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+class MediaFileServer:
+    """Serves files from the upload folder"""
+    
+    def __init__(self):
+        self.root = None
+        self.chunk_size = 64 * 1024
+        self.max_ranges = 16
+        self.immutable_max_age = 31536000
+        self._meta_cache = TaggedCache(ttl=5, max_entries=4096)
+        self._hot_files = HotFileCache()
+    
+    def init_app(self, app):
+        """
+        Configure the server from the Flask app
+        
+        Args:
+            app: Flask application instance
+        """
+        self.root = os.path.abspath(app.config.get('UPLOAD_FOLDER', 'uploads'))
+        self.chunk_size = app.config.get('MEDIA_CHUNK_SIZE', self.chunk_size)
+        self.max_ranges = app.config.get('MEDIA_MAX_RANGES', self.max_ranges)
+        self.immutable_max_age = app.config.get('MEDIA_IMMUTABLE_MAX_AGE', self.immutable_max_age)
+        self._meta_cache = TaggedCache(
+            ttl=app.config.get('MEDIA_METADATA_TTL', 5),
+            max_entries=app.config.get('MEDIA_METADATA_MAX_ENTRIES', 4096)
+        )
+        self._hot_files = HotFileCache(
+            max_bytes=app.config.get('MEDIA_HOT_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+            max_file_size=app.config.get('MEDIA_HOT_CACHE_MAX_FILE_SIZE', 1024 * 1024)
+        )
+    
+    def serve(self, filename):
+        """
+        Build the response for GET/HEAD /uploads/<filename>
+        
+        Args:
+            filename (str): Path relative to the upload folder
+        
+        Returns:
+            Response: 200, 206, 304, 404 or 416 response
+        """
+        meta = self.get_metadata(filename)
+        if meta is None:
+            self._hot_files.delete(filename)
+            return self._not_found()
+        
+        headers = {
+            'Accept-Ranges': 'bytes',
+            'ETag': meta.etag,
+            'Last-Modified': http_date(meta.mtime)
+        }
+        if content_store.is_immutable(filename):
+            # Content-addressed URL: the bytes behind it never change
+            headers['Cache-Control'] = f'public, max-age={self.immutable_max_age}, immutable'
+        
+        if self._not_modified(meta):
+            return Response(status=304, headers=headers)
+        
+        ranges = None
+        if 'Range' in request.headers and self._if_range_matches(meta):
+            ranges = parse_byte_ranges(request.headers['Range'], meta.size)
+            if ranges is not None and len(ranges) > self.max_ranges:
+                ranges = None  # Too many ranges: serve the whole file instead
+        
+        if ranges == []:
+            headers['Content-Range'] = f'bytes */{meta.size}'
+            return Response(status=416, headers=headers)
+        
+        head = request.method == 'HEAD'
+        
+        try:
+            data = None if head else self._hot_files.get(filename, meta)
+            if data is not None:
+                return self._memory_response(data, meta, ranges, headers)
+            
+            if not ranges:
+                headers['Content-Length'] = str(meta.size)
+                body = () if head else self._file_body(meta, 0, meta.size - 1)
+                return self._response(body, 200, headers, meta.mime)
+            
+            if len(ranges) == 1:
+                start, end = ranges[0]
+                headers['Content-Range'] = f'bytes {start}-{end}/{meta.size}'
+                headers['Content-Length'] = str(end - start + 1)
+                body = () if head else self._file_body(meta, start, end)
+                return self._response(body, 206, headers, meta.mime)
+            
+            boundary = uuid.uuid4().hex
+            parts = [
+                (
+                    (f'\r\n--{boundary}\r\nContent-Type: {meta.mime}\r\n'
+                     f'Content-Range: bytes {start}-{end}/{meta.size}\r\n\r\n').encode('latin-1'),
+                    start,
+                    end
+                )
+                for start, end in ranges
+            ]
+            closing = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+            
+            headers['Content-Length'] = str(
+                sum(len(part_header) + end - start + 1 for part_header, start, end in parts) + len(closing)
+            )
+            headers['Content-Type'] = f'multipart/byteranges; boundary={boundary}'
+            body = () if head else self._multipart_body(meta, parts, closing)
+            return self._response(body, 206, headers)
+        except FileNotFoundError:
+            self.invalidate(filename)
+            return self._not_found()
+    
+    def get_metadata(self, filename):
+        """
+        Cached size/mtime/MIME lookup for a file in the upload folder
+        
+        Returns:
+            FileMeta: File metadata, or None if the file does not exist
+        """
+        meta = self._meta_cache.get(filename)
+        if meta is not None:
+            return meta
+        
+        # Hidden entries (upload sessions, journals) are never served
+        if any(part.startswith('.') for part in filename.split('/')):
+            return None
+        
+        root = self.root or os.path.abspath('uploads')
+        path = safe_join(root, filename)
+        if path is None:
+            return None
+        
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        
+        mime, _ = mimetypes.guess_type(filename)
+        meta = FileMeta(
+            path=path,
+            size=st.st_size,
+            mtime=int(st.st_mtime),
+            mime=mime or 'application/octet-stream',
+            etag=_etag(st)
+        )
+        self._meta_cache.set(filename, meta)
+        return meta
+    
+    def invalidate(self, filename=None):
+        """Forget cached metadata and contents for one file (or all files)"""
+        if filename is None:
+            self._meta_cache.clear()
+            self._hot_files.clear()
+        else:
+            self._meta_cache.delete(filename)
+            self._hot_files.delete(filename)
+    
+    def stats(self):
+        """Hit/miss counters of the metadata and hot-file caches"""
+        return {
+            'metadata': self._meta_cache.stats(),
+            'hot_files': self._hot_files.stats()
+        }
+    
+    # ==================== CONDITIONALS ====================
+    
+    @staticmethod
+    def _not_modified(meta):
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(meta.etag.strip('"'))
+        if request.if_modified_since:
+            return int(request.if_modified_since.timestamp()) >= meta.mtime
+        return False
+    
+    @staticmethod
+    def _if_range_matches(meta):
+        """If-Range: only honour Range when the validator still matches the file"""
+        if 'If-Range' not in request.headers:
+            return True
+        if_range = request.if_range
+        if if_range.etag is not None:
+            return f'"{if_range.etag}"' == meta.etag
+        if if_range.date is not None:
+            return int(if_range.date.timestamp()) == meta.mtime
+        return False
+    
+    # ==================== BODIES ====================
+    
+    @staticmethod
+    def _response(body, status, headers, mimetype=None):
+        response = Response(body, status, headers=headers, mimetype=mimetype, direct_passthrough=True)
+        # Content-Length is exact, don't let Werkzeug buffer the body to compute it
+        response.automatically_set_content_length = False
+        return response
+    
+    def _memory_response(self, data, meta, ranges, headers):
+        """Same responses as serve(), with the body sliced from cached bytes"""
+        if not ranges:
+            headers['Content-Length'] = str(meta.size)
+            return self._response((data,), 200, headers, meta.mime)
+        
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers['Content-Range'] = f'bytes {start}-{end}/{meta.size}'
+            headers['Content-Length'] = str(end - start + 1)
+            return self._response((data[start:end + 1],), 206, headers, meta.mime)
+        
+        boundary = uuid.uuid4().hex
+        body = []
+        for start, end in ranges:
+            body.append(
+                (f'\r\n--{boundary}\r\nContent-Type: {meta.mime}\r\n'
+                 f'Content-Range: bytes {start}-{end}/{meta.size}\r\n\r\n').encode('latin-1')
+            )
+            body.append(data[start:end + 1])
+        body.append(f'\r\n--{boundary}--\r\n'.encode('latin-1'))
+        
+        headers['Content-Length'] = str(sum(len(part) for part in body))
+        headers['Content-Type'] = f'multipart/byteranges; boundary={boundary}'
+        return self._response(body, 206, headers)
+    
+    def _file_body(self, meta, start, end):
+        """Stream bytes [start, end] of the file"""
+        f = open(meta.path, 'rb')
+        if end == meta.size - 1:
+            # Range runs to EOF: let the WSGI server use sendfile if it can
+            f.seek(start)
+            return wrap_file(request.environ, f, self.chunk_size)
+        return self._read_range(f, start, end, close=True)
+    
+    def _multipart_body(self, meta, parts, closing):
+        f = open(meta.path, 'rb')
+        
+        def generate():
+            with f:
+                for part_header, start, end in parts:
+                    yield part_header
+                    yield from self._read_range(f, start, end)
+                yield closing
+        
+        return generate()
+    
+    def _read_range(self, f, start, end, close=False):
+        """Yield bytes [start, end] of an open file in chunks of at most chunk_size"""
+        try:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            if close:
+                f.close()
+    
+    @staticmethod
+    def _not_found():
+        return jsonify({
+            'success': False,
+            'message': 'File not found'
+        }), 404
+
+
+def parse_byte_ranges(header, size):
+    """
+    Parse a Range header against a file size
+    
+    Args:
+        header (str): Range header value (e.g. 'bytes=0-99,200-', 'bytes=-500')
+        size (int): File size in bytes
+    
+    Returns:
+        list: Sorted, merged (start, end) inclusive ranges;
+              [] if no range is satisfiable; None if the header is invalid
+              (the caller then ignores it and serves the whole file)
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    
+    ranges = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, sep, last = item.partition('-')
+        first, last = first.strip(), last.strip()
+        if not sep or not (first.isdigit() or last.isdigit()):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            end = min(int(last), size - 1) if last else size - 1
+        
+        if start < size:
+            ranges.append((start, end))
+    
+    # Merge overlapping/adjacent ranges so parts never repeat bytes
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# Shared instance, configured in app.py
+media_file_server = MediaFileServer()
@@ -0,0 +1,293 @@
+"""
+Image Derivative Pipeline
+Generates responsive sizes of uploaded images in a process pool
+
+For /uploads/images/<name>.<ext> the workers write:
+- uploads/images/derived/<name>-thumb.webp|.jpg  (160px wide)
+- uploads/images/derived/<name>-card.webp|.jpg   (480px wide)
+- uploads/images/derived/<name>-hero.webp|.jpg   (1280px wide)
+- uploads/images/derived/<name>.json             (variants manifest, incl. a tiny placeholder and a BlurHash)
+
+The upload response does not wait for the workers. When a job finishes the
+variants are recorded on MovieImage.variants / Actor.photo_variants rows
+that use the image; rows saved later pick them up from the manifest.
+The workers run services/media/image_worker.py and are started with
+forkserver (spawn where unavailable), never forked from the server.
+Requires Pillow (optional dependency): without it the pipeline is disabled.
+"""
+from database.db import db
+from services.media.media_probe import probe_image_size
+from services.media import image_worker
+from services.media.image_worker import DERIVED_DIR, build_derivatives
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import click
+import importlib.util
+import json
+import multiprocessing
+import os
+import threading
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+# ==================== APP SIDE ====================
+
+class ImagePipeline:
+    """Submits derivative jobs to a process pool and records the results"""
+    
+    def __init__(self):
+        self.app = None
+        self.upload_folder = None
+        self.enabled = False
+        self.max_workers = 2
+        self.quality = 80
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """
+        Configure the pipeline and register the `flask images` CLI
+        
+        Args:
+            app: Flask application instance
+        """
+        self.app = app
+        self.upload_folder = os.path.abspath(app.config.get('UPLOAD_FOLDER', 'uploads'))
+        self.max_workers = app.config.get('IMAGE_WORKERS', self.max_workers)
+        self.quality = app.config.get('IMAGE_DERIVATIVE_QUALITY', self.quality)
+        self.enabled = app.config.get('IMAGE_DERIVATIVES_ENABLED', True)
+        
+        if self.enabled and importlib.util.find_spec('PIL') is None:
+            print("⚠️  Pillow is not installed, image derivatives are disabled")
+            self.enabled = False
+        
+        app.cli.add_command(images_cli)
+    
+    def submit(self, file_url):
+        """
+        Queue derivative generation for an uploaded image (returns immediately)
+        
+        Args:
+            file_url (str): /uploads/images/... URL
+        
+        Returns:
+            Future: The job, or None if the URL is not a local image
+        """
+        source_path = self._source_path(file_url)
+        if not self.enabled or source_path is None:
+            return None
+        
+        future = self._get_executor().submit(build_derivatives, source_path, file_url, self.quality)
+        future.add_done_callback(lambda f: self._on_done(file_url, f))
+        return future
+    
+    def variants_for(self, file_url):
+        """
+        Variants manifest of an image, or None if not (yet) generated
+        
+        Args:
+            file_url (str): Original image URL
+        """
+        path = self._manifest_path(file_url)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def metadata_for(self, file_url):
+        """
+        Column values for a MovieImage row: variants, width, height, blurhash
+        
+        Dimensions come from the variants manifest, or from the image header
+        when derivatives are not generated (yet / Pillow missing).
+        
+        Args:
+            file_url (str): Original image URL
+        
+        Returns:
+            dict: variants, width, height, blurhash (None when unknown)
+        """
+        variants = self.variants_for(file_url)
+        if variants is not None:
+            return {
+                'variants': variants,
+                'width': variants.get('width'),
+                'height': variants.get('height'),
+                'blurhash': variants.get('blurhash')
+            }
+        
+        source_path = self._source_path(file_url)
+        size = probe_image_size(source_path) if source_path else None
+        return {
+            'variants': None,
+            'width': size[0] if size else None,
+            'height': size[1] if size else None,
+            'blurhash': None
+        }
+    
+    def derivative_urls(self, file_url):
+        """URLs of every file generated for an image (for deletion)"""
+        variants = self.variants_for(file_url)
+        if variants is None:
+            return []
+        
+        urls = [
+            url
+            for entry in variants.get('sizes', {}).values()
+            for key, url in entry.items() if key in ('webp', 'jpeg')
+        ]
+        folder, filename = file_url.rsplit('/', 1)
+        urls.append(f'{folder}/{DERIVED_DIR}/{os.path.splitext(filename)[0]}.json')
+        return urls
+    
+    def record_variants(self, file_url, variants):
+        """
+        Store variants on every MovieImage / Actor row that uses the image
+        
+        Returns:
+            int: Number of updated rows
+        """
+        from models.movie_image import MovieImage
+        from models.actor import Actor
+        
+        updated = MovieImage.query.filter(MovieImage.image_url == file_url).update(
+            {
+                MovieImage.variants: variants,
+                MovieImage.width: variants.get('width'),
+                MovieImage.height: variants.get('height'),
+                MovieImage.blurhash: variants.get('blurhash')
+            },
+            synchronize_session=False
+        )
+        updated += Actor.query.filter(Actor.photo_url == file_url).update(
+            {Actor.photo_variants: variants}, synchronize_session=False
+        )
+        db.session.commit()
+        return updated
+    
+    def _on_done(self, file_url, future):
+        """Executor callback (runs in the pool's manager thread)"""
+        try:
+            variants = future.result()
+        except Exception as e:
+            print(f"Error generating derivatives for {file_url}: {str(e)}")
+            return
+        
+        try:
+            with self.app.app_context():
+                self.record_variants(file_url, variants)
+        except Exception as e:
+            print(f"Error recording derivatives for {file_url}: {str(e)}")
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Never fork the server: its threads (deletion worker, video pool, token sync,
+                # requests) may hold locks that a forked child would inherit locked. forkserver
+                # forks workers from a clean single-threaded process that only preloads
+                # image_worker; spawn where forkserver is not available. Workers still import the
+                # __main__ script as __mp_main__ (multiprocessing), so it must be import-safe
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if context.get_start_method() == 'forkserver':
+                    context.set_forkserver_preload([image_worker.__name__])
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            return self._executor
+    
+    def _source_path(self, file_url):
+        if not file_url or not file_url.startswith('/uploads/images/') or f'/{DERIVED_DIR}/' in file_url:
+            return None
+        if not file_url.lower().endswith(IMAGE_EXTENSIONS):
+            return None
+        
+        folder = self.upload_folder or os.path.abspath('uploads')
+        path = os.path.abspath(os.path.join(folder, file_url[len('/uploads/'):]))
+        if not path.startswith(folder + os.sep):
+            return None
+        return path
+    
+    def _manifest_path(self, file_url):
+        source_path = self._source_path(file_url)
+        if source_path is None:
+            return None
+        folder, filename = os.path.split(source_path)
+        return os.path.join(folder, DERIVED_DIR, os.path.splitext(filename)[0] + '.json')
+
+
+# Shared instance, configured in app.py
+image_pipeline = ImagePipeline()
+
+
+# ==================== CLI ====================
+
+@click.group('images')
+def images_cli():
+    """Image derivative commands"""
+
+
+@images_cli.command('derivatives')
+@click.option('--all', 'rebuild_all', is_flag=True, help='Regenerate images that already have derivatives')
+def generate_derivatives_command(rebuild_all):
+    """Generate derivatives for uploaded images referenced by movies and actors"""
+    from models.movie_image import MovieImage
+    from models.actor import Actor
+    
+    if not image_pipeline.enabled:
+        print("Image derivatives are disabled (Pillow not installed?)")
+        return
+    
+    urls = {url for url, in db.session.query(MovieImage.image_url).filter(MovieImage.image_url.like('/uploads/images/%'))}
+    urls |= {url for url, in db.session.query(Actor.photo_url).filter(Actor.photo_url.like('/uploads/images/%'))}
+    
+    # Fan the missing ones out to the pool, then record results as they finish
+    executor = image_pipeline._get_executor()
+    futures = {}
+    processed = 0
+    for url in sorted(urls):
+        variants = None if rebuild_all else image_pipeline.variants_for(url)
+        if variants is not None:
+            image_pipeline.record_variants(url, variants)
+            processed += 1
+            continue
+        
+        source_path = image_pipeline._source_path(url)
+        if source_path and os.path.exists(source_path):
+            futures[executor.submit(build_derivatives, source_path, url, image_pipeline.quality)] = url
+    
+    for future in as_completed(futures):
+        url = futures[future]
+        try:
+            image_pipeline.record_variants(url, future.result())
+            processed += 1
+        except Exception as e:
+            print(f"Error generating derivatives for {url}: {str(e)}")
+    
+    print(f"Derivatives recorded for {processed} image(s)")
+
+
+@images_cli.command('metadata')
+def backfill_metadata_command():
+    """Fill in width/height/BlurHash of movie images that don't have them yet"""
+    from models.movie_image import MovieImage
+    
+    urls = [
+        url for url, in db.session.query(MovieImage.image_url).filter(
+            MovieImage.width.is_(None),
+            MovieImage.image_url.like('/uploads/images/%')
+        ).distinct()
+    ]
+    
+    updated = 0
+    for url in urls:
+        metadata = image_pipeline.metadata_for(url)
+        if metadata['width'] is None:
+            continue
+        values = {getattr(MovieImage, key): value for key, value in metadata.items() if value is not None}
+        updated += MovieImage.query.filter(MovieImage.image_url == url).update(values, synchronize_session=False)
+    db.session.commit()
+    
+    print(f"Metadata recorded for {updated} movie image row(s) ({len(urls)} file(s) checked)")
@@ -0,0 +1,111 @@
+"""
+Image Derivative Worker
+Code that runs inside the image process pool (services/media/image_derivatives.py)
+
+The pool starts its workers with forkserver/spawn, so this module is
+imported fresh in each worker: keep its imports to Pillow, the stdlib and
+utils.blurhash (never the app, models or the database).
+"""
+from utils.blurhash import encode_blurhash
+import base64
+import io
+import json
+import os
+import uuid
+
+
+DERIVED_DIR = 'derived'
+DERIVATIVE_SIZES = (('hero', 1280), ('card', 480), ('thumb', 160))  # largest first, each resized from the previous
+PLACEHOLDER_WIDTH = 16
+BLURHASH_SIZE = 32
+
+
+def build_derivatives(source_path, source_url, quality=80):
+    """
+    Decode the source once and write every derivative plus the manifest
+    
+    Args:
+        source_path (str): Absolute path of the uploaded image
+        source_url (str): Its /uploads/images/... URL
+        quality (int): WebP/JPEG quality
+    
+    Returns:
+        dict: Variants manifest
+    """
+    from PIL import Image, ImageOps
+    
+    folder, filename = os.path.split(source_path)
+    stem = os.path.splitext(filename)[0]
+    out_dir = os.path.join(folder, DERIVED_DIR)
+    url_dir = source_url.rsplit('/', 1)[0] + '/' + DERIVED_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    
+    with Image.open(source_path) as im:
+        # Let the JPEG decoder downscale by 1/2..1/8 while decoding
+        im.draft('RGB', (DERIVATIVE_SIZES[0][1], DERIVATIVE_SIZES[0][1] * 4))
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ('RGB', 'RGBA'):
+            im = im.convert('RGBA' if 'transparency' in im.info or im.mode in ('LA', 'PA') else 'RGB')
+        im.load()
+    
+    variants = {'width': im.width, 'height': im.height, 'sizes': {}}
+    current = im
+    for name, width in DERIVATIVE_SIZES:
+        if current.width > width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS)
+        
+        entry = {'width': current.width, 'height': current.height}
+        for fmt, ext in (('WEBP', 'webp'), ('JPEG', 'jpg')):
+            out_name = f'{stem}-{name}.{ext}'
+            _save_atomic(current, os.path.join(out_dir, out_name), fmt, quality)
+            entry[ext if ext == 'webp' else 'jpeg'] = f'{url_dir}/{out_name}'
+        variants['sizes'][name] = entry
+    
+    # Inline placeholder, blurred by the browser while the real image loads
+    tiny = current.resize(
+        (PLACEHOLDER_WIDTH, max(1, round(current.height * PLACEHOLDER_WIDTH / current.width))),
+        Image.BILINEAR
+    )
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'WEBP', quality=30)
+    variants['placeholder'] = 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    variants['blurhash'] = _blurhash(current)
+    
+    _write_manifest(os.path.join(out_dir, f'{stem}.json'), variants)
+    return variants
+
+
+def _blurhash(im):
+    """BlurHash of a 32px copy (4x3 components, 3x4 for portrait images)"""
+    from PIL import Image
+    
+    scale = BLURHASH_SIZE / max(im.width, im.height)
+    small = im.convert('RGB').resize(
+        (max(1, round(im.width * scale)), max(1, round(im.height * scale))),
+        Image.BILINEAR
+    )
+    x_components, y_components = (4, 3) if small.width >= small.height else (3, 4)
+    return encode_blurhash(list(small.getdata()), small.width, small.height, x_components, y_components)
+
+
+def _save_atomic(im, path, fmt, quality):
+    """Write to a temp file and rename, so readers never see a partial image"""
+    if fmt == 'JPEG' and im.mode == 'RGBA':
+        background = im.__class__.new('RGB', im.size, (255, 255, 255))
+        background.paste(im, mask=im.getchannel('A'))
+        im = background
+    
+    tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+    if fmt == 'JPEG':
+        im.save(tmp_path, fmt, quality=quality, optimize=True, progressive=True)
+    else:
+        im.save(tmp_path, fmt, quality=quality, method=4)
+    os.replace(tmp_path, path)
+
+
+def _write_manifest(path, variants):
+    tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(variants, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,360 @@
+"""
+Media Probe
+Reads media dimensions from file headers in pure Python (no Pillow needed)
+
+- Images: PNG, GIF, JPEG (incl. EXIF orientation) and WebP (VP8, VP8L, VP8X)
+- Videos: MP4/MOV (ISO base media boxes) and WebM/MKV (EBML): duration,
+  resolution, bitrate and whether the MP4 index (moov) precedes the media data
+Only headers are read (the MP4 moov box may sit at the end of the file).
+"""
+import os
+import struct
+
+
+HEADER_READ_SIZE = 64 * 1024
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def probe_image_size(path):
+    """
+    Width and height of an image as displayed (EXIF rotation applied)
+    
+    Args:
+        path (str): Image file path
+    
+    Returns:
+        tuple: (width, height), or None if the format is not recognized
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(HEADER_READ_SIZE)
+            if head[:2] == b'\xff\xd8':
+                return _jpeg_size(f, head)
+    except OSError:
+        return None
+    
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', head[6:10])
+    
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return _webp_size(head)
+    
+    return None
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and head[20:21] == b'\x2f':
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+    return None
+
+
+def _jpeg_size(f, head):
+    """Walk the JPEG segments up to the first SOF marker"""
+    data = head
+    pos = 2
+    orientation = 1
+    
+    while True:
+        # Segments can run past the first read (large EXIF/ICC blocks)
+        if pos + 9 > len(data):
+            more = f.read(HEADER_READ_SIZE)
+            if not more:
+                return None
+            data = data[pos:] + more
+            pos = 0
+        
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1  # Fill byte
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+            # Orientations 5-8 rotate the image by 90 degrees
+            return (height, width) if orientation >= 5 else (width, height)
+        
+        if marker == 0xE1 and length >= 8:
+            while pos + 2 + length > len(data):
+                more = f.read(HEADER_READ_SIZE)
+                if not more:
+                    return None
+                data += more
+            orientation = _exif_orientation(data[pos + 4:pos + 2 + length]) or orientation
+        
+        pos += 2 + length
+
+
+def _exif_orientation(segment):
+    """Orientation tag (0x0112) from an APP1 Exif segment"""
+    if segment[:6] != b'Exif\x00\x00':
+        return None
+    tiff = segment[6:]
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+    
+    try:
+        ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        entries = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for i in range(entries):
+            entry = ifd_offset + 2 + i * 12
+            tag, = struct.unpack(endian + 'H', tiff[entry:entry + 2])
+            if tag == 0x0112:
+                return struct.unpack(endian + 'H', tiff[entry + 8:entry + 10])[0]
+    except struct.error:
+        return None
+    return None
+
+
+# ==================== VIDEO ====================
+
+MP4_TOP_LEVEL_BOXES = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pdin', b'uuid', b'meta', b'moof', b'mfra', b'styp', b'sidx'}
+MP4_MAX_MOOV_SIZE = 64 * 1024 * 1024
+EBML_HEAD_READ_SIZE = 4 * 1024 * 1024
+
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_CLUSTER = 0x1F43B675
+
+
+def probe_video(path):
+    """
+    Container metadata of a video file
+
+    Args:
+        path (str): Video file path
+
+    Returns:
+        dict: container ('mp4' / 'webm' / 'matroska'), duration (float seconds),
+              width, height, bitrate (bits/s) and faststart (MP4 only);
+              None if the container is not recognized
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(12)
+            if head[4:8] in MP4_TOP_LEVEL_BOXES:
+                info = _probe_mp4(f, size)
+            elif int.from_bytes(head[:4], 'big') == EBML_HEADER:
+                f.seek(0)
+                info = _probe_ebml(f.read(EBML_HEAD_READ_SIZE))
+            else:
+                return None
+    except (OSError, struct.error, ValueError, IndexError):
+        return None
+
+    if info is None:
+        return None
+    duration = info.get('duration')
+    info['bitrate'] = int(size * 8 / duration) if duration else None
+    return info
+
+
+def iter_mp4_boxes(f, start, end):
+    """
+    Yield (type, offset, size, header_size) for the boxes in [start, end) of a file
+
+    Args:
+        f: Binary file object
+        start (int): Offset of the first box
+        end (int): End offset (file size for top-level boxes)
+    """
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos  # Box runs to the end of the file
+        if size < header_size:
+            return  # Corrupt box
+        yield box_type, pos, size, header_size
+        pos += size
+
+
+def iter_mp4_children(data, start=0, end=None):
+    """Yield (type, payload_start, payload_end) for the boxes inside an in-memory box payload"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size or pos + size > end:
+            return
+        yield box_type, pos + header_size, pos + size
+        pos += size
+
+
+def _probe_mp4(f, file_size):
+    moov = None
+    first_mdat = None
+    for box_type, offset, size, header_size in iter_mp4_boxes(f, 0, file_size):
+        if box_type == b'mdat' and first_mdat is None:
+            first_mdat = offset
+        elif box_type == b'moov' and moov is None:
+            if size > MP4_MAX_MOOV_SIZE:
+                return None
+            f.seek(offset + header_size)
+            moov = (offset, f.read(size - header_size))
+    if moov is None:
+        return None
+
+    moov_offset, data = moov
+    info = {
+        'container': 'mp4',
+        'duration': None,
+        'width': None,
+        'height': None,
+        'faststart': first_mdat is None or moov_offset < first_mdat
+    }
+
+    for box_type, start, end in iter_mp4_children(data):
+        if box_type == b'mvhd':
+            version = data[start]
+            if version == 1:
+                timescale, duration = struct.unpack('>IQ', data[start + 20:start + 32])
+            else:
+                timescale, duration = struct.unpack('>II', data[start + 12:start + 20])
+            if timescale:
+                info['duration'] = duration / timescale
+        elif box_type == b'trak' and info['width'] is None:
+            dimensions = _mp4_video_track_size(data, start, end)
+            if dimensions:
+                info['width'], info['height'] = dimensions
+    return info
+
+
+def _mp4_video_track_size(data, start, end):
+    """(width, height) from tkhd if the track's handler is 'vide'"""
+    size = None
+    handler = None
+    for box_type, box_start, box_end in iter_mp4_children(data, start, end):
+        if box_type == b'tkhd':
+            # Width/height are the last two 16.16 fixed-point fields
+            width, height = struct.unpack('>II', data[box_end - 8:box_end])
+            size = (width >> 16, height >> 16)
+        elif box_type == b'mdia':
+            for child_type, child_start, _ in iter_mp4_children(data, box_start, box_end):
+                if child_type == b'hdlr':
+                    handler = data[child_start + 8:child_start + 12]
+    return size if handler == b'vide' and size and size[0] and size[1] else None
+
+
+def _read_vint(data, pos, keep_marker=False):
+    """EBML variable-length integer -> (value, length); value None means 'unknown size'"""
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError('Invalid EBML varint')
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = None
+    return value, length
+
+
+def _iter_ebml(data, start, end):
+    """Yield (id, payload_start, payload_end) for EBML elements in data[start:end]"""
+    pos = start
+    while pos < end:
+        element_id, id_length = _read_vint(data, pos, keep_marker=True)
+        size, size_length = _read_vint(data, pos + id_length)
+        payload = pos + id_length + size_length
+        payload_end = end if size is None else min(payload + size, end)
+        yield element_id, payload, payload_end
+        if size is None:
+            return  # Unknown size (live-written Segment/Cluster) runs to the end
+        pos = payload_end
+
+
+def _probe_ebml(data):
+    info = {'container': 'matroska', 'duration': None, 'width': None, 'height': None}
+    timecode_scale = 1000000
+    duration = None
+
+    for element_id, start, end in _iter_ebml(data, 0, len(data)):
+        if element_id == EBML_HEADER:
+            for child_id, child_start, child_end in _iter_ebml(data, start, end):
+                if child_id == EBML_DOCTYPE and data[child_start:child_end] == b'webm':
+                    info['container'] = 'webm'
+        elif element_id == MKV_SEGMENT:
+            for child_id, child_start, child_end in _iter_ebml(data, start, end):
+                if child_id == MKV_INFO:
+                    for field_id, field_start, field_end in _iter_ebml(data, child_start, child_end):
+                        if field_id == MKV_TIMECODE_SCALE:
+                            timecode_scale = int.from_bytes(data[field_start:field_end], 'big')
+                        elif field_id == MKV_DURATION:
+                            fmt = '>f' if field_end - field_start == 4 else '>d'
+                            duration = struct.unpack(fmt, data[field_start:field_end])[0]
+                elif child_id == MKV_TRACKS:
+                    _ebml_video_size(data, child_start, child_end, info)
+                elif child_id == MKV_CLUSTER:
+                    break  # Media data: Info and Tracks come before it
+
+    if duration is not None:
+        info['duration'] = duration * timecode_scale / 1e9
+    return info
+
+
+def _ebml_video_size(data, start, end, info):
+    for entry_id, entry_start, entry_end in _iter_ebml(data, start, end):
+        if entry_id != MKV_TRACK_ENTRY:
+            continue
+        track_type = None
+        size = {}
+        for field_id, field_start, field_end in _iter_ebml(data, entry_start, entry_end):
+            if field_id == MKV_TRACK_TYPE:
+                track_type = int.from_bytes(data[field_start:field_end], 'big')
+            elif field_id == MKV_VIDEO:
+                for video_id, video_start, video_end in _iter_ebml(data, field_start, field_end):
+                    if video_id in (MKV_PIXEL_WIDTH, MKV_PIXEL_HEIGHT):
+                        size[video_id] = int.from_bytes(data[video_start:video_end], 'big')
+        if track_type == 1 and MKV_PIXEL_WIDTH in size:
+            info['width'] = size[MKV_PIXEL_WIDTH]
+            info['height'] = size.get(MKV_PIXEL_HEIGHT)
+            return
@@ -0,0 +1,247 @@
+"""
+Upload Orphan Garbage Collector
+Deletes files under uploads/images and uploads/videos that no row references
+
+Uploads become orphans when a create form is abandoned after uploading, or a
+transaction rolls back after the file was stored. The collector:
+1. Pages through movie_images, movie_videos and actors with keyset queries and
+   keeps a compact fingerprint (8 bytes) of every referenced /uploads/ URL
+2. Streams the upload directories with os.scandir (no full listing in memory)
+3. Deletes unreferenced files older than the grace period; derivatives in
+   derived/ follow their source image
+Run with: flask uploads gc [--grace-hours 24] [--dry-run]
+"""
+from database.db import db
+from array import array
+from bisect import bisect_left
+import click
+import glob
+import hashlib
+import os
+import time
+
+
+MEDIA_DIRS = ('images', 'videos')
+DERIVED_DIR = 'derived'
+
+
+class OrphanUploadCollector:
+    """Service class for cleaning up unreferenced upload files"""
+    
+    @staticmethod
+    def collect(upload_folder, grace_seconds=86400, dry_run=False, batch_size=5000):
+        """
+        Find and delete orphaned upload files
+        
+        Args:
+            upload_folder (str): Upload root folder
+            grace_seconds (int): Files modified more recently are always kept
+            dry_run (bool): Only report what would be deleted
+            batch_size (int): Rows per keyset page
+        
+        Returns:
+            dict: Scan report (scanned/deleted files, reclaimed bytes, ...)
+        """
+        started = time.monotonic()
+        upload_folder = os.path.abspath(upload_folder)
+        referenced = ReferenceSet.from_database(batch_size)
+        cutoff = time.time() - grace_seconds
+        
+        report = {
+            'referenced_urls': len(referenced),
+            'scanned_files': 0,
+            'kept_referenced': 0,
+            'kept_recent': 0,
+            'kept_with_source': 0,
+            'deleted_files': 0,
+            'reclaimed_bytes': 0,
+            'errors': 0,
+            'dry_run': dry_run
+        }
+        
+        for media_dir in MEDIA_DIRS:
+            root = os.path.join(upload_folder, media_dir)
+            for entry, url_dir in _walk_files(root, f'/uploads/{media_dir}'):
+                report['scanned_files'] += 1
+                
+                is_derived = url_dir.endswith('/' + DERIVED_DIR)
+                key = _reference_key(url_dir, entry.name)
+                if key in referenced:
+                    report['kept_referenced'] += 1
+                    continue
+                
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    report['errors'] += 1
+                    continue
+                
+                if st.st_mtime > cutoff:
+                    report['kept_recent'] += 1
+                    continue
+                
+                # A derivative stays while its source file is still on disk
+                if is_derived and _source_exists(os.path.dirname(os.path.dirname(entry.path)), entry.name):
+                    report['kept_with_source'] += 1
+                    continue
+                
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    except OSError as e:
+                        click.echo(f"Error deleting orphan {entry.path}: {str(e)}", err=True)
+                        report['errors'] += 1
+                        continue
+                
+                report['deleted_files'] += 1
+                report['reclaimed_bytes'] += st.st_size
+        
+        report['duration_seconds'] = round(time.monotonic() - started, 3)
+        return report
+
+
+class ReferenceSet:
+    """
+    Membership set of referenced upload URLs, 8 bytes per URL
+    
+    URLs are reduced to '/uploads/<dir>/<stem>' (no extension, so derivatives
+    can be matched to their source) and stored as sorted 64-bit BLAKE2b
+    fingerprints. A collision can only keep an orphan, never delete a used file.
+    """
+    
+    def __init__(self, fingerprints):
+        self._fingerprints = fingerprints
+    
+    def __len__(self):
+        return len(self._fingerprints)
+    
+    def __contains__(self, key):
+        fingerprint = _fingerprint(key)
+        i = bisect_left(self._fingerprints, fingerprint)
+        return i < len(self._fingerprints) and self._fingerprints[i] == fingerprint
+    
+    @classmethod
+    def from_database(cls, batch_size=5000):
+        """Keyset-paginate every table that references uploads"""
+        from models.movie_image import MovieImage
+        from models.movie_video import MovieVideo
+        from models.actor import Actor
+        
+        fingerprints = array('Q')
+        sources = (
+            (MovieImage.image_id, MovieImage.image_url),
+            (MovieVideo.video_id, MovieVideo.video_url),
+            (Actor.actor_id, Actor.photo_url)
+        )
+        
+        for pk_column, url_column in sources:
+            last_id = 0
+            while True:
+                rows = db.session.query(pk_column, url_column).filter(
+                    pk_column > last_id,
+                    url_column.like('/uploads/%')
+                ).order_by(pk_column).limit(batch_size).all()
+                
+                for _, url in rows:
+                    url_dir, filename = url.rsplit('/', 1)
+                    fingerprints.append(_fingerprint(_reference_key(url_dir, filename)))
+                
+                if len(rows) < batch_size:
+                    break
+                last_id = rows[-1][0]
+        
+        return cls(array('Q', sorted(fingerprints)))
+
+
+# ==================== HELPERS ====================
+
+def _walk_files(root, url_root):
+    """
+    Yield (DirEntry, url_dir) for every file below root
+    
+    Files of a directory are yielded before its subdirectories are entered,
+    so sources are processed before their derived/ files.
+    """
+    stack = [(root, url_root)]
+    while stack:
+        path, url_dir = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, f'{url_dir}/{entry.name}'))
+                    elif entry.is_file(follow_symlinks=False) and not entry.name.endswith('.tmp'):
+                        yield entry, url_dir
+        except FileNotFoundError:
+            continue
+        stack.extend(reversed(subdirs))
+
+
+def _reference_key(url_dir, filename):
+    """'/uploads/images/ab/<hash>.jpg' and '.../ab/derived/<hash>-thumb.webp' -> '/uploads/images/ab/<hash>'"""
+    stem = filename.rsplit('.', 1)[0]
+    if url_dir.endswith('/' + DERIVED_DIR):
+        url_dir = url_dir[:-len(DERIVED_DIR) - 1]
+        stem = stem.rsplit('-', 1)[0]
+    return f'{url_dir}/{stem}'
+
+
+def _fingerprint(key):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _source_exists(folder, derived_name):
+    """Is the image/video a derived file was generated from still on disk?"""
+    stem = derived_name.rsplit('.', 1)[0].rsplit('-', 1)[0]
+    return bool(glob.glob(os.path.join(glob.escape(folder), glob.escape(stem) + '.*')))
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+# ==================== CLI ====================
+
+def init_upload_gc(app):
+    """Register the `flask uploads gc` command"""
+    app.cli.add_command(uploads_cli)
+
+
+@click.group('uploads')
+def uploads_cli():
+    """Upload folder maintenance commands"""
+
+
+@uploads_cli.command('gc')
+@click.option('--grace-hours', type=float, default=None, help='Keep files younger than this (default: UPLOAD_GC_GRACE_HOURS)')
+@click.option('--dry-run', is_flag=True, help='Report orphans without deleting them')
+@click.option('--batch-size', type=int, default=5000, help='Rows per keyset query')
+def gc_command(grace_hours, dry_run, batch_size):
+    """Delete upload files no movie image/video or actor references"""
+    from flask import current_app
+    
+    if grace_hours is None:
+        grace_hours = current_app.config.get('UPLOAD_GC_GRACE_HOURS', 24)
+    
+    report = OrphanUploadCollector.collect(
+        current_app.config.get('UPLOAD_FOLDER', 'uploads'),
+        grace_seconds=int(grace_hours * 3600),
+        dry_run=dry_run,
+        batch_size=batch_size
+    )
+    
+    action = 'Would delete' if dry_run else 'Deleted'
+    click.echo(f"Scanned {report['scanned_files']} file(s) against {report['referenced_urls']} referenced URL(s)")
+    click.echo(f"{action} {report['deleted_files']} orphan(s), reclaimed {_format_bytes(report['reclaimed_bytes'])}")
+    click.echo(f"Kept {report['kept_referenced']} referenced, {report['kept_recent']} within grace period, "
+               f"{report['kept_with_source']} derivative(s) of kept sources "
+               f"({report['errors']} error(s), {report['duration_seconds']}s)")
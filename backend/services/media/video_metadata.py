@@ -0,0 +1,444 @@
+"""
+Video Metadata Worker
+Probes uploaded videos in the background and prepares them for streaming
+
+Uploads are stored as they are. Once a MovieVideo row using
+/uploads/videos/<name>.<ext> is committed, a worker thread:
+1. Reads duration, resolution and bitrate from the container headers
+   (pure Python, see media_probe.probe_video)
+2. Moves the MP4 index (moov box) in front of the media data ("faststart"),
+   so players can start from the first range request instead of fetching
+   the end of the file first. Stored files are served as immutable under
+   their hash and never rewritten: the faststart copy is stored under its
+   own hash and the MovieVideo rows are repointed to it
+3. Extracts a poster frame to uploads/videos/<dir>/derived/<name>-poster.jpg
+   when an ffmpeg binary is available (optional)
+4. Records the result on every MovieVideo row that uses the video
+
+Work is I/O bound (copying the file), so a small thread pool is used.
+"""
+from database.db import db
+from services.media.media_probe import probe_video, iter_mp4_boxes, iter_mp4_children
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+import click
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import uuid
+
+
+DERIVED_DIR = 'derived'
+SESSION_KEY = 'pending_video_jobs'
+VIDEO_EXTENSIONS = ('.mp4', '.m4v', '.mov', '.webm', '.mkv')
+COPY_BLOCK_SIZE = 1024 * 1024
+# Boxes on the path from moov to the chunk offset tables (stco/co64)
+MP4_CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+# ==================== FASTSTART ====================
+
+def make_faststart(path):
+    """
+    Rewrite an MP4 so that its moov box comes before the first mdat box
+    
+    Chunk offsets (stco/co64) are shifted by the size of the moved moov box;
+    stco tables are widened to co64 if an offset no longer fits in 32 bits.
+    
+    Args:
+        path (str): MP4/MOV file
+    
+    Returns:
+        bool: True if the file was rewritten, False if it was already
+              faststart or cannot be rewritten (fragmented, compressed moov, ...)
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        boxes = list(iter_mp4_boxes(f, 0, file_size))
+        moov = next((box for box in boxes if box[0] == b'moov'), None)
+        mdat = next((box for box in boxes if box[0] == b'mdat'), None)
+        if moov is None or mdat is None or moov[1] < mdat[1]:
+            return False
+        if any(box[0] == b'moof' for box in boxes):
+            return False  # Fragmented MP4: every fragment carries its own index
+        
+        _, moov_offset, moov_size, header_size = moov
+        f.seek(moov_offset + header_size)
+        payload = f.read(moov_size - header_size)
+    
+    tree = _parse_boxes(payload, 0, len(payload))
+    if len(_serialize([[b'moov', tree]])) != moov_size or _contains(tree, b'cmov'):
+        return False  # Unusual layout (64-bit header, compressed moov): leave it alone
+    
+    insert_at = mdat[1]
+    moov_end = moov_offset + moov_size
+    originals = [(node, node[0], node[1]) for node in _offset_tables(tree)]
+    
+    # Widening stco -> co64 grows the box, which grows the shift: repeat until stable
+    new_size = moov_size
+    for _ in range(4):
+        for node, box_type, content in originals:
+            node[0], node[1] = box_type, content
+        for node in _offset_tables(tree):
+            _shift_offsets(node, insert_at, moov_offset, moov_end, new_size, new_size - moov_size)
+        new_moov = _serialize([[b'moov', tree]])
+        if len(new_moov) == new_size:
+            break
+        new_size = len(new_moov)
+    else:
+        return False
+    
+    folder, name = os.path.split(path)
+    tmp_path = os.path.join(folder, f'.{name}.{uuid.uuid4().hex[:8]}.tmp')
+    try:
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            _copy_range(src, dst, 0, insert_at)
+            dst.write(new_moov)
+            _copy_range(src, dst, insert_at, moov_offset - insert_at)
+            _copy_range(src, dst, moov_end, file_size - moov_end)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def _parse_boxes(data, start, end):
+    """[type, children or raw payload] nodes; only the containers leading to stco/co64 are expanded"""
+    nodes = []
+    for box_type, payload_start, payload_end in iter_mp4_children(data, start, end):
+        if box_type in MP4_CONTAINER_BOXES:
+            nodes.append([box_type, _parse_boxes(data, payload_start, payload_end)])
+        else:
+            nodes.append([box_type, data[payload_start:payload_end]])
+    return nodes
+
+
+def _serialize(nodes):
+    parts = []
+    for box_type, content in nodes:
+        payload = _serialize(content) if isinstance(content, list) else content
+        parts.append(struct.pack('>I4s', len(payload) + 8, box_type) + payload)
+    return b''.join(parts)
+
+
+def _offset_tables(nodes):
+    for node in nodes:
+        if isinstance(node[1], list):
+            yield from _offset_tables(node[1])
+        elif node[0] in (b'stco', b'co64'):
+            yield node
+
+
+def _contains(nodes, box_type):
+    return any(
+        node[0] == box_type or (isinstance(node[1], list) and _contains(node[1], box_type))
+        for node in nodes
+    )
+
+
+def _shift_offsets(node, insert_at, moov_offset, moov_end, moved_shift, tail_shift):
+    """
+    Adjust one chunk offset table for the new layout:
+    data in [insert_at, moov_offset) moves down by the new moov size,
+    data after the old moov moves by the change in moov size
+    """
+    box_type, payload = node
+    width = 8 if box_type == b'co64' else 4
+    count = struct.unpack('>I', payload[4:8])[0]
+    offsets = struct.unpack(f'>{count}{"Q" if width == 8 else "I"}', payload[8:8 + count * width])
+    
+    shifted = []
+    for offset in offsets:
+        if insert_at <= offset < moov_offset:
+            offset += moved_shift
+        elif offset >= moov_end:
+            offset += tail_shift
+        shifted.append(offset)
+    
+    if box_type == b'stco' and shifted and max(shifted) > 0xFFFFFFFF:
+        box_type, width = b'co64', 8
+    node[0] = box_type
+    node[1] = payload[:8] + struct.pack(f'>{count}{"Q" if width == 8 else "I"}', *shifted)
+
+
+def _copy_range(src, dst, start, length):
+    src.seek(start)
+    while length > 0:
+        block = src.read(min(COPY_BLOCK_SIZE, length))
+        if not block:
+            raise IOError('Unexpected end of file while copying')
+        dst.write(block)
+        length -= len(block)
+
+
+# ==================== WORKER ====================
+
+class VideoPipeline:
+    """Runs video probing/faststart jobs on a thread pool and records the results"""
+    
+    def __init__(self):
+        self.app = None
+        self.upload_folder = None
+        self.enabled = False
+        self.max_workers = 1
+        self.ffmpeg = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = set()
+    
+    def init_app(self, app):
+        """
+        Configure the pipeline and register the `flask videos` CLI
+        
+        Args:
+            app: Flask application instance
+        """
+        self.app = app
+        self.upload_folder = os.path.abspath(app.config.get('UPLOAD_FOLDER', 'uploads'))
+        self.enabled = app.config.get('VIDEO_PROCESSING_ENABLED', True)
+        self.max_workers = app.config.get('VIDEO_WORKERS', self.max_workers)
+        self.ffmpeg = app.config.get('VIDEO_FFMPEG_PATH') or shutil.which('ffmpeg')
+        app.cli.add_command(videos_cli)
+        
+        event.listen(db.session, 'after_commit', self._on_commit)
+        event.listen(db.session, 'after_soft_rollback', self._on_rollback)
+    
+    def submit_after_commit(self, file_url):
+        """
+        Queue processing of a video when the current transaction commits
+        (the worker moves the MovieVideo rows, so they must be visible to it)
+        
+        Args:
+            file_url (str): /uploads/videos/... URL
+        """
+        if self._source_path(file_url) is not None:
+            db.session.info.setdefault(SESSION_KEY, set()).add(file_url)
+    
+    def submit(self, file_url):
+        """
+        Queue processing of an uploaded video (returns immediately)
+        
+        Args:
+            file_url (str): /uploads/videos/... URL
+        
+        Returns:
+            Future: The job, or None if disabled / not a local video / already queued
+        """
+        source_path = self._source_path(file_url)
+        if not self.enabled or source_path is None:
+            return None
+        
+        with self._lock:
+            if file_url in self._active:
+                return None
+            self._active.add(file_url)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='video-worker')
+        return self._executor.submit(self._process, file_url, source_path)
+    
+    def metadata_for(self, file_url):
+        """
+        Column values for a MovieVideo row, read from the file headers
+        
+        Args:
+            file_url (str): Video URL
+        
+        Returns:
+            dict: duration_seconds, width, height, bitrate, poster_url (None when unknown)
+        """
+        metadata = dict.fromkeys(('duration_seconds', 'width', 'height', 'bitrate', 'poster_url'))
+        source_path = self._source_path(file_url)
+        if source_path is None:
+            return metadata
+        
+        info = probe_video(source_path)
+        if info:
+            if info['duration'] is not None:
+                metadata['duration_seconds'] = int(round(info['duration']))
+            metadata['width'] = info['width']
+            metadata['height'] = info['height']
+            metadata['bitrate'] = info['bitrate']
+        
+        if os.path.exists(self._poster_path(source_path)):
+            metadata['poster_url'] = self._poster_url(file_url)
+        return metadata
+    
+    def derivative_urls(self, file_url):
+        """URLs of files generated for a video (for deletion)"""
+        source_path = self._source_path(file_url)
+        if source_path is None or not os.path.exists(self._poster_path(source_path)):
+            return []
+        return [self._poster_url(file_url)]
+    
+    def record_metadata(self, file_url, metadata):
+        """
+        Store probed values on every MovieVideo row that uses the video
+        
+        Returns:
+            int: Number of updated rows
+        """
+        from models.movie_video import MovieVideo
+        
+        values = {getattr(MovieVideo, key): value for key, value in metadata.items() if value is not None}
+        if not values:
+            return 0
+        updated = MovieVideo.query.filter(MovieVideo.video_url == file_url).update(
+            values, synchronize_session=False
+        )
+        db.session.commit()
+        return updated
+    
+    def _on_commit(self, session):
+        for file_url in session.info.pop(SESSION_KEY, ()):
+            self.submit(file_url)
+    
+    def _on_rollback(self, session, previous_transaction):
+        if not previous_transaction.nested:
+            session.info.pop(SESSION_KEY, None)
+    
+    def _process(self, file_url, source_path):
+        """Worker: faststart copy, poster frame, then record the metadata"""
+        video_url = file_url
+        try:
+            info = probe_video(source_path)
+            if info and info['container'] == 'mp4' and not info['faststart']:
+                stored_url = self._store_faststart_copy(file_url, source_path)
+                if stored_url:
+                    video_url, source_path = stored_url, self._source_path(stored_url)
+            
+            if self.ffmpeg and info and not os.path.exists(self._poster_path(source_path)):
+                self._extract_poster(source_path, info.get('duration'))
+            
+            with self.app.app_context():
+                try:
+                    return self.record_metadata(video_url, self.metadata_for(video_url))
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            print(f"Error processing video {file_url}: {str(e)}")
+        finally:
+            with self._lock:
+                self._active.discard(file_url)
+    
+    def _store_faststart_copy(self, file_url, source_path):
+        """
+        Store a faststart copy of a stored MP4 under its own hash and move the
+        MovieVideo rows to it (the old file is queued for deletion and kept
+        while anything still references it)
+        
+        Returns:
+            str: URL of the copy, or None if the file cannot be rewritten or no row uses it
+        """
+        from models.movie_video import MovieVideo
+        from services.media.content_store import content_store
+        from services.media.deletion_queue import deletion_queue
+        
+        # Without a row to move, the copy would only be an orphan
+        with self.app.app_context():
+            try:
+                if MovieVideo.query.filter(MovieVideo.video_url == file_url).first() is None:
+                    return None
+            finally:
+                db.session.remove()
+        
+        tmp_path = content_store._tmp_path()
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            if not make_faststart(tmp_path):
+                return None
+            file_ext = os.path.splitext(source_path)[1][1:].lower()
+            stored = content_store.store_file(tmp_path, file_ext, 'videos')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        with self.app.app_context():
+            try:
+                moved = MovieVideo.query.filter(MovieVideo.video_url == file_url).update(
+                    {MovieVideo.video_url: stored['url']}, synchronize_session=False
+                )
+                for url in self.derivative_urls(file_url) + [file_url]:
+                    deletion_queue.enqueue_after_commit(url)
+                db.session.commit()
+            finally:
+                db.session.remove()
+        
+        print(f"🎬 Stored a faststart copy of {file_url} as {stored['url']} ({moved} video row(s) moved)")
+        return stored['url']
+    
+    def _extract_poster(self, source_path, duration):
+        """Grab one frame (10% in, at most 5s) as a JPEG with ffmpeg"""
+        poster_path = self._poster_path(source_path)
+        os.makedirs(os.path.dirname(poster_path), exist_ok=True)
+        # Hidden temp name (skipped by the file server and the orphan collector), .jpg for ffmpeg
+        tmp_path = os.path.join(os.path.dirname(poster_path), f'.{uuid.uuid4().hex[:8]}.poster.jpg')
+        position = min(duration * 0.1, 5) if duration else 0
+        
+        try:
+            subprocess.run(
+                [self.ffmpeg, '-nostdin', '-loglevel', 'error', '-y', '-ss', f'{position:.2f}',
+                 '-i', source_path, '-frames:v', '1', '-vf', 'scale=min(1280\\,iw):-2', tmp_path],
+                check=True, timeout=120, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            os.replace(tmp_path, poster_path)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Error extracting poster frame from {source_path}: {str(e)}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _source_path(self, file_url):
+        if not file_url or not file_url.startswith('/uploads/videos/') or f'/{DERIVED_DIR}/' in file_url:
+            return None
+        if not file_url.lower().endswith(VIDEO_EXTENSIONS):
+            return None
+        
+        folder = self.upload_folder or os.path.abspath('uploads')
+        path = os.path.abspath(os.path.join(folder, file_url[len('/uploads/'):]))
+        if not path.startswith(folder + os.sep):
+            return None
+        return path
+    
+    @staticmethod
+    def _poster_path(source_path):
+        folder, filename = os.path.split(source_path)
+        return os.path.join(folder, DERIVED_DIR, f'{os.path.splitext(filename)[0]}-poster.jpg')
+    
+    @staticmethod
+    def _poster_url(file_url):
+        folder, filename = file_url.rsplit('/', 1)
+        return f'{folder}/{DERIVED_DIR}/{os.path.splitext(filename)[0]}-poster.jpg'
+
+
+# Shared instance, configured in app.py
+video_pipeline = VideoPipeline()
+
+
+# ==================== CLI ====================
+
+@click.group('videos')
+def videos_cli():
+    """Video processing commands"""
+
+
+@videos_cli.command('process')
+def process_videos_command():
+    """Probe (and faststart) every uploaded video referenced by a movie"""
+    from models.movie_video import MovieVideo
+    
+    urls = sorted(
+        url for url, in db.session.query(MovieVideo.video_url).filter(
+            MovieVideo.video_url.like('/uploads/videos/%')
+        ).distinct()
+    )
+    
+    futures = [video_pipeline.submit(url) for url in urls]
+    processed = sum(1 for future in futures if future is not None and future.result() is not None)
+    
+    print(f"Processed {processed} of {len(urls)} video(s)")
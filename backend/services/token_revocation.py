@@ -0,0 +1,213 @@
+"""
+Token Revocation
+Revoked JWTs (by jti) checked on every request without a DB query
+
+- revoked_tokens is the shared store; each worker keeps the live (not yet
+  expired) jtis in memory, ordered by expiry in a heap, behind a Bloom filter
+- A token that is not in the filter (almost every token) is accepted after
+  one hash; filter hits are confirmed against the in-memory set
+- Workers pull rows revoked by other workers every
+  TOKEN_REVOCATION_SYNC_INTERVAL seconds (one indexed query per worker,
+  not per request), so a logout reaches every worker within that interval
+- Expired jtis are dropped from memory as they expire and deleted from the
+  table every TOKEN_REVOCATION_PRUNE_INTERVAL seconds
+"""
+from database.db import db
+from models.revoked_token import RevokedToken
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from datetime import datetime, timedelta
+import calendar
+import click
+import hashlib
+import heapq
+import math
+import threading
+import time
+
+
+# Rows committed shortly before the previous sync may carry an older revoked_at
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, rare false positives)"""
+    
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, key):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+    
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False  # Most lookups stop at the first clear bit
+        return True
+
+
+class TokenRevocationStore:
+    """Revoked jtis: DB table + per-worker Bloom filter and expiry heap"""
+    
+    def __init__(self):
+        self.sync_interval = 5
+        self.prune_interval = 300
+        self.error_rate = 0.001
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._expiry = {}  # jti -> exp (unix seconds)
+        self._heap = []  # (exp, jti), soonest expiry first
+        self._bloom = BloomFilter(100000, self.error_rate)
+        self._next_sync = 0.0
+        self._next_prune = 0.0
+        self._synced_until = None
+    
+    def init_app(self, app):
+        """
+        Configure intervals and filter size, register the CLI
+        
+        Args:
+            app: Flask application instance
+        """
+        self.sync_interval = app.config.get('TOKEN_REVOCATION_SYNC_INTERVAL', self.sync_interval)
+        self.prune_interval = app.config.get('TOKEN_REVOCATION_PRUNE_INTERVAL', self.prune_interval)
+        self.error_rate = app.config.get('TOKEN_REVOCATION_BLOOM_ERROR_RATE', self.error_rate)
+        self._bloom = BloomFilter(app.config.get('TOKEN_REVOCATION_BLOOM_CAPACITY', 100000), self.error_rate)
+        register_cli(app, self)
+    
+    def is_revoked(self, jti):
+        """
+        Check a token's jti (called for every JWT-protected request)
+        
+        Returns:
+            bool: True if the token was revoked
+        """
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        if not self._expiry or jti not in self._bloom:
+            return False
+        return jti in self._expiry
+    
+    def revoke(self, jti, exp, user_id=None, token_type='access'):
+        """
+        Revoke a token until it expires
+        
+        Args:
+            jti (str): Token ID
+            exp (int): Token expiry (unix seconds, the 'exp' claim)
+            user_id (int): Owner of the token
+            token_type (str): 'access' or 'refresh'
+        """
+        try:
+            db.session.add(RevokedToken(
+                jti=jti,
+                user_id=user_id,
+                token_type=token_type,
+                expires_at=datetime.utcfromtimestamp(exp)
+            ))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # Already revoked
+        self._add(jti, exp)
+    
+    def sync(self):
+        """Pull revocations from other workers and prune expired ones (at most one thread at a time)"""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            self._next_sync = now + self.sync_interval
+            self._prune_memory()
+            
+            started = datetime.utcnow()
+            query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > started)
+            if self._synced_until is not None:
+                query = query.where(RevokedToken.revoked_at >= self._synced_until - SYNC_OVERLAP)
+            with db.engine.connect() as conn:
+                rows = conn.execute(query).all()
+            for jti, expires_at in rows:
+                self._add(jti, calendar.timegm(expires_at.timetuple()))
+            self._synced_until = started
+            
+            if now >= self._next_prune:
+                self._next_prune = now + self.prune_interval
+                self.prune_table()
+        except SQLAlchemyError as e:
+            # Keep answering from memory, retry on the next interval
+            print(f"⚠️  Token revocation sync failed: {e}")
+        finally:
+            self._sync_lock.release()
+    
+    def prune_table(self):
+        """
+        Delete rows of tokens that have expired anyway
+        
+        Returns:
+            int: Deleted rows
+        """
+        with db.engine.begin() as conn:
+            result = conn.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        return result.rowcount
+    
+    def _add(self, jti, exp):
+        with self._lock:
+            if jti in self._expiry or exp <= time.time():
+                return
+            self._expiry[jti] = exp
+            heapq.heappush(self._heap, (exp, jti))
+            if len(self._expiry) > self._bloom.capacity:
+                self._rebuild_filter(self._bloom.capacity * 2)
+            else:
+                self._bloom.add(jti)
+    
+    def _prune_memory(self):
+        """Drop expired jtis; the filter can't forget keys, so it is rebuilt"""
+        with self._lock:
+            now = time.time()
+            removed = 0
+            while self._heap and self._heap[0][0] <= now:
+                _, jti = heapq.heappop(self._heap)
+                self._expiry.pop(jti, None)
+                removed += 1
+            if removed:
+                self._rebuild_filter(self._bloom.capacity)
+    
+    def _rebuild_filter(self, capacity):
+        """Build a new filter from the live jtis and swap it in (caller holds the lock)"""
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in self._expiry:
+            bloom.add(jti)
+        self._bloom = bloom
+
+
+def register_cli(app, store):
+    """Register `flask tokens ...`"""
+    
+    @app.cli.group('tokens')
+    def tokens_cli():
+        """Revoked JWTs"""
+    
+    @tokens_cli.command('prune')
+    def prune_command():
+        """Delete revoked tokens that have expired"""
+        click.echo(f'Deleted {store.prune_table()} expired revoked token(s)')
+
+
+# Shared instance, configured in app.py
+token_revocation = TokenRevocationStore()
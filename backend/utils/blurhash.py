@@ -0,0 +1,93 @@
+"""
+BlurHash encoder (https://blurha.sh)
+Encodes a small image into a ~30 character string that clients decode into
+a blurred placeholder
+"""
+import math
+
+
+BASE83_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def encode_blurhash(pixels, width, height, x_components=4, y_components=3):
+    """
+    Encode RGB pixels into a BlurHash string
+    
+    Args:
+        pixels (sequence): Row-major (r, g, b) tuples, 0-255
+        width (int): Image width (keep it small, e.g. 32px: cost is O(w*h*components))
+        height (int): Image height
+        x_components (int): Horizontal components (1-9)
+        y_components (int): Vertical components (1-9)
+    
+    Returns:
+        str: BlurHash
+    """
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError('BlurHash components must be between 1 and 9')
+    
+    linear = [tuple(_srgb_to_linear(c) for c in pixel[:3]) for pixel in pixels]
+    # cos() tables, the basis is separable in x and y
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+    
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                basis_y = cos_y[j][y]
+                for x in range(width):
+                    basis = cos_x[i][x] * basis_y
+                    pr, pg, pb = linear[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            factors.append((r * scale, g * scale, b * scale))
+    
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+    
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (
+            int(max(0, min(18, math.floor(_sign_pow(v / max_value, 0.5) * 9 + 9.5))))
+            for v in factor
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    
+    return result
+
+
+def _srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exp):
+    return math.copysign(abs(value) ** exp, value)
+
+
+def _base83(value, length):
+    return ''.join(
+        BASE83_CHARS[(value // 83 ** (length - i - 1)) % 83]
+        for i in range(length)
+    )
@@ -0,0 +1,136 @@
+"""
+In-process caches
+TaggedCache: TTL cache whose entries can be invalidated by tag (e.g. 'cinema:5')
+SingleFlight: collapses concurrent loads of the same key into one call
+"""
+from collections import OrderedDict
+import copy
+import threading
+import time
+
+
+class TaggedCache:
+    """
+    Thread-safe TTL cache with LRU eviction and tag-based invalidation
+    
+    The cache is local to the worker process: writes in this process
+    invalidate immediately, other processes rely on the TTL.
+    """
+    
+    def __init__(self, ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tags = {}  # tag -> set(keys)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """Return a copy of the cached value, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+    
+    def set(self, key, value, tags=(), ttl=None):
+        """Store a value under key, attached to the given tags"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remove(key)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = (expires_at, tuple(tags), value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate_tag(self, *tags):
+        """Drop every entry attached to any of the tags"""
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    self._remove(key)
+    
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+    
+    def _remove(self, key):
+        """Remove one entry and its tag links (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SingleFlight:
+    """
+    Run at most one load per key at a time
+    
+    The first caller for a key runs the function, callers arriving while it
+    is running wait and get the same result (or exception).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> [event, result, error]
+        self.shared = 0
+    
+    def do(self, key, fn):
+        """
+        Call fn() for key, or wait for the call already in flight
+        
+        Returns:
+            tuple: (result, shared) - shared is True if another caller ran fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1], True
+        
+        try:
+            call[1] = fn()
+        except BaseException as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+        return call[1], False
@@ -0,0 +1,148 @@
+"""
+Password Hasher
+Runs bcrypt on a bounded thread pool instead of the request thread
+
+- At most PASSWORD_HASH_WORKERS hashes run at once; bcrypt releases the GIL,
+  so other requests keep being served while a login burst is hashed
+- At most PASSWORD_HASH_QUEUE more wait for a slot; when the pool is full
+  for PASSWORD_HASH_TIMEOUT seconds, PasswordHasherBusy is raised so the
+  caller can answer 503 instead of piling up requests
+- The cost (BCRYPT_LOG_ROUNDS) is per environment; needs_rehash() tells
+  whether a stored hash was made with a different cost
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import bcrypt
+import click
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are already queued"""
+
+
+class PasswordHasher:
+    """bcrypt behind a bounded executor"""
+    
+    def __init__(self, rounds=12, workers=4, queue_size=64, timeout=5.0):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._configure(workers, queue_size)
+    
+    def _configure(self, workers, queue_size):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        # Running + waiting hashes
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+    
+    def init_app(self, app):
+        """
+        Configure cost and concurrency from the Flask app, register the CLI
+        
+        Args:
+            app: Flask application instance
+        """
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._executor.shutdown(wait=False)
+        self._configure(
+            app.config.get('PASSWORD_HASH_WORKERS', self.workers),
+            app.config.get('PASSWORD_HASH_QUEUE', 64)
+        )
+        register_cli(app, self)
+    
+    def hash(self, password):
+        """
+        Hash a password with the configured cost
+        
+        Returns:
+            str: bcrypt hash
+        """
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), salt)
+        return hashed.decode('utf-8')
+    
+    def verify(self, password, hashed):
+        """
+        Check a password against a stored hash
+        
+        Returns:
+            bool: True if the password matches
+        """
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+    
+    def needs_rehash(self, hashed):
+        """True if the hash was made with a cost other than the configured one"""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return False
+    
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy('Password hashing queue is full')
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+def register_cli(app, hasher):
+    """Register `flask passwords ...`"""
+    
+    @app.cli.group('passwords')
+    def passwords_cli():
+        """Password hashing"""
+    
+    @passwords_cli.command('benchmark')
+    @click.option('--costs', default='10,11,12,13', help='Comma-separated bcrypt costs')
+    @click.option('--logins', default=64, help='Password checks per cost')
+    @click.option('--concurrency', default=16, help='Concurrent clients')
+    def benchmark_command(costs, logins, concurrency):
+        """Login (password check) throughput and latency per bcrypt cost"""
+        click.echo(f'workers={hasher.workers} concurrency={concurrency} logins={logins}')
+        click.echo(f"{'cost':>4} {'hash ms':>8} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        
+        for cost in (int(c) for c in costs.split(',') if c.strip()):
+            bench = PasswordHasher(rounds=cost, workers=hasher.workers, queue_size=logins, timeout=None)
+            started = time.perf_counter()
+            hashed = bench.hash('benchmark-password')
+            hash_ms = (time.perf_counter() - started) * 1000
+            
+            latencies = []
+            lock = threading.Lock()
+            remaining = [logins]
+            
+            def client():
+                while True:
+                    with lock:
+                        if remaining[0] == 0:
+                            return
+                        remaining[0] -= 1
+                    t0 = time.perf_counter()
+                    bench.verify('benchmark-password', hashed)
+                    with lock:
+                        latencies.append(time.perf_counter() - t0)
+            
+            started = time.perf_counter()
+            clients = [threading.Thread(target=client) for _ in range(concurrency)]
+            for t in clients:
+                t.start()
+            for t in clients:
+                t.join()
+            elapsed = time.perf_counter() - started
+            bench._executor.shutdown()
+            
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+            click.echo(f'{cost:>4} {hash_ms:>8.1f} {logins / elapsed:>9.1f} {p50:>8.1f} {p95:>8.1f}')
+        
+        click.echo(f'Configured cost: {hasher.rounds} (BCRYPT_LOG_ROUNDS)')
+
+
+# Shared instance, configured in app.py
+password_hasher = PasswordHasher()
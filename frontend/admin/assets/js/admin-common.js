@@ -16,30 +16,41 @@
 
     // Load sidebar component
     function loadSidebar() {
+        const container = document.getElementById('sidebar-container');
+
+        // Built pages (build_assets.py) already contain the sidebar
+        if (container.dataset.inlined === 'true') {
+            initSidebar();
+            return;
+        }
+
         fetch('sidebar.html')
             .then(response => response.text())
             .then(html => {
-                document.getElementById('sidebar-container').innerHTML = html;
-                
-                // Update active menu based on current page
-                const currentPage = window.location.pathname.split('/').pop();
-                const menuLinks = document.querySelectorAll('.sidebar-menu a');
-                menuLinks.forEach(link => {
-                    link.classList.remove('active');
-                    if (link.getAttribute('href') === currentPage) {
-                        link.classList.add('active');
-                    }
-                });
-
-                // Update user info
-                const user = AuthHandler.getUser();
-                if (user && user.full_name) {
-                    document.getElementById('admin-name').textContent = user.full_name;
-                }
+                container.innerHTML = html;
+                initSidebar();
             })
             .catch(err => console.error('Error loading sidebar:', err));
     }
 
+    function initSidebar() {
+        // Update active menu based on current page
+        const currentPage = window.location.pathname.split('/').pop();
+        const menuLinks = document.querySelectorAll('.sidebar-menu a');
+        menuLinks.forEach(link => {
+            link.classList.remove('active');
+            if (link.getAttribute('href') === currentPage) {
+                link.classList.add('active');
+            }
+        });
+
+        // Update user info
+        const user = AuthHandler.getUser();
+        if (user && user.full_name) {
+            document.getElementById('admin-name').textContent = user.full_name;
+        }
+    }
+
     // Initialize admin page
     function init() {
         if (!ensureAdmin()) return;
@@ -114,6 +125,77 @@ function handleResponse(response) {
     return response.json();
 }
 
+// Upload a large file with the resumable chunked upload API
+// Each chunk is sent with its SHA-256; an interrupted upload resumes from the missing chunks
+async function uploadFileChunked(apiBaseUrl, file, type = 'videos', onProgress = null) {
+    const sessionsUrl = `${apiBaseUrl}/api/admin/upload/sessions`;
+    const resumeKey = `upload_session:${type}:${file.name}:${file.size}:${file.lastModified}`;
+    
+    const request = async (url, options = {}) => {
+        const response = await fetch(url, options);
+        const result = await handleResponse(response);
+        if (!response.ok || !result.success) {
+            const error = new Error(result.message || 'Upload failed');
+            error.status = response.status;
+            throw error;
+        }
+        return result.data;
+    };
+    
+    const sha256Hex = async (buffer) => {
+        if (!window.crypto || !window.crypto.subtle) return null;
+        const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    };
+    
+    // Resume a previous session for the same file if the server still has it
+    let session = null;
+    const savedId = localStorage.getItem(resumeKey);
+    if (savedId) {
+        try {
+            session = await request(`${sessionsUrl}/${savedId}`, { headers: getAuthHeaders() });
+        } catch (error) {
+            localStorage.removeItem(resumeKey);
+        }
+    }
+    
+    if (!session) {
+        session = await request(sessionsUrl, {
+            method: 'POST',
+            headers: getAuthHeaders(),
+            body: JSON.stringify({ filename: file.name, type: type, size: file.size })
+        });
+        localStorage.setItem(resumeKey, session.upload_id);
+    }
+    
+    let done = session.total_chunks - session.missing.length;
+    for (const index of session.missing) {
+        const start = index * session.chunk_size;
+        const buffer = await file.slice(start, Math.min(start + session.chunk_size, file.size)).arrayBuffer();
+        const headers = getAuthHeaders(true);
+        headers['Content-Type'] = 'application/octet-stream';
+        
+        const checksum = await sha256Hex(buffer);
+        if (checksum) headers['X-Chunk-SHA256'] = checksum;
+        
+        await request(`${sessionsUrl}/${session.upload_id}/chunks/${index}`, {
+            method: 'PUT',
+            headers: headers,
+            body: buffer
+        });
+        
+        done += 1;
+        if (onProgress) onProgress(done / session.total_chunks);
+    }
+    
+    const result = await request(`${sessionsUrl}/${session.upload_id}/complete`, {
+        method: 'POST',
+        headers: getAuthHeaders()
+    });
+    localStorage.removeItem(resumeKey);
+    return result.url;
+}
+
 // Show alert message
 function showAlert(message, type = 'info') {
     if (typeof asAlertMsg !== 'undefined') {
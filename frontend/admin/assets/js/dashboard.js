@@ -4,39 +4,64 @@
 (function() {
     'use strict';
 
+    const API_BASE_URL = window.CONFIG ? CONFIG.API_BASE_URL : 'http://localhost:5000';
+
+    // changeKey refers to data.changes (percent change today vs yesterday)
     const STATS_CONFIG = [
-        { title: 'Total Bookings', key: 'total_bookings', default: 4, icon: 'fa-ticket', change: '+12.5%' },
-        { title: 'Total Revenue', key: 'revenue_today', default: 2140, icon: 'fa-dollar', change: '+8.2%', prefix: '$' },
-        { title: 'Active Shows', key: 'total_movies', default: 43, icon: 'fa-film', change: '+3.1%' },
-        { title: 'Total Users', key: 'total_users', default: 1, icon: 'fa-users', change: '+5.4%' }
+        { title: 'Bookings Today', key: 'bookings_today', icon: 'fa-ticket', changeKey: 'bookings' },
+        { title: 'Revenue Today', key: 'revenue_today', icon: 'fa-dollar', changeKey: 'revenue', prefix: '$' },
+        { title: 'Occupancy Today', key: 'occupancy_today', icon: 'fa-film', changeKey: 'occupancy', percent: true },
+        { title: 'Total Users', key: 'total_users', icon: 'fa-users', changeKey: 'new_users' }
     ];
 
-    function createStatCard(config, value) {
+    function formatValue(config, value) {
+        if (config.percent) {
+            return (value * 100).toFixed(1) + '%';
+        }
+        return (config.prefix || '') + value.toLocaleString();
+    }
+
+    function formatChange(change) {
+        if (change === null || change === undefined) {
+            return '—';
+        }
+        return (change >= 0 ? '+' : '') + change + '%';
+    }
+
+    function createStatCard(config, value, change) {
         const template = document.getElementById('stat-card-template');
         const card = template.content.cloneNode(true);
         
         card.querySelector('.stat-card-title').textContent = config.title;
         card.querySelector('.stat-card-icon i').classList.add(config.icon);
-        card.querySelector('.stat-card-value').textContent = (config.prefix || '') + value;
-        card.querySelector('.stat-card-change span').textContent = config.change;
+        card.querySelector('.stat-card-value').textContent = formatValue(config, value);
+        card.querySelector('.stat-card-change span').textContent = formatChange(change);
+        if (change !== null && change !== undefined && change < 0) {
+            const arrow = card.querySelector('.stat-card-change i');
+            arrow.classList.remove('fa-arrow-up');
+            arrow.classList.add('fa-arrow-down');
+        }
         
         return card;
     }
 
     function renderStats(data) {
         const container = document.getElementById('stats');
+        const changes = data.changes || {};
         container.innerHTML = '';
         
         STATS_CONFIG.forEach(config => {
-            const value = data[config.key] || config.default;
-            container.appendChild(createStatCard(config, value));
+            const value = data[config.key] ?? 0;
+            container.appendChild(createStatCard(config, value, changes[config.changeKey]));
         });
     }
 
     function loadStats() {
-        const api = (typeof CONFIG !== 'undefined' && CONFIG.API_URL) ? CONFIG.API_URL : '';
-        fetch(api + '/admin/stats', { credentials: 'include' })
-            .then(r => r.json())
+        fetch(`${API_BASE_URL}/api/admin/stats`, {
+            method: 'GET',
+            headers: getAuthHeaders()
+        })
+            .then(handleResponse)
             .then(json => renderStats(json?.success ? json.data : {}))
             .catch(() => renderStats({}));
     }
@@ -17,6 +17,11 @@
      * Upload file to server
      */
     async function uploadFile(file, type = 'images') {
+        // Videos go through the resumable chunked upload (no request size limit)
+        if (type === 'videos') {
+            return uploadFileChunked(API_BASE_URL, file, type);
+        }
+        
         const formData = new FormData();
         formData.append('file', file);
         formData.append('type', type);
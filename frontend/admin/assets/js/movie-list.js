@@ -125,7 +125,18 @@
                 const posterImgTemplate = document.getElementById('poster-image-template');
                 const posterClone = posterImgTemplate.content.cloneNode(true);
                 const img = posterClone.querySelector('img');
-                img.src = posterUrl.startsWith('/uploads') ? API_BASE_URL + posterUrl : posterUrl;
+                // Prefer the small derivative (full-size poster only as fallback)
+                const thumb = movie.poster_thumb;
+                const src = thumb ? thumb.webp : posterUrl;
+                img.src = src.startsWith('/uploads') ? API_BASE_URL + src : src;
+                if (thumb) {
+                    img.width = thumb.width;
+                    img.height = thumb.height;
+                    img.decoding = 'async';
+                } else if (movie.poster_width && movie.poster_height) {
+                    // No derivative yet: reserve the poster's box from its known size
+                    img.style.aspectRatio = `${movie.poster_width} / ${movie.poster_height}`;
+                }
                 img.alt = movie.title;
                 posterCell.appendChild(posterClone);
             } else {
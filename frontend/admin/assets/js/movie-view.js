@@ -200,7 +200,7 @@
             const template = document.getElementById('video-card-view-template');
             const clone = template.content.cloneNode(true);
             
-            clone.querySelector('[data-field="embed"]').innerHTML = getVideoEmbed(video.video_url);
+            clone.querySelector('[data-field="embed"]').innerHTML = getVideoEmbed(video.video_url, video.poster_url);
             clone.querySelector('[data-field="title"]').textContent = video.title || 'Untitled';
             clone.querySelector('[data-field="type"]').textContent = video.video_type || 'N/A';
             
@@ -264,7 +264,7 @@
     /**
      * Get video embed HTML
      */
-    function getVideoEmbed(url) {
+    function getVideoEmbed(url, posterUrl) {
         // Check if YouTube
         const youtubeRegex = /(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^"&?\/\s]{11})/;
         const match = url.match(youtubeRegex);
@@ -276,7 +276,9 @@
         // Check if video file
         if (url.match(/\.(mp4|webm|ogg)$/i)) {
             const videoSrc = url.startsWith('/uploads') ? API_BASE_URL + url : url;
-            return `<video width="100%" height="200" controls><source src="${videoSrc}"></video>`;
+            // Only fetch the header (index) until the user presses play
+            const poster = posterUrl ? ` poster="${posterUrl.startsWith('/uploads') ? API_BASE_URL + posterUrl : posterUrl}"` : '';
+            return `<video width="100%" height="200" controls preload="metadata"${poster}><source src="${videoSrc}"></video>`;
         }
         
         return `<div class="video-placeholder"><i class="fas fa-video"></i><p>Video Preview</p></div>`;
@@ -0,0 +1,401 @@
+"""
+Asset Build Step for the MyShowz Admin Pages
+Bundles, minifies and fingerprints the admin JS/CSS into frontend/dist/
+
+For every admin page:
+- Consecutive local <link rel="stylesheet"> / <script src> tags are merged into
+  one bundle (CSS @imports are inlined, url() references rebased)
+- The part shared by all pages (style-starter + admin.css, jQuery + config +
+  auth-handler + admin-common) becomes a common bundle, cached across pages
+- Bundles are minified and written as <name>.<hash>.css|js
+- sidebar.html is inlined, so the page no longer fetches it at runtime
+- dist/asset-manifest.json maps page/bundle URLs to the built files;
+  `python server.py --prod` serves them (bundles as immutable)
+
+Usage: python build_assets.py
+"""
+
+import glob
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import time
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(DIRECTORY, 'dist')
+MANIFEST_NAME = 'asset-manifest.json'
+PAGES = 'admin/*.html'
+BUNDLE_URL_DIR = '/admin/assets/bundles'
+SIDEBAR_URL = '/admin/sidebar.html'
+HASH_LENGTH = 10
+
+STYLESHEET_TAG = re.compile(r'''<link\b[^>]*\brel=["']stylesheet["'][^>]*>''', re.IGNORECASE)
+SCRIPT_TAG = re.compile(r'''<script\b[^>]*\bsrc=["']([^"']+)["'][^>]*>\s*</script>''', re.IGNORECASE)
+HREF_ATTR = re.compile(r'''\bhref=["']([^"']+)["']''', re.IGNORECASE)
+SIDEBAR_CONTAINER = re.compile(r'''<div id="sidebar-container"></div>''')
+CSS_IMPORT = re.compile(r'''@import\s+(?:url\(\s*)?["']?([^"')\s;]+)["']?\s*\)?\s*([^;]*);''', re.IGNORECASE)
+CSS_URL = re.compile(r'''url\(\s*(["']?)([^"')]+)\1\s*\)''', re.IGNORECASE)
+EXTERNAL_REF = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//|#)', re.IGNORECASE)
+
+
+# ==================== PAGE SCANNING ====================
+
+def local_url(page_url, ref):
+    """Root-relative URL of a local reference, or None for external ones"""
+    ref = ref.split('#', 1)[0].split('?', 1)[0]
+    if not ref or EXTERNAL_REF.match(ref):
+        return None
+    if ref.startswith('/'):
+        return ref
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page_url), ref))
+
+
+def find_runs(page_url, html):
+    """
+    Group consecutive local stylesheet/script tags (only whitespace between them)
+
+    Returns:
+        list: (kind, start, end, [urls]) runs in document order
+    """
+    tags = []
+    for match in STYLESHEET_TAG.finditer(html):
+        href = HREF_ATTR.search(match.group(0))
+        url = local_url(page_url, href.group(1)) if href else None
+        if url:
+            tags.append(('css', match.start(), match.end(), url))
+    for match in SCRIPT_TAG.finditer(html):
+        url = local_url(page_url, match.group(1))
+        if url:
+            tags.append(('js', match.start(), match.end(), url))
+    tags.sort(key=lambda tag: tag[1])
+
+    runs = []
+    for kind, start, end, url in tags:
+        last = runs[-1] if runs else None
+        if last and last[0] == kind and not html[last[2]:start].strip():
+            runs[-1] = (kind, last[1], end, last[3] + [url])
+        else:
+            runs.append((kind, start, end, [url]))
+    return runs
+
+
+def common_prefix(lists):
+    prefix = list(lists[0]) if lists else []
+    for items in lists[1:]:
+        n = 0
+        while n < min(len(prefix), len(items)) and prefix[n] == items[n]:
+            n += 1
+        prefix = prefix[:n]
+    return prefix
+
+
+# ==================== CSS ====================
+
+def read_source(url):
+    with open(os.path.join(DIRECTORY, url.lstrip('/')), encoding='utf-8') as f:
+        return f.read()
+
+
+def inline_css(url, bundle_dir, external_imports, seen=None):
+    """Inline local @imports and rebase url() references onto the bundle directory"""
+    seen = set() if seen is None else seen
+    if url in seen:
+        return ''
+    seen.add(url)
+
+    css = strip_css_comments(read_source(url))
+    base = posixpath.dirname(url)
+
+    def rebase(match):
+        quote, ref = match.group(1), match.group(2).strip()
+        if EXTERNAL_REF.match(ref) or ref.startswith(('data:', '/')):
+            return match.group(0)
+        path, tail = re.match(r'([^?#]*)(.*)', ref, re.DOTALL).groups()
+        if not path:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(base, path))
+        return f'url({quote}{posixpath.relpath(target, bundle_dir)}{tail}{quote})'
+
+    def expand(match):
+        ref, media = match.group(1), match.group(2).strip()
+        target = local_url(url, ref)
+        if target is None:
+            external_imports.append(match.group(0))
+            return ''
+        inner = inline_css(target, bundle_dir, external_imports, seen)
+        return f'@media {media}{{{inner}}}' if media else inner
+
+    css = CSS_URL.sub(rebase, css)
+    # Imports run after rebasing so imported files are rebased from their own location
+    css = CSS_IMPORT.sub(expand, css)
+    return re.sub(r'@charset\s+["\'][^"\']*["\']\s*;', '', css)
+
+
+def strip_css_comments(css):
+    out = []
+    i, n = 0, len(css)
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and css[j] != c:
+                j += 2 if css[j] == '\\' else 1
+            out.append(css[i:j + 1])
+            i = j + 1
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+
+def minify_css(css):
+    """Collapse whitespace outside strings (comments are already stripped)"""
+    parts = re.split(r'''("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')''', css)
+    for i in range(0, len(parts), 2):
+        text = re.sub(r'\s+', ' ', parts[i])
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        parts[i] = text.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def build_css(urls, bundle_dir, seen=None):
+    """Bundle stylesheets; `seen` collects every file read (incl. @imports)"""
+    seen = set() if seen is None else seen
+    external_imports = []
+    body = '\n'.join(inline_css(url, bundle_dir, external_imports, seen) for url in urls)
+    # @import must precede every other rule
+    return '\n'.join(external_imports + [minify_css(body)]) + '\n'
+
+
+# ==================== JS ====================
+
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^') | {''}
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'yield', 'await'}
+
+
+def minify_js(js):
+    """
+    Conservative minifier: drops comments, indentation and blank lines
+
+    Strings, template literals and regex literals are copied verbatim and
+    newlines are kept, so automatic semicolon insertion still behaves the same.
+    """
+    out = []
+    i, n = 0, len(js)
+    line_start = True
+    last_significant = ''
+
+    while i < n:
+        c = js[i]
+
+        if line_start and c in ' \t\r':
+            i += 1
+            continue
+        if c == '\n':
+            if out and out[-1] != '\n':
+                while out and out[-1] in (' ', '\t', '\r'):
+                    out.pop()
+                out.append('\n')
+            line_start = True
+            i += 1
+            continue
+        line_start = False
+
+        if js.startswith('//', i):
+            end = js.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+
+        if c in '"\'`' or (c == '/' and last_significant in REGEX_PRECEDERS):
+            j = _skip_literal(js, i)
+            out.append(js[i:j])
+            last_significant = c
+            i = j
+            continue
+
+        if c.isalnum() or c in '_$':
+            j = i + 1
+            while j < n and (js[j].isalnum() or js[j] in '_$'):
+                j += 1
+            word = js[i:j]
+            out.append(word)
+            # A '/' after an identifier is a division, after `return` etc. a regex
+            last_significant = '' if word in REGEX_KEYWORDS else 'a'
+            i = j
+            continue
+
+        out.append(c)
+        if not c.isspace():
+            last_significant = c
+        i += 1
+
+    return ''.join(out).strip() + '\n'
+
+
+def _skip_literal(js, i):
+    """End index of the string / template / regex literal starting at i"""
+    quote, n = js[i], len(js)
+    j = i + 1
+    in_class = False
+    depth = 0
+    while j < n:
+        c = js[j]
+        if c == '\\':
+            j += 2
+            continue
+        if quote == '`':
+            if js.startswith('${', j):
+                depth += 1
+                j += 2
+                continue
+            if depth and c == '}':
+                depth -= 1
+            elif not depth and c == '`':
+                return j + 1
+        elif quote == '/':
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '/' and not in_class:
+                j += 1
+                while j < n and (js[j].isalnum()):
+                    j += 1  # flags
+                return j
+            elif c == '\n':
+                return j
+        elif c == quote or c == '\n':
+            return j + 1
+        j += 1
+    return n
+
+
+def build_js(urls):
+    parts = []
+    for url in urls:
+        source = read_source(url)
+        parts.append(source.strip() + '\n' if url.endswith('.min.js') else minify_js(source))
+    # ';' guards against a file that ends without one
+    return ';\n'.join(parts)
+
+
+# ==================== BUILD ====================
+
+def write_bundle(kind, label, content, bundles):
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    if digest in bundles:
+        return bundles[digest]['url']
+
+    url = f'{BUNDLE_URL_DIR}/{label}.{digest}.{kind}'
+    path = os.path.join(DIST_DIR, url.lstrip('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    bundles[digest] = {'url': url, 'size': len(content.encode('utf-8'))}
+    return url
+
+
+def tag_for(kind, page_url, bundle_url):
+    href = posixpath.relpath(bundle_url, posixpath.dirname(page_url))
+    if kind == 'css':
+        return f'<link rel="stylesheet" href="{href}">'
+    return f'<script src="{href}"></script>'
+
+
+def build():
+    started = time.monotonic()
+    built_at = time.time()
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(DIRECTORY, PAGES))):
+        url = '/' + os.path.relpath(path, DIRECTORY).replace(os.sep, '/')
+        if url == SIDEBAR_URL:
+            continue
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        pages[url] = (html, find_runs(url, html))
+
+    # Shared head of the first CSS run and the first JS run of every page
+    shared = {}
+    for kind in ('css', 'js'):
+        first_runs = [next((r[3] for r in runs if r[0] == kind), []) for _, runs in pages.values()]
+        shared[kind] = common_prefix(first_runs) if len(first_runs) > 1 else []
+
+    sidebar = read_source(SIDEBAR_URL).strip()
+    bundles = {}
+    built = {}
+    files = {}
+    sources = set()
+
+    for page_url, (html, runs) in pages.items():
+        page_name = posixpath.splitext(posixpath.basename(page_url))[0]
+        first_index = {}
+        for index, run in enumerate(runs):
+            first_index.setdefault(run[0], index)
+
+        # Replace runs from the end so earlier offsets stay valid
+        for index, (kind, start, end, urls) in reversed(list(enumerate(runs))):
+            groups = []
+            prefix = shared[kind]
+            if index == first_index[kind] and prefix and urls[:len(prefix)] == prefix:
+                groups.append(('admin-common', prefix))
+                urls = urls[len(prefix):]
+            if urls:
+                groups.append((page_name, urls))
+
+            tags = []
+            for label, group in groups:
+                key = (kind, tuple(group))
+                if key not in built:
+                    read = set()
+                    content = build_css(group, BUNDLE_URL_DIR, read) if kind == 'css' else build_js(group)
+                    built[key] = write_bundle(kind, label, content, bundles)
+                    sources.update(group, read)
+                tags.append(tag_for(kind, page_url, built[key]))
+            html = html[:start] + '\n  '.join(tags) + html[end:]
+
+        html = SIDEBAR_CONTAINER.sub(
+            lambda m: f'<div id="sidebar-container" data-inlined="true">\n{sidebar}\n</div>', html
+        )
+        out_path = os.path.join(DIST_DIR, page_url.lstrip('/'))
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        files[page_url] = posixpath.relpath(out_path, DIRECTORY).replace(os.sep, '/')
+
+    for bundle in bundles.values():
+        files[bundle['url']] = 'dist' + bundle['url']
+
+    manifest = {
+        'built_at': built_at,
+        'files': files,
+        'immutable': sorted(bundle['url'] for bundle in bundles.values()),
+        'sources': sorted(sources | set(pages) | {SIDEBAR_URL})
+    }
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"📦 Built {len(pages)} admin pages, {len(bundles)} bundles in {time.monotonic() - started:.2f}s")
+    for bundle in sorted(bundles.values(), key=lambda b: b['url']):
+        print(f"   {bundle['url']}  {bundle['size'] / 1024:.1f} KB")
+    print(f"📝 Manifest: {os.path.relpath(os.path.join(DIST_DIR, MANIFEST_NAME), DIRECTORY)}")
+    return manifest
+
+
+if __name__ == '__main__':
+    build()
+    sys.exit(0)
@@ -1,20 +1,74 @@
 """
 Simple HTTP Server for MyShowz Frontend
 Serves static files on port 3000
+
+Modes:
+- Development (default): files are read from disk on every request, no caching
+- Production (--prod or FRONTEND_MODE=production): assets are indexed once at
+  startup, text assets are precompressed (gzip, and brotli when the `brotli`
+  package is installed), asset URLs in HTML/CSS get a content fingerprint
+  (?v=<hash>) so they can be cached as immutable, and conditional requests
+  are answered with 304. Restart the server after changing files.
+  If `python build_assets.py` has been run, the bundled admin pages from
+  dist/asset-manifest.json are served instead of the source pages.
 """
 
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
+import json
+import mimetypes
 import os
+import posixpath
+import re
 import sys
+import time
+from collections import namedtuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
 
-PORT = 3000
+PORT = int(os.environ.get('PORT', 3000))
 DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PRODUCTION = '--prod' in sys.argv or os.environ.get('FRONTEND_MODE') == 'production'
+
+IMMUTABLE_MAX_AGE = 31536000
+FINGERPRINT_LENGTH = 12
+COMPRESS_MIN_SIZE = 1024
+MEMORY_MAX_SIZE = 64 * 1024
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'image/svg+xml',
+    'font/ttf', 'font/otf', 'application/vnd.ms-fontobject', 'application/x-font-ttf'
+)
+REWRITE_EXTENSIONS = ('.html', '.css')
+SKIP_FILES = ('server.py', 'build_assets.py')
+SKIP_DIRS = ('dist', '__pycache__')
+BUILD_MANIFEST = os.path.join('dist', 'asset-manifest.json')
+
+mimetypes.add_type('application/javascript', '.js')
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('font/woff', '.woff')
+mimetypes.add_type('font/ttf', '.ttf')
+mimetypes.add_type('font/otf', '.otf')
+mimetypes.add_type('application/vnd.ms-fontobject', '.eot')
+
+# src="..." / href="..." in HTML, url(...) and @import "..." in CSS (and inline styles)
+ATTR_REF = re.compile(r'''(\b(?:src|href)\s*=\s*)(["'])([^"'<>]+)\2''', re.IGNORECASE)
+CSS_URL_REF = re.compile(r'''(url\(\s*)(["']?)([^"')]+)\2(\s*\))''', re.IGNORECASE)
+CSS_IMPORT_REF = re.compile(r'''(@import\s+)(["'])([^"']+)\2''', re.IGNORECASE)
+EXTERNAL_REF = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//|#|\{\{|\$\{)', re.IGNORECASE)
+
+Asset = namedtuple('Asset', 'path mime size mtime fingerprint etag bodies immutable')
+
 
 class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
-    
+
     def end_headers(self):
         # Add CORS headers
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -22,17 +76,309 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
         super().end_headers()
-    
+
     def do_GET(self):
         # Handle root path
         if self.path == '/':
             self.path = '/index.html'
         return super().do_GET()
 
+
+# ==================== PRODUCTION MODE ====================
+
+class AssetIndex:
+    """Every servable file, fingerprinted and precompressed once at startup"""
+
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+        self._files = {}
+        self._immutable = set()
+        self._building = set()
+        self.manifest = None
+
+    def build(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d not in SKIP_DIRS)
+            for name in filenames:
+                if name.startswith('.') or name in SKIP_FILES:
+                    continue
+                path = os.path.join(dirpath, name)
+                url = '/' + os.path.relpath(path, self.root).replace(os.sep, '/')
+                self._files[url] = path
+
+        self._apply_manifest()
+
+        # HTML/CSS are rewritten before hashing, so dependencies are resolved depth-first
+        for url in sorted(self._files):
+            self._load(url)
+        return self
+
+    def get(self, url):
+        return self.assets.get(url)
+
+    def _apply_manifest(self):
+        """Serve built pages/bundles (build_assets.py output) in place of the sources"""
+        path = os.path.join(self.root, BUILD_MANIFEST)
+        if not os.path.exists(path):
+            return
+
+        with open(path, encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        for url, relative in self.manifest['files'].items():
+            self._files[url] = os.path.join(self.root, relative)
+        # Hashed bundle names change with their content
+        self._immutable.update(self.manifest['immutable'])
+
+        stale = [
+            url for url in self.manifest.get('sources', [])
+            if os.path.exists(os.path.join(self.root, url.lstrip('/')))
+            and os.path.getmtime(os.path.join(self.root, url.lstrip('/'))) > self.manifest['built_at']
+        ]
+        if stale:
+            print(f"⚠️  {len(stale)} source file(s) changed since the last build (e.g. {stale[0]}), "
+                  f"run: python build_assets.py")
+
+    def stats(self):
+        compressed = [a for a in self.assets.values() if len(a.bodies) > 1]
+        original = sum(a.size for a in compressed)
+        smallest = sum(min(len(body) for body in a.bodies.values()) for a in compressed)
+        return len(self.assets), len(compressed), original - smallest
+
+    def _load(self, url):
+        if url in self.assets:
+            return self.assets[url]
+        if url not in self._files or url in self._building:
+            return None  # Unknown file, or an import cycle
+
+        self._building.add(url)
+        try:
+            path = self._files[url]
+            mime = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            if path.lower().endswith(REWRITE_EXTENSIONS):
+                data = self._rewrite(url, data)
+
+            digest = hashlib.sha256(data).hexdigest()
+            compressible = mime.startswith(COMPRESSIBLE_TYPES)
+            # Text and small files are kept in memory; large binaries are sent from disk
+            bodies = {'identity': data} if compressible or len(data) <= MEMORY_MAX_SIZE else {}
+            if compressible:
+                bodies.update(_precompress(data))
+
+            asset = Asset(
+                path=path,
+                mime=mime,
+                size=len(data),
+                mtime=int(os.path.getmtime(path)),
+                fingerprint=digest[:FINGERPRINT_LENGTH],
+                etag=digest[:16],
+                bodies=bodies,  # Empty: binary file, streamed from disk
+                immutable=url in self._immutable
+            )
+            self.assets[url] = asset
+            return asset
+        finally:
+            self._building.discard(url)
+
+    def _rewrite(self, url, data):
+        """Append ?v=<fingerprint> to every local asset URL in an HTML/CSS file"""
+        text = data.decode('utf-8', errors='surrogateescape')
+        base = posixpath.dirname(url)
+
+        def fingerprint(match):
+            prefix, quote, ref = match.group(1), match.group(2), match.group(3)
+            suffix = match.group(4) if match.lastindex >= 4 else ''
+            return f'{prefix}{quote}{self._fingerprinted(base, ref)}{quote}{suffix}'
+
+        text = ATTR_REF.sub(fingerprint, text)
+        text = CSS_URL_REF.sub(fingerprint, text)
+        text = CSS_IMPORT_REF.sub(fingerprint, text)
+        return text.encode('utf-8', errors='surrogateescape')
+
+    def _fingerprinted(self, base, ref):
+        stripped = ref.strip()
+        if not stripped or EXTERNAL_REF.match(stripped):
+            return ref
+
+        path, _, fragment = stripped.partition('#')
+        path = path.split('?', 1)[0]
+        if not path or path.lower().endswith('.html'):
+            return ref  # Pages stay revalidated (no-cache), never fingerprinted
+
+        target = unquote(path) if path.startswith('/') else posixpath.normpath(posixpath.join(base, unquote(path)))
+        asset = self._load(target)
+        if asset is None or asset.immutable:
+            return ref
+
+        return f"{path}?v={asset.fingerprint}{'#' + fragment if fragment else ''}"
+
+
+def _precompress(data):
+    """Compressed variants that are worth sending (at least 10% smaller)"""
+    if len(data) < COMPRESS_MIN_SIZE:
+        return {}
+
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {name: body for name, body in variants.items() if len(body) < len(data) * 0.9}
+
+
+def choose_encoding(accept_encoding, available):
+    """
+    Pick the best precompressed body for an Accept-Encoding header
+
+    Args:
+        accept_encoding (str): Request header value (may be empty)
+        available (iterable): Encodings the asset has ('identity', 'gzip', 'br')
+
+    Returns:
+        str: Chosen encoding ('identity' if nothing better is accepted)
+    """
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+class ProductionRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves from the prebuilt AssetIndex with caching headers"""
+
+    protocol_version = 'HTTP/1.1'
+    index = None
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head):
+        parts = urlsplit(self.path)
+        url = unquote(parts.path)
+        if url.endswith('/'):
+            url += 'index.html'
+
+        asset = self.index.get(url)
+        if asset is None:
+            self.send_error(404, 'File not found')
+            return
+
+        available = asset.bodies.keys() or ('identity',)
+        encoding = choose_encoding(self.headers.get('Accept-Encoding'), available)
+        etag = f'"{asset.etag}"' if encoding == 'identity' else f'"{asset.etag}-{encoding}"'
+
+        # A URL carrying the current fingerprint can never change: cache it for a year
+        if asset.immutable or parse_qs(parts.query).get('v', [None])[0] == asset.fingerprint:
+            cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            cache_control = 'no-cache'
+
+        if self._not_modified(asset, etag):
+            self.send_response(304)
+            self._send_common_headers(asset, etag, cache_control)
+            self.end_headers()
+            return
+
+        body = asset.bodies.get(encoding)
+        self.send_response(200)
+        self.send_header('Content-Type', _content_type(asset.mime))
+        self.send_header('Content-Length', str(len(body) if body is not None else asset.size))
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self._send_common_headers(asset, etag, cache_control)
+        self.end_headers()
+
+        if head:
+            return
+        if body is not None:
+            self.wfile.write(body)
+        else:
+            with open(asset.path, 'rb') as f:
+                self.wfile.flush()
+                self.connection.sendfile(f)
+
+    def _send_common_headers(self, asset, etag, cache_control):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(asset.mtime, usegmt=True))
+        self.send_header('Cache-Control', cache_control)
+        if len(asset.bodies) > 1:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+
+    def _not_modified(self, asset, etag):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or etag in tags
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since.timestamp() >= asset.mtime
+        return False
+
+
+def _content_type(mime):
+    if mime.startswith('text/') or mime in ('application/javascript', 'application/json', 'image/svg+xml'):
+        return f'{mime}; charset=utf-8'
+    return mime
+
+
+def run_production():
+    started = time.monotonic()
+    ProductionRequestHandler.index = AssetIndex(DIRECTORY).build()
+    total, compressed, saved = ProductionRequestHandler.index.stats()
+
+    with http.server.ThreadingHTTPServer(("", PORT), ProductionRequestHandler) as httpd:
+        print("=" * 70)
+        print("🎬 MyShowz Frontend Server (production)")
+        print("=" * 70)
+        print(f"🌐 Frontend: http://localhost:{PORT}")
+        print(f"📦 Indexed {total} files in {time.monotonic() - started:.2f}s"
+              f"{' (admin bundles from dist/)' if ProductionRequestHandler.index.manifest else ''}")
+        print(f"🗜️  Precompressed {compressed} files "
+              f"(gzip{', brotli' if brotli else ''}), {saved / 1024:.0f} KB saved per full load")
+        print(f"✨ Press Ctrl+C to stop the server")
+        print("=" * 70)
+
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Server stopped")
+            sys.exit(0)
+
+
 if __name__ == "__main__":
     os.chdir(DIRECTORY)
-    
-    with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
+
+    if PRODUCTION:
+        run_production()
+        sys.exit(0)
+
+    with http.server.ThreadingHTTPServer(("", PORT), MyHTTPRequestHandler) as httpd:
         print("=" * 70)
         print("🎬 MyShowz Frontend Server Starting...")
         print("=" * 70)
@@ -49,7 +395,7 @@ if __name__ == "__main__":
         print(f"✨ Serving files from: {DIRECTORY}")
         print(f"✨ Press Ctrl+C to stop the server")
         print("=" * 70)
-        
+
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
@@ -0,0 +1,11 @@
+"""
+Shared test setup
+The backend modules import each other as top-level packages (database, models, services, ...)
+"""
+import os
+import sys
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
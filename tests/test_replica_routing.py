@@ -0,0 +1,125 @@
+"""
+Read/write splitting (database/db.py) on two SQLite files: a primary and a replica
+
+Both files hold a `probe` table whose row names the file, so a SELECT shows
+which engine served it.
+"""
+from flask import Flask
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+import pytest
+
+from config import Config
+from database.db import db, init_db, read_only, replica_router
+
+
+probe = Table(
+    'probe', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('source', String(20))
+)
+
+
+def _create_database(path, source):
+    engine = create_engine(f'sqlite:///{path}')
+    probe.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(probe).values(source=source))
+    engine.dispose()
+
+
+def _make_app(primary_path, replica_uri):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{primary_path}',
+        SQLALCHEMY_REPLICA_URIS=[replica_uri],
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        SQLALCHEMY_BINDS={},
+        DB_POOL_SIZING='fixed',
+        REPLICA_READ_YOUR_WRITES_SECONDS=60,
+        REPLICA_HEALTH_CHECK_INTERVAL=60,
+        REPLICA_RETRY_AFTER=60
+    )
+    init_db(app)
+    return app
+
+
+@read_only
+def _read_source():
+    return db.session.execute(select(probe.c.source).order_by(probe.c.id)).scalar()
+
+
+@pytest.fixture
+def app(tmp_path):
+    _create_database(tmp_path / 'primary.db', 'primary')
+    _create_database(tmp_path / 'replica.db', 'replica')
+    app = _make_app(tmp_path / 'primary.db', f"sqlite:///{tmp_path / 'replica.db'}")
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_read_only_select_goes_to_replica(app):
+    with app.test_request_context(headers={'Authorization': 'Bearer reader'}):
+        assert _read_source() == 'replica'
+        db.session.remove()
+
+
+def test_unmarked_select_stays_on_primary(app):
+    with app.test_request_context():
+        assert db.session.execute(select(probe.c.source)).scalar() == 'primary'
+        db.session.remove()
+
+
+def test_write_goes_to_primary(app, tmp_path):
+    with app.test_request_context(headers={'Authorization': 'Bearer writer'}):
+        read_only(lambda: db.session.execute(insert(probe).values(source='written')))()
+        db.session.commit()
+        db.session.remove()
+
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    with primary.connect() as conn:
+        assert 'written' in conn.execute(select(probe.c.source)).scalars().all()
+    with replica.connect() as conn:
+        assert 'written' not in conn.execute(select(probe.c.source)).scalars().all()
+    primary.dispose()
+    replica.dispose()
+
+
+def test_read_after_write_in_same_transaction_stays_on_primary(app):
+    with app.test_request_context(headers={'Authorization': 'Bearer writer'}):
+        db.session.execute(insert(probe).values(source='pending'))
+        assert _read_source() == 'primary'
+        db.session.rollback()
+        db.session.remove()
+
+
+def test_read_your_writes_window(app):
+    with app.test_request_context(headers={'Authorization': 'Bearer writer'}):
+        db.session.execute(insert(probe).values(source='written'))
+        db.session.commit()
+        db.session.remove()
+
+    # The writer reads the primary until the window expires, other clients keep using the replica
+    with app.test_request_context(headers={'Authorization': 'Bearer writer'}):
+        assert _read_source() == 'primary'
+        db.session.remove()
+    with app.test_request_context(headers={'Authorization': 'Bearer someone-else'}):
+        assert _read_source() == 'replica'
+        db.session.remove()
+
+
+def test_unhealthy_replica_falls_back_to_primary(tmp_path):
+    _create_database(tmp_path / 'primary.db', 'primary')
+    # SQLite cannot open a file in a missing directory: the health check fails
+    app = _make_app(tmp_path / 'primary.db', f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    with app.test_request_context():
+        assert _read_source() == 'primary'
+        assert replica_router.choose() is None
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
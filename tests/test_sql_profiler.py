@@ -0,0 +1,60 @@
+"""
+SQL profiler middleware (middleware/sql_profiler.py): N+1 detection and the per-endpoint report
+"""
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+import pytest
+
+from middleware.sql_profiler import NPlusOneError, sql_profiler
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    yield engine
+    engine.dispose()
+    sql_profiler._report.clear()
+
+
+def _make_app(engine, testing, threshold=3):
+    app = Flask(__name__)
+    app.config.update(TESTING=testing, SQL_NPLUSONE_THRESHOLD=threshold)
+    # The engine events are installed once per process: use the shared instance
+    sql_profiler.init_app(app)
+
+    @app.route('/movies/<int:n>')
+    def movies(n):
+        with engine.connect() as conn:
+            values = [conn.execute(text('SELECT :id'), {'id': i}).scalar() for i in range(n)]
+        return jsonify(values)
+
+    return app
+
+
+def test_nplusone_raises_when_testing(engine):
+    app = _make_app(engine, testing=True)
+    client = app.test_client()
+
+    assert client.get('/movies/3').status_code == 200
+    with pytest.raises(NPlusOneError, match='N\\+1 in movies: 4x SELECT \\?'):
+        client.get('/movies/4')
+
+
+def test_nplusone_only_logged_outside_tests(engine, capsys):
+    app = _make_app(engine, testing=False)
+
+    assert app.test_client().get('/movies/5').status_code == 200
+    assert 'N+1 in movies' in capsys.readouterr().out
+    assert sql_profiler.report()['movies']['nplusone_requests'] == 1
+
+
+def test_unmatched_urls_share_one_report_entry(engine):
+    app = _make_app(engine, testing=True)
+    client = app.test_client()
+
+    for i in range(20):
+        assert client.get(f'/scan/{i}.php').status_code == 404
+    client.get('/movies/2')
+
+    assert set(sql_profiler.report()) == {'<unmatched>', 'movies'}
+    assert sql_profiler.report()['<unmatched>']['requests'] == 20